@@ -3,7 +3,11 @@ from typing import Dict, Optional
 
 import requests
 import streamlit as st
-from bs4 import BeautifulSoup
+
+from components.problem_loader import load_problem_payload
+from components.problem_sources import ProblemFetchError
+from utils.html_markdown import html_to_markdown
+from utils.validators import extract_title_slug
 
 
 @dataclass
@@ -32,76 +36,12 @@ class ProblemFetcher:
     @staticmethod
     def _process_html(html_content: str) -> tuple:
         """Process HTML content and extract images and formatted text"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        images = []
-        
-        # Extract and process images
-        for img in soup.find_all('img'):
-            src = img.get('src', '')
-            alt = img.get('alt', '')
-            if src:
-                images.append({'src': src, 'alt': alt})
-
-        # Process text formatting
-        text = ProblemFetcher._format_text(soup)
-        return text, images
-
-    @staticmethod
-    def _format_text(soup: BeautifulSoup) -> str:
-        """Format the problem text with proper markdown"""
-        # Format code blocks
-        for code in soup.find_all('code'):
-            code_text = code.get_text()
-            code.replace_with(f'`{code_text}`')
-
-        # Format lists
-        for ul in soup.find_all('ul'):
-            items = ul.find_all('li')
-            formatted_items = '\n'.join(f"- {item.get_text().strip()}" for item in items)
-            ul.replace_with(soup.new_string(formatted_items))
-
-        # Format tables
-        for table in soup.find_all('table'):
-            markdown_table = ProblemFetcher._convert_table_to_markdown(table)
-            table.replace_with(BeautifulSoup(markdown_table, 'html.parser').new_tag('p'))  # Replace with a paragraph tag
-
-        # Clean up extra whitespace and normalize newlines
-        text = soup.get_text('\n', strip=True)
-        text = '\n\n'.join(
-            line.strip()
-            for line in text.split('\n')
-            if line.strip()
-        )
-
-        return text
-
-    @staticmethod
-    def _convert_table_to_markdown(table) -> str:
-        """Convert HTML table to markdown format"""
-        markdown = []
-        
-        # Process headers
-        headers = []
-        for th in table.find_all('th'):
-            headers.append(th.get_text().strip())
-        
-        if headers:
-            markdown.append('| ' + ' | '.join(headers) + ' |')
-            markdown.append('| ' + ' | '.join(['---'] * len(headers)) + ' |')
-        
-        # Process rows
-        for row in table.find_all('tr')[1:]: 
-            cols = []
-            for td in row.find_all('td'):
-                cols.append(td.get_text().strip())
-            if cols:
-                markdown.append('| ' + ' | '.join(cols) + ' |')
-
-        return '\n'.join(markdown)
+        result = html_to_markdown(html_content)
+        return result.text, result.images
 
     def fetch_problem(self, url: str) -> Optional[LeetCodeProblem]:
         """
-        Fetch problem details from LeetCode API
+        Fetch problem details from the problem cache or the LeetCode sources
 
         Args:
             url: LeetCode problem URL
@@ -110,42 +50,16 @@ class ProblemFetcher:
             LeetCodeProblem object if successful, None otherwise
         """
         try:
-            title_slug = url.split('problems/')[1].rstrip('/')
+            title_slug = extract_title_slug(url)
             print(f"Fetching problem for slug: {title_slug}")  
             print(f"URL being fetched: {url}")
 
-            query = """
-            query questionData($titleSlug: String!) {
-              question(titleSlug: $titleSlug) {
-                questionId
-                title
-                content
-                difficulty
-                exampleTestcases
-                topicTags {
-                  name
-                }
-                similarQuestions
-              }
-            }
-            """
-
-            variables = {"titleSlug": title_slug}
-            api_url = "https://leetcode.com/graphql"
-
-            response = requests.post(
-                api_url,
-                json={"query": query, "variables": variables},
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
-            data = response.json()
-            question_data = data["data"]["question"]
+            question_data = load_problem_payload(title_slug)
 
             # Extract information
             question_id = question_data["questionId"]
-            title = question_data["title"]
-            content = question_data["content"]
+            title = question_data["questionTitle"]
+            content = question_data["question"]
             difficulty = question_data["difficulty"]
             example_testcases = question_data["exampleTestcases"]
             topic_tags = [tag["name"] for tag in question_data["topicTags"]]
@@ -197,7 +111,7 @@ class ProblemFetcher:
                 }
             return problem
 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ProblemFetchError) as e:
             print(f"Request failed: {e}")
             return None
         except KeyError as e:
@@ -1,8 +1,10 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-import google.generativeai as genai
-from config.settings import Config
-from prompts import get_system_prompt
+from components.context_builder import context_builder
+from components.leetcode_api import fetch_question_by_slug
+from components.llm_backend import LLMBackend, llm_backend
+from components.prompt_builder import prompt_builder
+from utils.validators import extract_title_slug
 
 class TeachingAssistant:
     """
@@ -10,10 +12,9 @@ class TeachingAssistant:
     and maintaining conversation context.
     """
 
-    def __init__(self):
-        """Initialize the teaching assistant with API configuration"""
-        genai.configure(api_key=Config.GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        """Initialize the teaching assistant with an LLM backend (the configured one by default)"""
+        self.backend = backend or llm_backend
 
     def _create_prompt(self, question: str, problem_url: str,
                       chat_history: List[Dict], proficiency: str) -> str:
@@ -29,7 +30,12 @@ class TeachingAssistant:
         Returns:
             Formatted prompt string
         """
-        return get_system_prompt(question, problem_url, chat_history, proficiency)
+        title_slug = extract_title_slug(problem_url)
+        problem = fetch_question_by_slug(title_slug)
+        window = context_builder.build(chat_history)
+        return prompt_builder.build(
+            title_slug, proficiency, problem, window.messages, question, summary=window.summary
+        )
     
     async def get_response(self, question: str, problem_url: str,
                           chat_history: List[Dict], proficiency: str) -> str:
@@ -46,5 +52,4 @@ class TeachingAssistant:
             AI-generated response
         """
         prompt = self._create_prompt(question, problem_url, chat_history, proficiency)
-        response = await self.model.generate_content_async(prompt)
-        return response.text
+        return await self.backend.generate(prompt)
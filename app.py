@@ -4,11 +4,20 @@ from components.leetcode import validate_leetcode_url
 from components.stream_handler import stream_response
 from components.llm_handler import get_gemini_response_stream
 from components.leetcode_api import fetch_leetcode_question
+from components.context_builder import new_summary_state
 from components.db_handler import DatabaseHandler
 from components.history_sidebar import render_chat_history_sidebar
-from utils.session_utils import initialize_session_state, clear_chat_history, save_current_chat
+from components.metrics_sidebar import render_metrics_sidebar
+from components.similar_prefetcher import similar_prefetcher
+from components.speculative_hints import speculative_hints
+from utils.session_utils import (
+    initialize_session_state, clear_chat_history, save_current_chat,
+    track_generation, cancel_active_generation, forget_saved_chat
+)
 from utils.rate_limiter import rate_limiter
+from utils.tracing import span, tracer
 from ui.components.ui_utils import apply_custom_css, display_problem_details, display_full_problem_description
+from utils.validators import extract_title_slug
 
 def process_leetcode_url(leetcode_url):
     """Process LeetCode URL input"""
@@ -16,9 +25,16 @@ def process_leetcode_url(leetcode_url):
         if leetcode_url != st.session_state.current_problem:
             question = fetch_leetcode_question(leetcode_url)
             if question:
+                cancel_active_generation("problem_switch")
+                title_slug = extract_title_slug(leetcode_url)
+                similar_prefetcher.record_load(title_slug)
+                similar_prefetcher.schedule(question.similar_questions)
+                speculative_hints.schedule(title_slug, st.session_state.proficiency_level, question)
                 st.session_state.current_problem = leetcode_url
                 st.session_state.current_question = question
                 st.session_state.messages = []
+                st.session_state.context_summary = new_summary_state()
+                forget_saved_chat()
                 st.session_state.messages.append({
                     "role": "assistant",
                     "content": f"👋 Hi! I'm your DSA Teaching Assistant. I'll help you with: {question.title}"
@@ -37,6 +53,8 @@ def main():
     )
     
     initialize_session_state()
+    # Any generation still running belongs to a run that was interrupted
+    cancel_active_generation("rerun")
     apply_custom_css()
     
     # Sidebar configuration
@@ -74,6 +92,7 @@ def main():
         
         # Display rate limiting info
         rate_limiter.display_rate_limit_info()
+        render_metrics_sidebar()
         
         display_full_problem_description(expanded=True)
         display_problem_details()
@@ -98,46 +117,58 @@ def main():
             st.warning("Please enter a LeetCode problem URL first!")
             return
         
-        # Check rate limits before processing
-        rate_status = rate_limiter.check_rate_limit()
-        if not rate_status['allowed']:
-            st.error(f"🚫 {rate_status['message']}")
-            if rate_status['reset_time']:
-                time_until_reset = rate_status['reset_time'] - datetime.now()
-                minutes_until_reset = max(0, int(time_until_reset.total_seconds() / 60))
-                st.info(f"⏰ Try again in {minutes_until_reset} minutes.")
-            return
-        
-        # Check token limits
-        estimated_tokens = rate_limiter.estimate_tokens(prompt)
-        token_status = rate_limiter.check_token_limit(estimated_tokens)
-        if not token_status['allowed']:
-            st.error(f"📝 {token_status['message']}")
-            st.info("💡 Try breaking your question into smaller parts or be more concise.")
-            return
-        
-        # Record the query
-        rate_limiter.add_query_timestamp()
-        
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        with st.chat_message("user"):
-            st.markdown(prompt)
-        
-        with st.chat_message("assistant"):
-            response_stream = get_gemini_response_stream(
-                prompt, 
-                st.session_state.current_problem,
-                st.session_state.messages,
-                st.session_state.proficiency_level
-            )
+        with tracer.turn() as trace:
+            # Check rate limits before processing
+            with span("rate_limit"):
+                rate_status = rate_limiter.check_rate_limit()
+            if not rate_status['allowed']:
+                trace.outcome = "rate_limited"
+                st.error(f"🚫 {rate_status['message']}")
+                if rate_status['reset_time']:
+                    time_until_reset = rate_status['reset_time'] - datetime.now()
+                    minutes_until_reset = max(0, int(time_until_reset.total_seconds() / 60))
+                    st.info(f"⏰ Try again in {minutes_until_reset} minutes.")
+                return
+            
+            # Check token limits
+            with span("rate_limit"):
+                estimated_tokens = rate_limiter.estimate_tokens(prompt)
+                token_status = rate_limiter.check_token_limit(estimated_tokens)
+            if not token_status['allowed']:
+                trace.outcome = "token_limited"
+                st.error(f"📝 {token_status['message']}")
+                st.info("💡 Try breaking your question into smaller parts or be more concise.")
+                return
+            
+            # Record the query
+            rate_limiter.add_query_timestamp()
             
-            full_response = stream_response(response_stream)
+            st.session_state.messages.append({"role": "user", "content": prompt})
+            with st.chat_message("user"):
+                st.markdown(prompt)
             
-            if not isinstance(full_response, str) or not full_response.startswith("An error occurred"):
-                st.session_state.messages.append(
-                    {"role": "assistant", "content": full_response}
+            with st.chat_message("assistant"):
+                response_stream = get_gemini_response_stream(
+                    prompt, 
+                    st.session_state.current_problem,
+                    st.session_state.messages,
+                    st.session_state.proficiency_level,
+                    st.session_state.context_summary
                 )
-                save_current_chat()
+            
+                track_generation(response_stream)
+                full_response = stream_response(response_stream)
+                st.session_state.active_generation = None
+                trace.add_stream(response_stream)
+            
+                if not isinstance(full_response, str) or not full_response.startswith("An error occurred"):
+                    st.session_state.messages.append(
+                        {"role": "assistant", "content": full_response}
+                    )
+                    with span("save"):
+                        save_current_chat()
+                else:
+                    trace.outcome = "error"
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
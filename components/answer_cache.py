@@ -0,0 +1,450 @@
+import hashlib
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from config.settings import Config
+from utils.metrics import metrics
+
+_NON_WORD = re.compile(r"[^a-z0-9+#]+")
+_PARAGRAPH_BREAK = re.compile(r"(?<=\n\n)")
+
+
+def normalize_question(question: str) -> str:
+    """Lower-case a question and reduce it to space-separated words"""
+    return " ".join(_NON_WORD.sub(" ", question.lower()).split())
+
+
+def _entry_id(slug: str, proficiency_level: str, normalized: str) -> str:
+    return hashlib.sha1(f"{slug}\x1f{proficiency_level}\x1f{normalized}".encode("utf-8")).hexdigest()
+
+
+class CachedChunk(NamedTuple):
+    """A response chunk with the `text` attribute of a Gemini chunk"""
+    text: str
+
+
+class CachedResponse:
+    """Replay a cached answer as a response stream, so it renders like a live one"""
+
+    usage_metadata = None
+
+    def __init__(self, text: str, chunk_chars: int = 400):
+        self.text = text
+        self.chunk_chars = chunk_chars
+
+    def __iter__(self) -> Iterator[CachedChunk]:
+        chunk = ""
+        for paragraph in _PARAGRAPH_BREAK.split(self.text):
+            if chunk and len(chunk) + len(paragraph) > self.chunk_chars:
+                yield CachedChunk(chunk)
+                chunk = ""
+            chunk += paragraph
+        if chunk:
+            yield CachedChunk(chunk)
+
+
+class RecordingStream:
+    """
+    Pass a response stream through unchanged, and hand the complete answer to
+    `on_complete(answer, usage_metadata, seconds)` once it has been fully read
+    """
+
+    def __init__(self, stream, on_complete: Callable):
+        self._stream = stream
+        self._on_complete = on_complete
+        self._started = time.monotonic()
+
+    @property
+    def usage_metadata(self):
+        return getattr(self._stream, "usage_metadata", None)
+
+    def __getattr__(self, name):
+        # Timestamps and other details of the underlying stream
+        return getattr(self._stream, name)
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Cancel the underlying generation, if it can be cancelled"""
+        cancel = getattr(self._stream, "cancel", None)
+        if cancel is not None:
+            cancel(reason)
+
+    def __iter__(self):
+        parts = []
+        for chunk in self._stream:
+            yield chunk
+            if not isinstance(chunk, str):
+                parts.append(chunk.text)
+        answer = "".join(parts)
+        # A cancelled generation ends early but cleanly; never cache half an answer
+        if answer.strip() and getattr(self._stream, "cancel_reason", None) is None:
+            try:
+                self._on_complete(answer, self.usage_metadata, time.monotonic() - self._started)
+            except Exception as e:
+                print(f"Error caching answer: {e}")
+
+
+class HashingEmbedder:
+    """Local embeddings: hashed word and character trigram counts, L2-normalized"""
+
+    def __init__(self, dimensions: int = 1024):
+        import numpy as np
+
+        self._np = np
+        self.dimensions = dimensions
+
+    def embed(self, text: str):
+        np = self._np
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        normalized = normalize_question(text)
+        padded = f" {normalized} "
+        features = normalized.split() + [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for feature in features:
+            vector[zlib.crc32(feature.encode("utf-8")) % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class SentenceTransformerEmbedder:
+    """Local embeddings from a sentence-transformers model"""
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def embed(self, text: str):
+        return self.model.encode(text, normalize_embeddings=True)
+
+
+class _SemanticIndex:
+    """Unit vectors of one (problem, proficiency)'s cached questions, searched with one matrix product"""
+
+    def __init__(self):
+        import numpy as np
+
+        self._np = np
+        self._vectors: "OrderedDict[str, object]" = OrderedDict()
+        self._ids: List[str] = []
+        self._matrix = None
+
+    def add(self, entry_id: str, vector) -> None:
+        self._vectors[entry_id] = vector
+        self._matrix = None
+
+    def remove(self, entry_id: str) -> None:
+        if self._vectors.pop(entry_id, None) is not None:
+            self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def search(self, vector) -> Optional[Tuple[str, float]]:
+        """Return the most similar entry id and its cosine similarity"""
+        if not self._vectors:
+            return None
+        if self._matrix is None:
+            self._ids = list(self._vectors)
+            self._matrix = self._np.vstack(list(self._vectors.values()))
+        scores = self._matrix @ vector
+        best = int(self._np.argmax(scores))
+        return self._ids[best], float(scores[best])
+
+
+class MongoAnswerStore:
+    """Persistent answer store backed by the `answer_cache` collection in MongoDB"""
+
+    def __init__(self, uri: str, ttl_seconds: Optional[float]):
+        from pymongo import ASCENDING, MongoClient
+
+        self.client = MongoClient(uri)
+        self.answers = self.client["dsa_assistant"]["answer_cache"]
+        self.answers.create_index([("slug", ASCENDING), ("proficiency_level", ASCENDING)])
+        if ttl_seconds:
+            self.answers.create_index([("created_at", ASCENDING)], expireAfterSeconds=int(ttl_seconds))
+
+    def get(self, entry_id: str) -> Optional[Dict]:
+        return self.answers.find_one({"_id": entry_id})
+
+    def find_problem(self, slug: str, proficiency_level: str, limit: int) -> List[Dict]:
+        return list(
+            self.answers.find({"slug": slug, "proficiency_level": proficiency_level})
+            .sort("created_at", -1)
+            .limit(limit)
+        )
+
+    def put(self, entry: Dict) -> None:
+        self.answers.replace_one({"_id": entry["_id"]}, entry, upsert=True)
+
+    def delete(self, entry_id: str) -> None:
+        self.answers.delete_one({"_id": entry_id})
+
+
+class AnswerCache:
+    """
+    Cache of answers to recurring student questions.
+
+    Entries are keyed by (title slug, proficiency, normalized question) and
+    kept in an in-process LRU with a TTL, backed by an optional persistent
+    store shared by all workers. With an embedder configured, a question that
+    misses the exact key is matched against the problem's cached questions by
+    cosine similarity.
+
+    Only standalone questions are cached: the first question of a chat, short,
+    and without pasted code, since later answers depend on the conversation.
+    """
+
+    def __init__(self, store: Optional[MongoAnswerStore] = None, max_entries: int = 2000,
+                 ttl_seconds: Optional[float] = 7 * 24 * 3600, embedder=None,
+                 similarity_threshold: float = 0.9, max_question_chars: int = 300,
+                 first_turn_only: bool = True, enabled: bool = True):
+        self.store = store
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.max_question_chars = max_question_chars
+        self.first_turn_only = first_turn_only
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._indexes: Dict[Tuple[str, str], _SemanticIndex] = {}
+        self._lock = threading.Lock()
+        self.exact_hits = metrics.counter("answer_cache.exact_hits", "Questions answered from an exact cache match")
+        self.semantic_hits = metrics.counter("answer_cache.semantic_hits", "Questions answered from a similar cached question")
+        self.misses = metrics.counter("answer_cache.misses", "Cacheable questions sent to the model")
+        self.stores = metrics.counter("answer_cache.stores", "Answers added to the cache")
+        self.evictions = metrics.counter("answer_cache.evictions", "Answers evicted from memory")
+        self.saved_tokens = metrics.counter("answer_cache.saved_tokens", "Model tokens not spent thanks to hits")
+        self.saved_seconds = metrics.counter("answer_cache.saved_seconds", "Generation time not spent thanks to hits")
+        self.lookup_seconds = metrics.histogram("answer_cache.lookup_seconds", "Answer cache lookup latency")
+
+    @classmethod
+    def from_config(cls) -> "AnswerCache":
+        """Build the cache described by the ANSWER_CACHE_* settings"""
+        ttl_hours = Config.ANSWER_CACHE_TTL_HOURS
+        ttl_seconds = ttl_hours * 3600 if ttl_hours > 0 else None
+
+        store = None
+        if Config.ANSWER_CACHE_ENABLED and Config.ANSWER_CACHE_BACKEND.lower() == "mongodb":
+            try:
+                store = MongoAnswerStore(Config.MONGODB_URI, ttl_seconds)
+            except Exception as e:
+                print(f"Answer cache persistence disabled: {e}")
+
+        embedder = None
+        if Config.ANSWER_CACHE_ENABLED and Config.ANSWER_CACHE_SEMANTIC:
+            try:
+                if Config.ANSWER_CACHE_EMBEDDER == "sentence-transformers":
+                    embedder = SentenceTransformerEmbedder(Config.ANSWER_CACHE_EMBEDDING_MODEL)
+                else:
+                    embedder = HashingEmbedder()
+            except ImportError as e:
+                print(f"Semantic answer cache disabled, missing dependency: {e}")
+
+        return cls(
+            store=store,
+            max_entries=Config.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=ttl_seconds,
+            embedder=embedder,
+            similarity_threshold=Config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            max_question_chars=Config.ANSWER_CACHE_MAX_QUESTION_CHARS,
+            first_turn_only=Config.ANSWER_CACHE_FIRST_TURN_ONLY,
+            enabled=Config.ANSWER_CACHE_ENABLED
+        )
+
+    def is_cacheable(self, question: str, conversation_history: List[Dict]) -> bool:
+        """True if the answer to `question` does not depend on the conversation"""
+        if not self.enabled or "```" in question or len(question) > self.max_question_chars:
+            return False
+        if not normalize_question(question):
+            return False
+        if self.first_turn_only and any(msg["role"] == "user" for msg in conversation_history):
+            return False
+        return True
+
+    def _expired(self, entry: Dict) -> bool:
+        if not self.ttl_seconds:
+            return False
+        created_at = entry["created_at"]
+        if created_at.tzinfo is None:
+            # MongoDB stores UTC and pymongo hands it back without a timezone
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - created_at > timedelta(seconds=self.ttl_seconds)
+
+    def _remember(self, entry: Dict) -> None:
+        """Add an entry to memory and the semantic index (lock held)"""
+        self._entries[entry["_id"]] = entry
+        self._entries.move_to_end(entry["_id"])
+        index = self._indexes.get((entry["slug"], entry["proficiency_level"]))
+        if index is not None and self.embedder is not None:
+            index.add(entry["_id"], self.embedder.embed(entry["normalized"]))
+        while len(self._entries) > self.max_entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._forget_vector(evicted)
+            self.evictions.inc()
+
+    def _forget_vector(self, entry: Dict) -> None:
+        index = self._indexes.get((entry["slug"], entry["proficiency_level"]))
+        if index is not None:
+            index.remove(entry["_id"])
+
+    def _get_exact(self, entry_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is not None:
+                if not self._expired(entry):
+                    self._entries.move_to_end(entry_id)
+                    return entry
+                del self._entries[entry_id]
+                self._forget_vector(entry)
+
+        if self.store is None:
+            return None
+        try:
+            entry = self.store.get(entry_id)
+        except Exception as e:
+            print(f"Error reading answer cache: {e}")
+            return None
+        if entry is None or self._expired(entry):
+            return None
+        with self._lock:
+            self._remember(entry)
+        return entry
+
+    def _problem_index(self, slug: str, proficiency_level: str) -> _SemanticIndex:
+        """Get a problem's semantic index, building it from memory and the store on first use"""
+        key = (slug, proficiency_level)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                return index
+
+        stored = []
+        if self.store is not None:
+            try:
+                stored = self.store.find_problem(slug, proficiency_level, self.max_entries)
+            except Exception as e:
+                print(f"Error reading answer cache: {e}")
+
+        index = _SemanticIndex()
+        with self._lock:
+            if key in self._indexes:
+                return self._indexes[key]
+            for entry in stored:
+                if entry["_id"] not in self._entries and not self._expired(entry):
+                    self._entries[entry["_id"]] = entry
+                    self._entries.move_to_end(entry["_id"], last=False)
+            for entry in self._entries.values():
+                if (entry["slug"], entry["proficiency_level"]) == key:
+                    index.add(entry["_id"], self.embedder.embed(entry["normalized"]))
+            self._indexes[key] = index
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._forget_vector(evicted)
+                self.evictions.inc()
+        return index
+
+    def _get_similar(self, slug: str, proficiency_level: str, normalized: str) -> Optional[Dict]:
+        index = self._problem_index(slug, proficiency_level)
+        vector = self.embedder.embed(normalized)
+        with self._lock:
+            match = index.search(vector)
+            if match is None or match[1] < self.similarity_threshold:
+                return None
+            entry = self._entries.get(match[0])
+            if entry is None or self._expired(entry):
+                return None
+            self._entries.move_to_end(match[0])
+            return entry
+
+    def lookup(self, slug: str, proficiency_level: str, question: str) -> Optional[str]:
+        """
+        Find a cached answer for a question
+
+        Args:
+            slug: Canonical title slug of the problem
+            proficiency_level: Student proficiency level
+            question: The student's question
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        started = time.perf_counter()
+        normalized = normalize_question(question)
+        entry = self._get_exact(_entry_id(slug, proficiency_level, normalized))
+        hits = self.exact_hits
+        if entry is None and self.embedder is not None:
+            entry = self._get_similar(slug, proficiency_level, normalized)
+            hits = self.semantic_hits
+        self.lookup_seconds.observe(time.perf_counter() - started)
+
+        if entry is None:
+            self.misses.inc()
+            return None
+        hits.inc()
+        self.saved_tokens.inc(entry.get("tokens", 0))
+        self.saved_seconds.inc(entry.get("generation_seconds", 0.0))
+        return entry["answer"]
+
+    def peek(self, slug: str, proficiency_level: str, question: str) -> Optional[str]:
+        """Get the answer cached for exactly this question, without counting a lookup"""
+        entry = self._get_exact(_entry_id(slug, proficiency_level, normalize_question(question)))
+        return entry["answer"] if entry is not None else None
+
+    def put(self, slug: str, proficiency_level: str, question: str, answer: str,
+            tokens: int = 0, generation_seconds: float = 0.0) -> None:
+        """
+        Cache the answer to a question
+
+        Args:
+            slug: Canonical title slug of the problem
+            proficiency_level: Student proficiency level
+            question: The student's question
+            answer: The model's complete answer
+            tokens: Tokens the model spent on it
+            generation_seconds: How long the answer took to generate
+        """
+        normalized = normalize_question(question)
+        entry = {
+            "_id": _entry_id(slug, proficiency_level, normalized),
+            "slug": slug,
+            "proficiency_level": proficiency_level,
+            "question": question,
+            "normalized": normalized,
+            "answer": answer,
+            "tokens": tokens,
+            "generation_seconds": generation_seconds,
+            "created_at": datetime.now(timezone.utc),
+        }
+        with self._lock:
+            self._remember(entry)
+        self.stores.inc()
+        if self.store is not None:
+            try:
+                self.store.put(entry)
+            except Exception as e:
+                print(f"Error persisting cached answer: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        """Get answer cache counters, hit rate and savings for display"""
+        hits = self.exact_hits.value + self.semantic_hits.value
+        lookups = hits + self.misses.value
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits.value,
+            "semantic_hits": self.semantic_hits.value,
+            "misses": self.misses.value,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "saved_tokens": self.saved_tokens.value,
+            "saved_seconds": self.saved_seconds.value,
+            "lookup_p50_seconds": self.lookup_seconds.percentile(50),
+            "lookup_p99_seconds": self.lookup_seconds.percentile(99),
+        }
+
+
+# Global answer cache instance
+answer_cache = AnswerCache.from_config()
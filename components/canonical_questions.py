@@ -0,0 +1,48 @@
+import re
+from typing import Optional
+
+from .answer_cache import normalize_question
+from .speculative_hints import OPENING_QUESTION
+
+COMPLEXITY_QUESTION = "What time and space complexity should I aim for on this problem, and why?"
+PITFALLS_QUESTION = "What are the common pitfalls and edge cases to watch out for in this problem?"
+
+# Canonical questions answered ahead of time for every problem and proficiency level
+CANONICAL_QUESTIONS = {
+    "approach": OPENING_QUESTION,
+    "complexity": COMPLEXITY_QUESTION,
+    "pitfalls": PITFALLS_QUESTION,
+}
+
+# First questions asking for the target complexity or the usual traps. The
+# opening hint ("approach") is routed by speculative_hints.matches_opening_intent.
+_INTENTS = {
+    COMPLEXITY_QUESTION: re.compile(
+        r"\b(complexity|complexities|big o|how fast|how efficient|optimal runtime)\b"
+    ),
+    PITFALLS_QUESTION: re.compile(
+        r"\b(pitfall|pitfalls|edge case|edge cases|corner case|corner cases|gotcha|gotchas|"
+        r"mistake|mistakes|watch out|tricky|careful)\b"
+    ),
+}
+# About the student's own work, which a canned answer can't address
+_PERSONAL_INTENT = re.compile(r"\b(my|mine|i wrote|this code|bug|error|wrong|fail|failing)\b")
+_MAX_WORDS = 20
+
+
+def canonical_question_for(question: str) -> Optional[str]:
+    """
+    Map a student's first question to the pre-generated question it asks
+
+    Args:
+        question: The student's question
+
+    Returns:
+        COMPLEXITY_QUESTION or PITFALLS_QUESTION, or None if the question
+        asks for neither, asks about the student's own work, or asks for both
+    """
+    normalized = normalize_question(question)
+    if not normalized or len(normalized.split()) > _MAX_WORDS or _PERSONAL_INTENT.search(normalized):
+        return None
+    matches = [canonical for canonical, intent in _INTENTS.items() if intent.search(normalized)]
+    return matches[0] if len(matches) == 1 else None
@@ -0,0 +1,144 @@
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+from config.settings import Config
+from utils.metrics import metrics
+from utils.rate_limiter import rate_limiter
+
+_CODE_BLOCK = re.compile(r"```(\w*)\n(.*?)```", re.DOTALL)
+_OMITTED_MARKER = "- (earlier turns omitted)"
+
+# Histogram buckets for token counts
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+
+class ConversationWindow(NamedTuple):
+    """Conversation context selected for one prompt"""
+    summary: str
+    messages: List[Dict]
+    summary_state: Dict
+    history_tokens: int
+    summary_tokens: int
+
+
+def new_summary_state() -> Dict:
+    """Rolling summary of a chat: its text and how many messages it covers"""
+    return {"text": "", "covered": 0}
+
+
+def compact_code_blocks(text: str, max_lines: int) -> str:
+    """Elide the middle of fenced code blocks longer than `max_lines`"""
+    def shorten(match):
+        lines = match.group(2).rstrip("\n").split("\n")
+        if len(lines) <= max_lines:
+            return match.group(0)
+        head = max(1, max_lines * 2 // 3)
+        tail = max(1, max_lines - head)
+        kept = lines[:head] + [f"... ({len(lines) - head - tail} lines omitted) ..."] + lines[-tail:]
+        return f"```{match.group(1)}\n" + "\n".join(kept) + "\n```"
+
+    return _CODE_BLOCK.sub(shorten, text)
+
+
+def summarize_message(message: Dict, max_chars: int = 200) -> str:
+    """Compact one message into a single summary line"""
+    text = _CODE_BLOCK.sub(
+        lambda m: f"[{m.group(1) or 'code'} block, {m.group(2).count(chr(10))} lines]",
+        message["content"]
+    )
+    text = " ".join(text.split())
+    if len(text) > max_chars:
+        text = text[:max_chars - 3].rstrip() + "..."
+    return f"- {message['role']}: {text}" if text else ""
+
+
+class ConversationContextBuilder:
+    """
+    Select the conversation context for a prompt within a token budget.
+
+    Messages are taken newest-first until the history budget is spent. Older
+    messages are folded into a rolling summary that is stored with the chat
+    and extended incrementally: each message is summarized once, when it
+    leaves the window, and the summary keeps its own budget by dropping its
+    oldest lines. Prompt size therefore stays bounded however long the chat.
+    """
+
+    def __init__(self, history_budget: int = 800, summary_budget: int = 300, max_code_lines: int = 30):
+        self.history_budget = history_budget
+        self.summary_budget = summary_budget
+        self.max_code_lines = max_code_lines
+        self.summarized = metrics.counter("context.summarized_messages", "Messages folded into rolling summaries")
+        self.history_tokens = metrics.histogram("context.history_tokens", "Estimated history tokens per prompt",
+                                                buckets=TOKEN_BUCKETS)
+        self.summary_tokens = metrics.histogram("context.summary_tokens", "Estimated summary tokens per prompt",
+                                                buckets=TOKEN_BUCKETS)
+
+    @classmethod
+    def from_config(cls) -> "ConversationContextBuilder":
+        return cls(
+            history_budget=Config.CONTEXT_HISTORY_TOKEN_BUDGET,
+            summary_budget=Config.CONTEXT_SUMMARY_TOKEN_BUDGET,
+            max_code_lines=Config.CONTEXT_MAX_CODE_LINES
+        )
+
+    def build(self, conversation_history: List[Dict],
+              summary_state: Optional[Dict] = None) -> ConversationWindow:
+        """
+        Select recent messages and extend the rolling summary
+
+        Args:
+            conversation_history: Chat messages before the current question
+            summary_state: The chat's stored summary state, if any
+
+        Returns:
+            ConversationWindow with the summary, the selected messages and
+            the updated summary state to store with the chat
+        """
+        state = dict(summary_state or new_summary_state())
+        covered = min(state.get("covered", 0), len(conversation_history))
+
+        window = []
+        used = 0
+        start = len(conversation_history)
+        for index in range(len(conversation_history) - 1, covered - 1, -1):
+            message = conversation_history[index]
+            content = compact_code_blocks(message["content"], self.max_code_lines)
+            cost = rate_limiter.estimate_tokens(f"{message['role']}: {content}") + 1
+            if used + cost > self.history_budget:
+                if window:
+                    break
+                # The newest message alone is over budget: keep its tail
+                content = "..." + content[-self.history_budget * 4:]
+                cost = self.history_budget
+            window.append({"role": message["role"], "content": content})
+            used += cost
+            start = index
+        window.reverse()
+
+        if start > covered:
+            new_lines = [summarize_message(message) for message in conversation_history[covered:start]]
+            self.summarized.inc(start - covered)
+            state = {
+                "text": self._trim_summary([state.get("text", "")] + new_lines),
+                "covered": start
+            }
+
+        summary_tokens = rate_limiter.estimate_tokens(state["text"])
+        self.history_tokens.observe(used)
+        self.summary_tokens.observe(summary_tokens)
+        return ConversationWindow(state["text"], window, state, used, summary_tokens)
+
+    def _trim_summary(self, parts: List[str]) -> str:
+        lines = [line for part in parts for line in part.split("\n") if line]
+        trimmed = bool(lines) and lines[0] == _OMITTED_MARKER
+        lines = [line for line in lines if line != _OMITTED_MARKER]
+        while lines and rate_limiter.estimate_tokens("\n".join(lines)) > self.summary_budget:
+            lines.pop(0)
+            trimmed = True
+        if trimmed:
+            lines.insert(0, _OMITTED_MARKER)
+        return "\n".join(lines)
+
+
+# Global context builder instance
+context_builder = ConversationContextBuilder.from_config()
@@ -2,18 +2,48 @@ from pymongo import MongoClient
 from datetime import datetime
 import os
 from dotenv import load_dotenv
-from .leetcode_api import LeetCodeQuestion
+from .leetcode_api import LeetCodeQuestion, PARSED_ARTIFACT_VERSION, fetch_question_by_slug
+from .problem_loader import is_problem_available_locally, load_problem_payload
 from bson.objectid import ObjectId
 from functools import lru_cache
+from utils.validators import extract_title_slug
 
 load_dotenv()
 
 
+def payload_from_problem_details(problem_details):
+    """Turn the problem details embedded in older chats back into a problem payload"""
+    # Create a data dictionary that matches LeetCodeQuestion's expected format
+    payload = {
+        'questionTitle': problem_details['title'],
+        'difficulty': problem_details['difficulty'],
+        'question': problem_details.get('raw_html', ''),
+        'topicTags': [{'name': topic} for topic in problem_details['topics']],
+        'exampleTestcases': '\n'.join(problem_details.get('examples', [])),
+    }
+
+    # Reuse the stored parse so loading a chat never runs the HTML parser
+    parsed = problem_details.get('parsed')
+    if parsed is None and 'question_text' in problem_details:
+        # Chats saved before artifacts existed still carry the parsed text and images
+        parsed = {
+            'version': PARSED_ARTIFACT_VERSION,
+            'question_text': problem_details['question_text'],
+            'images': problem_details.get('images', []),
+        }
+    if parsed is not None:
+        payload['parsed'] = parsed
+    return payload
+
+
 class DatabaseHandler:
     def __init__(self):
         self.client = MongoClient(os.getenv('MONGODB_URI'))
         self.db = self.client['dsa_assistant']
         self.chats = self.db['chat_history']
+        # Every problem a saved chat refers to; unlike the problem cache it is
+        # never expired or evicted
+        self.problems = self.db['problems']
 
     @lru_cache(maxsize=32)
     def get_chat_history(self, cache_key=None):
@@ -23,7 +53,8 @@ class DatabaseHandler:
             if cache_key is None:
                 cache_key = datetime.now().strftime('%Y%m%d%H')
             
-            return list(self.chats.find().sort('last_updated', -1).limit(10))
+            # Problems live in the problem store; skip details older chats still embed
+            return list(self.chats.find({}, {'problem_details': 0}).sort('last_updated', -1).limit(10))
         except Exception as e:
             print(f"Error fetching chat history: {e}")
             return []
@@ -32,34 +63,136 @@ class DatabaseHandler:
         """Clear the chat history cache"""
         self.get_chat_history.cache_clear()
 
-    def save_chat(self, chat_data):
-        """Save chat to database"""
+    def problem_store_ready(self):
+        """True if the durable problem store can be reached"""
+        try:
+            self.client.admin.command('ping')
+            return True
+        except Exception as e:
+            print(f"Error reaching the problem store: {e}")
+            return False
+
+    def store_problem(self, slug, payload, complete=True):
+        """
+        Keep a problem for the chats that refer to it
+
+        Args:
+            slug: Canonical title slug
+            payload: Problem payload as loaded from the problem sources
+            complete: False for payloads rebuilt from the details older chats
+                embed (no similar questions, question ID or link); those never
+                replace a complete record
+
+        Returns:
+            True if the problem is stored
+        """
+        record = {'payload': payload, 'complete': complete, 'stored_at': datetime.now()}
+        try:
+            if complete:
+                self.problems.update_one({'_id': slug}, {'$set': record}, upsert=True)
+            else:
+                self.problems.update_one({'_id': slug}, {'$setOnInsert': record}, upsert=True)
+            return True
+        except Exception as e:
+            print(f"Error storing problem: {e}")
+            return False
+
+    def get_problem(self, slug):
+        """Get a stored problem as {'payload', 'complete'}, or None"""
+        try:
+            record = self.problems.find_one({'_id': slug}, {'payload': 1, 'complete': 1})
+        except Exception as e:
+            print(f"Error fetching problem: {e}")
+            return None
+        if record is None or 'payload' not in record:
+            return None
+        return {'payload': record['payload'], 'complete': record.get('complete', True)}
+
+    def _store_chat_problem(self, chat_data):
+        slug = chat_data.get('problem_slug')
+        if not slug:
+            return False
         try:
-            # Check if chat for this problem already exists today
-            existing_chat = self.chats.find_one({
-                'problem_url': chat_data['problem_url'],
-                'timestamp': {
-                    '$gte': datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                }
-            })
+            payload = load_problem_payload(slug)
+        except Exception as e:
+            print(f"Error loading problem '{slug}': {e}")
+            return False
+        return self.store_problem(slug, payload)
+
+    def save_chat(self, chat_data, chat_id=None):
+        """
+        Save a whole chat to the database
+
+        The chat's problem is first copied to the durable problem store, since
+        the chat only keeps its slug.
+
+        Args:
+            chat_data: Complete chat document
+            chat_id: ID of the chat to overwrite, if known; otherwise today's
+                chat for the problem is overwritten or a new one is created
+
+        Returns:
+            Chat ID, or None if saving failed
+        """
+        try:
+            if chat_id is None:
+                # Check if chat for this problem already exists today
+                existing_chat = self.chats.find_one({
+                    'problem_url': chat_data['problem_url'],
+                    'timestamp': {
+                        '$gte': datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+                    }
+                }, {'_id': 1})
+                chat_id = existing_chat['_id'] if existing_chat else None
             
             # Add last_updated field
             chat_data['last_updated'] = datetime.now()
+            problem_stored = self._store_chat_problem(chat_data)
             
-            if existing_chat:
-                # Update existing chat
-                self.chats.update_one(
-                    {'_id': existing_chat['_id']},
-                    {'$set': chat_data}
-                )
-                return str(existing_chat['_id'])
-            else:
-                # Create new chat
-                result = self.chats.insert_one(chat_data)
-                return str(result.inserted_id)
+            if chat_id is not None:
+                update = {'$set': chat_data}
+                if problem_stored:
+                    # Problem details embedded by older versions are no longer needed
+                    update['$unset'] = {'problem_details': ''}
+                result = self.chats.update_one({'_id': ObjectId(chat_id)}, update)
+                if result.matched_count:
+                    return str(chat_id)
+            # Create new chat
+            result = self.chats.insert_one(chat_data)
+            return str(result.inserted_id)
         except Exception as e:
             print(f"Error saving chat: {e}")
             return None
+
+    def append_to_chat(self, chat_id, new_messages, fields=None):
+        """
+        Push new messages onto a saved chat and update its summary incrementally
+
+        Args:
+            chat_id: ID returned by save_chat
+            new_messages: Messages added since the chat was last saved
+            fields: Other top-level fields to set (e.g. context_summary)
+
+        Returns:
+            True if the chat was updated, False if it no longer exists or
+            the update failed
+        """
+        try:
+            update = {'$set': {'last_updated': datetime.now(), **(fields or {})}}
+            if new_messages:
+                update['$push'] = {'messages': {'$each': new_messages}}
+                summary = self.generate_chat_summary(new_messages)
+                if summary['question_count']:
+                    update['$inc'] = {'summary.question_count': summary['question_count']}
+                    update['$set']['summary.last_question'] = summary['last_question']
+                if summary['topics_discussed']:
+                    update['$addToSet'] = {'summary.topics_discussed': {'$each': summary['topics_discussed']}}
+
+            result = self.chats.update_one({'_id': ObjectId(chat_id)}, update)
+            return result.matched_count == 1
+        except Exception as e:
+            print(f"Error updating chat: {e}")
+            return False
         
     def delete_chat(self, chat_id):
         """Delete a chat by ID"""
@@ -72,17 +205,36 @@ class DatabaseHandler:
         
     def reconstruct_question_object(self, problem_details):
         """Reconstruct LeetCodeQuestion object from stored data"""
-        # Create a data dictionary that matches LeetCodeQuestion's expected format
-        question_data = {
-            'questionTitle': problem_details['title'],
-            'difficulty': problem_details['difficulty'],
-            'question': problem_details.get('raw_html', ''),
-            'topicTags': [{'name': topic} for topic in problem_details['topics']],
-            'exampleTestcases': '\n'.join(problem_details.get('examples', [])),
-        }
-        return LeetCodeQuestion(question_data)
-    
-    
+        return LeetCodeQuestion(payload_from_problem_details(problem_details))
+
+    def resolve_chat_question(self, chat):
+        """
+        Get the question a chat is about
+
+        Chats reference their problem by slug. It comes from the problem
+        catalog or cache if they have it, then from the durable problem store,
+        and is only fetched upstream if the store has no complete copy. Chats
+        not migrated yet fall back to the problem details they embed.
+        """
+        slug = chat.get('problem_slug') or extract_title_slug(chat['problem_url'])
+        stored = None
+        if not is_problem_available_locally(slug):
+            stored = self.get_problem(slug)
+            if stored is not None and stored['complete']:
+                return LeetCodeQuestion(stored['payload'])
+        try:
+            return fetch_question_by_slug(slug)
+        except Exception as e:
+            print(f"Error fetching question '{slug}': {e}")
+        if stored is None:
+            stored = self.get_problem(slug)
+        if stored is not None:
+            return LeetCodeQuestion(stored['payload'])
+
+        problem_details = chat.get('problem_details')
+        if problem_details is None:
+            problem_details = (self.get_chat_by_id(chat['_id']) or {}).get('problem_details')
+        return self.reconstruct_question_object(problem_details) if problem_details else None
 
     def get_chat_by_id(self, chat_id):
         """Get specific chat by ID"""
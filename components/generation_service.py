@@ -0,0 +1,268 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional
+
+from config.settings import Config
+from utils.metrics import metrics
+from .stream_pipeline import StreamPipeline
+
+
+class GenerationRejected(Exception):
+    """Raised when the generation queue is full"""
+
+
+class GenerationStream(StreamPipeline):
+    """
+    Chunks of one generation, produced on the service loop and consumed from a
+    script thread by iterating. `usage_metadata` is set once the stream ends.
+
+    The stream is the handle of the generation: it belongs to a user session
+    and chat turn, and `cancel()` stops it wherever it is. The chunk queue is
+    bounded, so a reader that falls behind pauses the upstream read instead of
+    buffering the whole answer.
+    """
+
+    def __init__(self, service: "GenerationService", user_id: str,
+                 start: Callable[[], Awaitable], turn: Optional[int] = None, prompt_tokens: int = 0):
+        super().__init__(Config.STREAM_QUEUE_MAXSIZE)
+        self.user_id = user_id
+        self.turn = turn
+        self.prompt_tokens = prompt_tokens
+        self.usage_metadata = None
+        self.submitted_at = time.monotonic()
+        self.dispatched_at: Optional[float] = None  # Got a generation slot
+        self.sent_at: Optional[float] = None        # The model request went out
+        self.chars_produced = 0
+        self.started = False
+        self._service = service
+        self._start = start
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_cancel(self) -> None:
+        # Whether it is still queued or already streaming
+        self._service._call_soon(self._service._cancel, self)
+
+
+class GenerationService:
+    """
+    Process-wide model generation on a dedicated asyncio event loop thread.
+
+    Script threads submit a request and iterate the returned stream, which is
+    fed through a bounded thread-safe queue. At most `max_concurrency` generations run
+    at once across the process and at most `max_per_user` per user; queued
+    requests are started least recently served user first, so a burst from
+    some students cannot starve the others or trip upstream quota.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_per_user: int = 1, max_queue: int = 100):
+        self.max_concurrency = max_concurrency
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._queued = 0
+        self._queued_lock = threading.Lock()
+
+        # Owned by the loop thread
+        self._pending: Dict[str, deque] = {}
+        self._user_in_flight: Dict[str, int] = {}
+        self._last_served: Dict[str, float] = {}
+        self._in_flight = 0
+
+        self.submitted = metrics.counter("generation.submitted", "Generation requests submitted")
+        self.rejected = metrics.counter("generation.rejected", "Generation requests rejected because the queue was full")
+        self.completed = metrics.counter("generation.completed", "Generations streamed to completion")
+        self.failed = metrics.counter("generation.failed", "Generations that raised an error")
+        self.cancelled = metrics.counter("generation.cancelled", "Generations cancelled before completion")
+        self.partial = metrics.counter("generation.partial", "Cancelled generations that had already produced output")
+        self.wasted_tokens = metrics.counter(
+            "generation.wasted_tokens", "Tokens spent on cancelled generations (prompt plus output produced)"
+        )
+        self.queue_depth = metrics.gauge("generation.queue_depth", "Generation requests waiting for a slot")
+        self.in_flight = metrics.gauge("generation.in_flight", "Generations currently running")
+        self.wait_seconds = metrics.histogram("generation.wait_seconds", "Time requests waited for a slot")
+
+    @classmethod
+    def from_config(cls) -> "GenerationService":
+        return cls(
+            max_concurrency=Config.GENERATION_MAX_CONCURRENCY,
+            max_per_user=Config.GENERATION_MAX_PER_USER,
+            max_queue=Config.GENERATION_MAX_QUEUE
+        )
+
+    def _ensure_started(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever, name="generation-loop", daemon=True
+            )
+            self._thread.start()
+
+    def _call_soon(self, callback, *args) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def submit(self, user_id: str, start: Callable[[], Awaitable], turn: Optional[int] = None,
+               prompt_tokens: int = 0) -> GenerationStream:
+        """
+        Queue a generation
+
+        Args:
+            user_id: Identifier of the requesting user, for fairness
+            start: Coroutine function that sends the request and returns an
+                async iterable of response chunks
+            turn: Chat turn the generation answers, for reporting
+            prompt_tokens: Estimated prompt size, for reporting cancellations
+
+        Returns:
+            GenerationStream to iterate from the calling thread
+
+        Raises:
+            GenerationRejected: If `max_queue` requests are already waiting
+        """
+        with self._queued_lock:
+            if self._queued >= self.max_queue:
+                self.rejected.inc()
+                raise GenerationRejected("Too many generation requests are waiting")
+            self._queued += 1
+            self.queue_depth.set(self._queued)
+
+        self._ensure_started()
+        stream = GenerationStream(self, user_id, start, turn, prompt_tokens)
+        self.submitted.inc()
+        self._call_soon(self._enqueue, stream)
+        return stream
+
+    # The methods below run on the loop thread
+
+    def _dequeued(self) -> None:
+        with self._queued_lock:
+            self._queued -= 1
+            self.queue_depth.set(self._queued)
+
+    def _enqueue(self, stream: GenerationStream) -> None:
+        if stream.cancelled:
+            self._dequeued()
+            self._record_cancel(stream, started=False)
+            stream.finish()
+            return
+        self._pending.setdefault(stream.user_id, deque()).append(stream)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start queued generations, least recently served user first, while slots are free"""
+        while self._in_flight < self.max_concurrency and self._pending:
+            eligible = [
+                user_id for user_id in self._pending
+                if self._user_in_flight.get(user_id, 0) < self.max_per_user
+            ]
+            if not eligible:
+                return  # every waiting user is at their own limit
+            user_id = min(eligible, key=lambda user: self._last_served.get(user, 0.0))
+            self._last_served[user_id] = time.monotonic()
+
+            streams = self._pending[user_id]
+            stream = streams.popleft()
+            if not streams:
+                del self._pending[user_id]
+
+            self._dequeued()
+            self._in_flight += 1
+            self._user_in_flight[user_id] = self._user_in_flight.get(user_id, 0) + 1
+            self.in_flight.set(self._in_flight)
+            self.wait_seconds.observe(time.monotonic() - stream.submitted_at)
+            stream._task = self._loop.create_task(self._run(stream))
+            stream._task.add_done_callback(lambda task, stream=stream: self._finish(stream, task))
+
+    async def _run(self, stream: GenerationStream) -> None:
+        chunks = None
+        stream.started = True
+        stream.dispatched_at = time.monotonic()
+        try:
+            response = await stream._start()
+            # Backends that wait for a first chunk know when the request really went out
+            stream.sent_at = getattr(response, "sent_at", None) or time.monotonic()
+            chunks = response.__aiter__()
+            async for chunk in chunks:
+                stream.chars_produced += len(getattr(chunk, "text", "") or "")
+                await stream.put_async(chunk)
+            stream.usage_metadata = getattr(response, "usage_metadata", None)
+            self.completed.inc()
+        except asyncio.CancelledError:
+            # Close the upstream stream now rather than whenever it is collected
+            aclose = getattr(chunks, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            raise
+        except Exception as e:
+            self.failed.inc()
+            stream.finish(e)
+
+    def _finish(self, stream: GenerationStream, task: asyncio.Task) -> None:
+        # A done callback rather than `finally`, so a task cancelled before it
+        # first ran is accounted for too
+        if task.cancelled():
+            self._record_cancel(stream, started=stream.started)
+        stream.finish()
+        self._in_flight -= 1
+        remaining = self._user_in_flight.get(stream.user_id, 1) - 1
+        if remaining > 0:
+            self._user_in_flight[stream.user_id] = remaining
+        else:
+            self._user_in_flight.pop(stream.user_id, None)
+            if stream.user_id not in self._pending:
+                self._last_served.pop(stream.user_id, None)
+        self.in_flight.set(self._in_flight)
+        self._dispatch()
+
+    def _cancel(self, stream: GenerationStream) -> None:
+        if stream._task is not None:
+            stream._task.cancel()
+            return
+        streams = self._pending.get(stream.user_id)
+        if streams and stream in streams:
+            streams.remove(stream)
+            if not streams:
+                del self._pending[stream.user_id]
+            self._dequeued()
+            self._record_cancel(stream, started=False)
+            stream.finish()
+
+    def _record_cancel(self, stream: GenerationStream, started: bool) -> None:
+        reason = stream.cancel_reason or "cancelled"
+        self.cancelled.inc()
+        metrics.counter(f"generation.cancelled.{reason}", f"Generations cancelled ({reason})").inc()
+        if not started:
+            return
+        # Once sent, the prompt is billed whether or not the answer is read
+        wasted = stream.prompt_tokens + stream.chars_produced // 4
+        self.wasted_tokens.inc(wasted)
+        if stream.chars_produced:
+            self.partial.inc()
+        print(f"Cancelled generation for turn {stream.turn} ({reason}) after "
+              f"{stream.chars_produced} chars, ~{wasted} tokens spent")
+
+    def stats(self) -> Dict[str, float]:
+        """Get queue depth, in-flight count and wait times for display"""
+        return {
+            "queue_depth": self._queued,
+            "in_flight": self._in_flight,
+            "submitted": self.submitted.value,
+            "completed": self.completed.value,
+            "failed": self.failed.value,
+            "cancelled": self.cancelled.value,
+            "partial": self.partial.value,
+            "wasted_tokens": self.wasted_tokens.value,
+            "rejected": self.rejected.value,
+            "wait_p50_seconds": self.wait_seconds.percentile(50),
+            "wait_p99_seconds": self.wait_seconds.percentile(99),
+        }
+
+
+# Global generation service instance
+generation_service = GenerationService.from_config()
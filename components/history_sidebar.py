@@ -1,5 +1,7 @@
 import streamlit as st
 from datetime import datetime
+from utils.session_utils import cancel_active_generation, chat_state
+from .context_builder import new_summary_state
 
 def render_chat_history_sidebar(db_handler):
     """Render chat history in sidebar"""
@@ -67,16 +69,34 @@ def render_chat_item(chat):
 
 def load_chat(chat):
     """Helper function to load a chat"""
+    question = st.session_state.db_handler.resolve_chat_question(chat)
+    if question is None:
+        st.error("Failed to load the problem for this chat. Please try again.")
+        return
+
+    cancel_active_generation("problem_switch")
+    context_summary = chat.get('context_summary') or new_summary_state()
+    proficiency_level = chat.get('proficiency_level', "Intermediate (Familiar with basic concepts)")
+    if chat['timestamp'].date() == datetime.now().date():
+        # Continue today's chat in place; an older one is saved as today's copy
+        chat_id = str(chat['_id'])
+        saved_chat_state = chat_state(chat['messages'], proficiency_level, context_summary)
+    else:
+        chat_id, saved_chat_state = None, None
     st.session_state.update({
         'messages': chat['messages'],
         'current_problem': chat['problem_url'],
-        'problem_details': chat['problem_details'],
-        'proficiency_level': chat.get('proficiency_level', 
-            "Intermediate (Familiar with basic concepts)"),
-        'current_question': st.session_state.db_handler.reconstruct_question_object(
-            chat['problem_details']
-        ),
-        'leetcode_url_input': chat['problem_url'] 
+        'problem_details': {
+            'title': question.title,
+            'difficulty': question.difficulty,
+            'topics': question.topic_tags
+        },
+        'proficiency_level': proficiency_level,
+        'current_question': question,
+        'leetcode_url_input': chat['problem_url'],
+        'context_summary': context_summary,
+        'chat_id': chat_id,
+        'saved_chat_state': saved_chat_state
     })
     st.rerun()
 
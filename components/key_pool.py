@@ -0,0 +1,180 @@
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config.settings import Config
+from utils.metrics import metrics
+from utils.rate_limiter import TokenBucket
+
+
+class QuotaExhausted(Exception):
+    """Raised when no API key has quota headroom within the wait limit"""
+
+
+def is_quota_error(error: Exception) -> bool:
+    """Tell whether an upstream error means the key ran out of quota (HTTP 429)"""
+    if getattr(error, 'code', None) == 429:
+        return True
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests")
+
+
+class ApiKey:
+    """One API key with its own request and token quota accounting"""
+
+    def __init__(self, key_id: str, secret: str, requests_per_minute: int, tokens_per_minute: int):
+        self.key_id = key_id
+        self.secret = secret
+        # A limit of 0 means the key is not limited on that dimension
+        self.requests = TokenBucket(requests_per_minute / 60.0, capacity=requests_per_minute) \
+            if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, capacity=tokens_per_minute) \
+            if tokens_per_minute > 0 else None
+        self.benched_until = 0.0
+        self.last_used = 0.0
+
+        prefix = f"llm_keys.{key_id}"
+        self.requests_sent = metrics.counter(f"{prefix}.requests", "Requests sent with this key")
+        self.tokens_used = metrics.counter(f"{prefix}.tokens", "Tokens billed to this key")
+        self.rate_limited = metrics.counter(f"{prefix}.rate_limited", "Quota errors returned for this key")
+        self.requests_utilization = metrics.gauge(f"{prefix}.requests_utilization",
+                                                  "Share of the per-minute request quota in use")
+        self.tokens_utilization = metrics.gauge(f"{prefix}.tokens_utilization",
+                                                "Share of the per-minute token quota in use")
+        self.benched = metrics.gauge(f"{prefix}.benched", "1 while the key is out of rotation after a quota error")
+
+    @staticmethod
+    def _utilization(bucket: Optional[TokenBucket]) -> float:
+        if bucket is None:
+            return 0.0
+        return max(0.0, 1.0 - bucket.available() / bucket.capacity)
+
+    def headroom(self) -> float:
+        """Share of the tighter of the two quotas still available"""
+        return 1.0 - max(self._utilization(self.requests), self._utilization(self.tokens))
+
+    def is_benched(self) -> bool:
+        return time.monotonic() < self.benched_until
+
+    def publish(self) -> None:
+        """Refresh this key's utilization gauges"""
+        self.requests_utilization.set(self._utilization(self.requests))
+        self.tokens_utilization.set(self._utilization(self.tokens))
+        self.benched.set(1 if self.is_benched() else 0)
+
+    def try_take(self, tokens: float) -> bool:
+        if self.requests is not None and not self.requests.try_acquire(1):
+            return False
+        if self.tokens is not None and not self.tokens.try_acquire(min(tokens, self.tokens.capacity)):
+            if self.requests is not None:
+                self.requests.charge(-1)
+            return False
+        return True
+
+
+class KeyPool:
+    """
+    Spread model requests over several API keys.
+
+    Every key has token buckets for its requests-per-minute and
+    tokens-per-minute quota. A request goes to the key with the most headroom
+    (least recently used on a tie), charged with an up-front token estimate
+    that is settled against the billed usage when the stream ends. A key that
+    returns a quota error is benched for `bench_seconds` even if its local
+    accounting says it has room, since other deployments may share it.
+    """
+
+    def __init__(self, secrets: List[str], requests_per_minute: int = 0,
+                 tokens_per_minute: int = 1000000, bench_seconds: float = 60.0,
+                 max_wait_seconds: float = 30.0):
+        if not secrets:
+            raise ValueError("A key pool needs at least one API key")
+        self.bench_seconds = bench_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.keys = [
+            ApiKey(f"key{index}", secret, requests_per_minute, tokens_per_minute)
+            for index, secret in enumerate(secrets, start=1)
+        ]
+        self._lock = threading.Lock()
+        self.waits = metrics.counter("llm_keys.waits", "Requests that waited for a key with headroom")
+        self.exhausted = metrics.counter("llm_keys.exhausted", "Requests that found no key with headroom in time")
+
+    @classmethod
+    def from_config(cls) -> "KeyPool":
+        """Build the pool of GEMINI_API_KEYS (or the single GOOGLE_API_KEY)"""
+        secrets = [key.strip() for key in Config.GEMINI_API_KEYS.split(",") if key.strip()]
+        if not secrets:
+            secrets = [Config.GOOGLE_API_KEY]
+        return cls(
+            secrets,
+            requests_per_minute=Config.GEMINI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=Config.GEMINI_TOKENS_PER_MINUTE,
+            bench_seconds=Config.GEMINI_KEY_BENCH_SECONDS,
+            max_wait_seconds=Config.GEMINI_KEY_MAX_WAIT_SECONDS
+        )
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def try_acquire(self, estimated_tokens: float) -> Optional[ApiKey]:
+        """Take quota for one request from the key with the most headroom, without waiting"""
+        with self._lock:
+            candidates = [key for key in self.keys if not key.is_benched()]
+            candidates.sort(key=lambda key: (-key.headroom(), key.last_used))
+            for key in candidates:
+                if key.try_take(estimated_tokens):
+                    key.last_used = time.monotonic()
+                    key.requests_sent.inc()
+                    key.publish()
+                    return key
+        return None
+
+    async def acquire(self, estimated_tokens: float) -> ApiKey:
+        """
+        Take quota for one request, waiting for headroom if every key is busy
+
+        Raises:
+            QuotaExhausted: If no key has headroom within `max_wait_seconds`
+        """
+        key = self.try_acquire(estimated_tokens)
+        if key is not None:
+            return key
+        self.waits.inc()
+        deadline = time.monotonic() + self.max_wait_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.25)
+            key = self.try_acquire(estimated_tokens)
+            if key is not None:
+                return key
+        self.exhausted.inc()
+        raise QuotaExhausted("Every API key is out of quota, please try again shortly")
+
+    def settle(self, key: ApiKey, estimated_tokens: float, actual_tokens: float) -> None:
+        """Correct a key's token accounting once a request's billed usage is known"""
+        if key.tokens is not None:
+            key.tokens.charge(actual_tokens - min(estimated_tokens, key.tokens.capacity))
+        key.tokens_used.inc(actual_tokens)
+        key.publish()
+
+    def bench(self, key: ApiKey, seconds: Optional[float] = None) -> None:
+        """Take a key out of rotation after a quota error"""
+        key.benched_until = time.monotonic() + (seconds if seconds is not None else self.bench_seconds)
+        key.rate_limited.inc()
+        key.publish()
+        print(f"API key {key.key_id} hit its quota, out of rotation for "
+              f"{key.benched_until - time.monotonic():.0f}s")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Get per-key utilization and counters for display"""
+        stats = {}
+        for key in self.keys:
+            key.publish()
+            stats[key.key_id] = {
+                "requests_utilization": key.requests_utilization.value,
+                "tokens_utilization": key.tokens_utilization.value,
+                "benched": key.is_benched(),
+                "requests": key.requests_sent.value,
+                "tokens": key.tokens_used.value,
+                "rate_limited": key.rate_limited.value,
+            }
+        return stats
@@ -1,92 +1,142 @@
-import requests
+import hashlib
+import re
 from typing import Dict, Optional
 import json
-from bs4 import BeautifulSoup
-import requests
 from functools import lru_cache
+from .problem_loader import load_problem_payload, store_problem_payload
+from utils.html_markdown import html_to_markdown
+from utils.validators import extract_title_slug
+
+# Bump whenever the parsing/rendering below changes, so stored artifacts are rebuilt
+PARSED_ARTIFACT_VERSION = 4
+
+_ARTIFACT_FIELDS = ('question_text', 'images', 'tables', 'description', 'llm_context')
+_IMAGE_PLACEHOLDER = re.compile(r'\[Image (\d+)\]')
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+
 class LeetCodeQuestion:
-    def __init__(self, data: Dict):
+    def __init__(self, data: Dict, parsed: Optional[Dict] = None):
         self.title = data.get('questionTitle', '')
         self.difficulty = data.get('difficulty', '')
         self.raw_html = data.get('question', '')
-        self.question_text, self.images = self._process_html(self.raw_html)
         self.topic_tags = [tag['name'] for tag in data.get('topicTags', [])]
         self.examples = data.get('exampleTestcases', '').split('\n')
         self.similar_questions = self._parse_similar_questions(data.get('similarQuestions', ''))
         self.question_id = data.get('questionFrontendId', '')
         self.link = data.get('link', '')
 
+        self._fingerprint()
+        self._load_artifact(parsed if parsed is not None else data.get('parsed'))
+
+    def _fingerprint(self) -> None:
+        """Key the cached renderings to the data they are derived from"""
+        self._html_key = _digest(self.raw_html)
+        self._context_key = _digest(
+            self.title, self.question_id, self.difficulty, self.topic_tags,
+            self.examples, self.similar_questions, self.raw_html
+        )
+
+    def _load_artifact(self, artifact: Optional[Dict]) -> None:
+        """
+        Adopt the still-valid parts of a stored artifact
+
+        HTML is only parsed, and renderings only built, on first access to the
+        fields they produce, unless a current artifact was stored alongside the
+        payload. Parsed fields and the description depend on the HTML alone; the
+        LLM context also depends on the metadata, so each is checked against
+        its own key. Artifacts without keys (older chats) only supply parsed fields.
+        """
+        self._parsed = {}
+        if not artifact or artifact.get('version') != PARSED_ARTIFACT_VERSION:
+            return
+        if artifact.get('html_key') in (None, self._html_key):
+            self._parsed.update({
+                key: artifact[key]
+                for key in ('question_text', 'images', 'tables')
+                if key in artifact
+            })
+        if artifact.get('html_key') == self._html_key and 'description' in artifact:
+            self._parsed['description'] = artifact['description']
+        if artifact.get('context_key') == self._context_key and 'llm_context' in artifact:
+            self._parsed['llm_context'] = artifact['llm_context']
+
+    def invalidate(self) -> None:
+        """Drop cached parses and renderings after the question's data was changed in place"""
+        self._fingerprint()
+        self._parsed = {}
+
+    def _ensure_parsed(self) -> Dict:
+        missing = [key for key in ('question_text', 'images', 'tables') if key not in self._parsed]
+        if missing:
+            # Only fill the gaps, so fields kept from an older artifact are not overwritten
+            question_text, images, tables = self._process_html(self.raw_html)
+            parsed = {'question_text': question_text, 'images': images, 'tables': tables}
+            self._parsed.update({key: parsed[key] for key in missing})
+        return self._parsed
+
+    @property
+    def question_text(self) -> str:
+        if 'question_text' in self._parsed:
+            return self._parsed['question_text']
+        return self._ensure_parsed()['question_text']
+
+    @property
+    def images(self) -> list:
+        if 'images' in self._parsed:
+            return self._parsed['images']
+        return self._ensure_parsed()['images']
+
+    @property
+    def tables(self) -> list:
+        """Markdown renderings of the tables in the description"""
+        return self._ensure_parsed()['tables']
+
+    @property
+    def is_parsed(self) -> bool:
+        """True once every parsed field is available without touching the HTML"""
+        return all(key in self._parsed for key in _ARTIFACT_FIELDS)
+
+    def to_artifact(self) -> Dict:
+        """Return the versioned pre-parsed artifact to store alongside `raw_html`"""
+        parsed = self._ensure_parsed()
+        return {
+            'version': PARSED_ARTIFACT_VERSION,
+            'html_key': self._html_key,
+            'context_key': self._context_key,
+            'question_text': parsed['question_text'],
+            'images': parsed['images'],
+            'tables': parsed['tables'],
+            'description': self.get_formatted_description(),
+            'llm_context': self.get_formatted_context(),
+        }
+
     def _process_html(self, html_content: str) -> tuple:
-        """Process HTML content and extract images"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        images = []
-        
-        # Extract images
-        for img in soup.find_all('img'):
-            src = img.get('src', '')
-            alt = img.get('alt', '')
-            if src:
-                images.append({
-                    'src': src,
-                    'alt': alt
-                })
-            # Replace image with placeholder
-            img.replace_with(f'[Image {len(images)}]')
-        
-        # Convert tables to markdown
-        for table in soup.find_all('table'):
-            markdown_table = self._convert_table_to_markdown(table)
-            table.replace_with(soup.new_string(markdown_table))
-        
-        # Get clean text
-        text = soup.get_text()
-        return text.strip(), images
+        """Process HTML content and extract images and markdown tables"""
+        result = html_to_markdown(html_content)
+        return result.text, result.images, result.tables
 
     def get_formatted_description(self) -> str:
         """Return formatted problem description with images"""
-        description = self.question_text
-        
-        # Add image references at appropriate places
-        for i, image in enumerate(self.images, 1):
-            description = description.replace(
-                f'[Image {i}]',
-                f'\n\n![{image["alt"]}]({image["src"]})\n\n'
-            )
-        
-        return description
-    
-    def _clean_html(self, html_content: str) -> str:
-        """Convert HTML to clean text"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Convert tables to markdown format
-        for table in soup.find_all('table'):
-            markdown_table = self._convert_table_to_markdown(table)
-            table.replace_with(soup.new_string(markdown_table))
-        
-        # Get clean text
-        text = soup.get_text()
-        return text.strip()
-
-    def _convert_table_to_markdown(self, table) -> str:
-        """Convert HTML table to markdown format"""
-        markdown = []
-        
-        # Process headers
-        headers = []
-        for th in table.find_all('th'):
-            headers.append(th.get_text().strip())
-        markdown.append('| ' + ' | '.join(headers) + ' |')
-        markdown.append('| ' + ' | '.join(['---'] * len(headers)) + ' |')
-        
-        # Process rows
-        for row in table.find_all('tr')[1:]:  # Skip header row
-            cols = []
-            for td in row.find_all('td'):
-                cols.append(td.get_text().strip())
-            markdown.append('| ' + ' | '.join(cols) + ' |')
-        
-        return '\n'.join(markdown)
+        if 'description' not in self._parsed:
+            self._parsed['description'] = self._render_description()
+        return self._parsed['description']
+
+    def _render_description(self) -> str:
+        """Replace every image placeholder with its markdown image in one pass"""
+        images = self.images
+
+        def image_markdown(match):
+            index = int(match.group(1))
+            if not 1 <= index <= len(images):
+                return match.group(0)
+            image = images[index - 1]
+            return f'\n\n![{image["alt"]}]({image["src"]})\n\n'
+
+        return _IMAGE_PLACEHOLDER.sub(image_markdown, self.question_text)
 
     def _parse_similar_questions(self, similar_questions_str: str) -> list:
         """Parse similar questions JSON string"""
@@ -95,7 +145,8 @@ class LeetCodeQuestion:
             return [
                 {
                     'title': q['title'],
-                    'difficulty': q['difficulty']
+                    'difficulty': q['difficulty'],
+                    'titleSlug': q.get('titleSlug', '')
                 }
                 for q in questions
             ]
@@ -104,6 +155,11 @@ class LeetCodeQuestion:
 
     def get_formatted_context(self) -> str:
         """Return formatted context for the LLM"""
+        if 'llm_context' not in self._parsed:
+            self._parsed['llm_context'] = self._render_context()
+        return self._parsed['llm_context']
+
+    def _render_context(self) -> str:
         context = f"""
 Problem: {self.title} (LC{self.question_id})
 Difficulty: {self.difficulty}
@@ -115,7 +171,6 @@ Problem Description:
 Examples:
 {self._format_examples()}
 
-Related Topics: {', '.join(self.topic_tags)}
 Similar Questions: {self._format_similar_questions()}
         """
         return context.strip()
@@ -136,17 +191,20 @@ Similar Questions: {self._format_similar_questions()}
 
 
 @lru_cache(maxsize=100)
+def fetch_question_by_slug(title_slug: str) -> LeetCodeQuestion:
+    """Load and parse a question by title slug (failures raise, so they are not cached)"""
+    question_data = load_problem_payload(title_slug)
+    question = LeetCodeQuestion(question_data)
+    if not question.is_parsed:
+        # Parse once and store the artifact so other workers and restarts skip parsing
+        store_problem_payload(title_slug, {**question_data, 'parsed': question.to_artifact()})
+    return question
+
+
 def fetch_leetcode_question(leetcode_url: str):
-    """Fetch question data from API with caching"""
+    """Fetch question data from the problem cache, falling back to the problem sources"""
     try:
-        title_slug = leetcode_url.split('problems/')[1].rstrip('/')
-        api_url = f"https://api-miy0.onrender.com/select?titleSlug={title_slug}"
-        
-        response = requests.get(api_url)
-        response.raise_for_status()
-        
-        question_data = response.json()
-        return LeetCodeQuestion(question_data)
+        return fetch_question_by_slug(extract_title_slug(leetcode_url))
     except Exception as e:
         print(f"Error fetching question: {e}")
         return None
\ No newline at end of file
@@ -0,0 +1,572 @@
+import asyncio
+import hashlib
+import random
+import threading
+import time
+import weakref
+from typing import AsyncIterator, Callable, Dict, NamedTuple, Optional
+
+from config.settings import Config
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import metrics
+from .key_pool import ApiKey, KeyPool, QuotaExhausted, is_quota_error
+
+# Sampling settings used for student-facing answers
+DEFAULT_GENERATION_CONFIG = {
+    'temperature': 0.7,
+    'top_p': 0.8,
+    'top_k': 40
+}
+
+
+class TextChunk(NamedTuple):
+    """One streamed piece of a model answer"""
+    text: str
+
+
+class UsageMetadata(NamedTuple):
+    """Token usage of one generation (same field names as Gemini's usage metadata)"""
+    prompt_token_count: int
+    candidates_token_count: int
+    total_token_count: int
+
+
+class BackendStream:
+    """
+    Async iterable of TextChunk returned by `LLMBackend.stream`.
+
+    `usage_metadata` is available once the stream has been fully read.
+    """
+
+    usage_metadata: Optional[UsageMetadata] = None
+
+    def __aiter__(self) -> AsyncIterator[TextChunk]:
+        raise NotImplementedError
+
+
+class LLMBackend:
+    """Interface of a text generation backend"""
+
+    name = "base"
+
+    async def stream(self, prompt: str, generation_config: Optional[Dict] = None,
+                     on_sent: Optional[Callable[[], None]] = None) -> BackendStream:
+        """
+        Send a prompt and stream the answer
+
+        Args:
+            prompt: Full prompt text
+            generation_config: Sampling settings, DEFAULT_GENERATION_CONFIG if omitted
+            on_sent: Called right before the request goes out, after any local
+                wait (e.g. for an API key with quota headroom)
+
+        Returns:
+            BackendStream of the answer's chunks
+        """
+        raise NotImplementedError
+
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens `text` takes in this backend's model"""
+        raise NotImplementedError
+
+    async def generate(self, prompt: str, generation_config: Optional[Dict] = None) -> str:
+        """Return the complete answer to a prompt"""
+        stream = await self.stream(prompt, generation_config)
+        return "".join([chunk.text async for chunk in stream])
+
+
+class _PooledStream(BackendStream):
+    """Stream read with one pool key; settles the key's token accounting when it ends"""
+
+    def __init__(self, stream: BackendStream, pool: KeyPool, key: ApiKey, estimated_tokens: int):
+        self._stream = stream
+        self._pool = pool
+        self._key = key
+        self._estimated_tokens = estimated_tokens
+        self.usage_metadata = None
+
+    def __aiter__(self) -> AsyncIterator[TextChunk]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[TextChunk]:
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except Exception as e:
+            if is_quota_error(e):
+                self._pool.bench(self._key)
+            raise
+        finally:
+            self.usage_metadata = self._stream.usage_metadata
+            usage = self.usage_metadata
+            actual = usage.total_token_count if usage is not None else self._estimated_tokens
+            self._pool.settle(self._key, self._estimated_tokens, actual)
+
+
+class PooledBackend(LLMBackend):
+    """
+    Backend whose requests are spread over the API keys of a KeyPool.
+
+    A request that fails with a quota error before streaming starts benches
+    its key and is retried at once on another key with headroom, if any.
+    """
+
+    def __init__(self, key_pool: KeyPool, expected_output_tokens: int = 600):
+        self.key_pool = key_pool
+        self.expected_output_tokens = expected_output_tokens
+
+    async def _open(self, key: ApiKey, prompt: str, generation_config: Optional[Dict]) -> BackendStream:
+        """Send the request with one key"""
+        raise NotImplementedError
+
+    async def stream(self, prompt: str, generation_config: Optional[Dict] = None,
+                     on_sent: Optional[Callable[[], None]] = None) -> BackendStream:
+        # Rough estimate; counting exactly would cost a request of its own
+        estimated = len(prompt) // 4 + self.expected_output_tokens
+        key = await self.key_pool.acquire(estimated)
+        retries = len(self.key_pool) - 1
+        while True:
+            if on_sent is not None:
+                on_sent()
+            try:
+                stream = await self._open(key, prompt, generation_config)
+            except BaseException as e:
+                # Including cancellation: an unsettled reservation would drain the key's bucket
+                self.key_pool.settle(key, estimated, 0)
+                if isinstance(e, Exception) and is_quota_error(e):
+                    self.key_pool.bench(key)
+                    # Only a key free right now; waiting here would count against the model's deadline
+                    other = self.key_pool.try_acquire(estimated) if retries > 0 else None
+                    if other is not None:
+                        key = other
+                        retries -= 1
+                        continue
+                raise
+            return _PooledStream(stream, self.key_pool, key, estimated)
+
+
+class _GeminiStream(BackendStream):
+    def __init__(self, response):
+        self._response = response
+        self.usage_metadata = None
+
+    def __aiter__(self) -> AsyncIterator[TextChunk]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[TextChunk]:
+        async for chunk in self._response:
+            try:
+                text = chunk.text
+            except ValueError:
+                text = ""  # Chunks without text parts, e.g. a bare finish reason
+            if text:
+                yield TextChunk(text)
+
+        usage = getattr(self._response, 'usage_metadata', None)
+        if usage is not None and usage.prompt_token_count:
+            self.usage_metadata = UsageMetadata(
+                usage.prompt_token_count,
+                usage.candidates_token_count,
+                usage.total_token_count
+            )
+
+
+class GeminiBackend(PooledBackend):
+    """Google Gemini through the google-generativeai SDK, over a pool of API keys"""
+
+    name = "gemini"
+
+    def __init__(self, key_pool: KeyPool, model_name: str = 'gemini-2.0-flash',
+                 expected_output_tokens: int = 600):
+        import google.generativeai as genai
+
+        super().__init__(key_pool, expected_output_tokens)
+        genai.configure(api_key=key_pool.keys[0].secret)
+        self._genai = genai
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)  # Default key, for token counting
+        # Event loop -> {key_id: model}; grpc.aio clients belong to the loop that created them
+        self._models = weakref.WeakKeyDictionary()
+        self._models_lock = threading.Lock()
+
+    def _model_for(self, key: ApiKey):
+        """The model answering with `key`, created on first use on the running loop"""
+        loop = asyncio.get_running_loop()
+        with self._models_lock:
+            models = self._models.setdefault(loop, {})
+        model = models.get(key.key_id)
+        if model is None:
+            model = self._genai.GenerativeModel(self.model_name)
+            if len(self.key_pool) > 1:
+                # genai.configure() sets one process-wide key, so every key gets
+                # an async client of its own, created here on the loop that uses it
+                from google.ai import generativelanguage as glm
+
+                if not hasattr(model, '_async_client'):
+                    raise RuntimeError("This google-generativeai version does not support per-key clients; "
+                                       "configure a single API key")
+                model._async_client = glm.GenerativeServiceAsyncClient(client_options={'api_key': key.secret})
+            models[key.key_id] = model
+        return model
+
+    async def _open(self, key: ApiKey, prompt: str, generation_config: Optional[Dict]) -> BackendStream:
+        response = await self._model_for(key).generate_content_async(
+            prompt,
+            stream=True,
+            generation_config=generation_config or DEFAULT_GENERATION_CONFIG
+        )
+        return _GeminiStream(response)
+
+    def count_tokens(self, text: str) -> int:
+        return self.model.count_tokens(text).total_tokens
+
+
+class FakeBackendError(Exception):
+    """Injected failure of the fake backend"""
+
+
+class FakeQuotaError(FakeBackendError):
+    """Injected quota error (HTTP 429) of the fake backend"""
+
+    code = 429
+
+
+class _FakeStream(BackendStream):
+    def __init__(self, backend: "FakeBackend", prompt: str, rng: random.Random):
+        self._backend = backend
+        self._prompt = prompt
+        self._rng = rng
+        self.usage_metadata = None
+
+    def __aiter__(self) -> AsyncIterator[TextChunk]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[TextChunk]:
+        backend = self._backend
+        text = backend.answer_for(self._prompt)
+        chunks = [text[i:i + backend.chunk_chars] for i in range(0, len(text), backend.chunk_chars)]
+        # Decided up front so a given seed and prompt always fail the same way
+        fail_at = self._rng.randrange(len(chunks) + 1) if self._rng.random() < backend.error_rate else None
+
+        await asyncio.sleep(backend.ttft_seconds)
+        for index, chunk in enumerate(chunks):
+            if index == fail_at:
+                raise FakeBackendError(f"Injected failure after {index} chunks")
+            if index:
+                await asyncio.sleep(backend.chunk_interval_seconds)
+            yield TextChunk(chunk)
+        if fail_at == len(chunks):
+            raise FakeBackendError("Injected failure at end of stream")
+
+        prompt_tokens = backend.count_tokens(self._prompt)
+        output_tokens = backend.count_tokens(text)
+        self.usage_metadata = UsageMetadata(prompt_tokens, output_tokens, prompt_tokens + output_tokens)
+
+
+class FakeBackend(PooledBackend):
+    """
+    Deterministic local backend for benchmarks and load tests.
+
+    Answers are derived from the prompt and streamed with a configurable
+    time to first token, inter-chunk latency and chunk size. A configurable
+    fraction of generations fail, before or during streaming. The same seed
+    and sequence of prompts always produces the same answers and failures.
+    Requests go through a key pool of fake keys (one unlimited key by
+    default), and a fraction of requests can be answered with a quota error.
+    """
+
+    name = "fake"
+
+    _SENTENCES = (
+        "Let's think about what the problem is really asking before writing any code.",
+        "What information do you need to remember as you scan the input once?",
+        "Try a small example by hand and watch which values you look up repeatedly.",
+        "A hash map can turn a repeated linear search into a constant time lookup.",
+        "Consider the edge cases: an empty input, duplicates and negative numbers.",
+        "What is the time complexity of your current approach, and where is the bottleneck?",
+        "Sorting first might help, but think about what it costs and what it breaks.",
+        "Could two pointers moving towards each other avoid the nested loop?",
+    )
+
+    def __init__(self, ttft_seconds: float = 0.5, chunk_interval_seconds: float = 0.05,
+                 chunk_chars: int = 40, error_rate: float = 0.0, response_chars: int = 1200, seed: int = 0,
+                 key_pool: Optional[KeyPool] = None, quota_error_rate: float = 0.0):
+        super().__init__(key_pool or KeyPool(["fake"], requests_per_minute=0, tokens_per_minute=0),
+                         expected_output_tokens=response_chars // 4)
+        self.quota_error_rate = quota_error_rate
+        self.ttft_seconds = ttft_seconds
+        self.chunk_interval_seconds = chunk_interval_seconds
+        self.chunk_chars = max(1, chunk_chars)
+        self.error_rate = error_rate
+        self.response_chars = response_chars
+        self._rng = random.Random(seed)
+
+    def answer_for(self, prompt: str) -> str:
+        """Build the prompt's deterministic answer"""
+        digest = hashlib.sha1(prompt.encode('utf-8')).digest()
+        sentences = []
+        length = 0
+        index = 0
+        while length < self.response_chars:
+            sentence = self._SENTENCES[digest[index % len(digest)] % len(self._SENTENCES)]
+            sentences.append(sentence)
+            length += len(sentence) + 1
+            index += 1
+        text = " ".join(sentences)
+        return text[:self.response_chars]
+
+    async def _open(self, key: ApiKey, prompt: str, generation_config: Optional[Dict]) -> BackendStream:
+        rng = random.Random(self._rng.random())
+        if rng.random() < self.quota_error_rate:
+            raise FakeQuotaError(f"Injected quota error for {key.key_id}")
+        return _FakeStream(self, prompt, rng)
+
+    def count_tokens(self, text: str) -> int:
+        return max(1, len(text) // 4)
+
+
+class GenerationTimeout(Exception):
+    """Raised when the model misses its time-to-first-chunk or total deadline"""
+
+
+class GenerationUnavailable(Exception):
+    """Raised without calling the model while its circuit is open"""
+
+
+_TRANSIENT_ERROR_NAMES = ("ServiceUnavailable", "InternalServerError", "DeadlineExceeded",
+                          "GatewayTimeout", "BadGateway")
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Tell whether a failed generation is worth retrying (timeouts, 5xx, connection errors)"""
+    if isinstance(error, QuotaExhausted) or is_quota_error(error):
+        return False  # Local quota, or the key pool already tried every key: not the model failing
+    if isinstance(error, (GenerationTimeout, ConnectionError, FakeBackendError)):
+        return True
+    if getattr(error, 'code', None) in (500, 502, 503, 504):
+        return True
+    return type(error).__name__ in _TRANSIENT_ERROR_NAMES
+
+
+class _ResilientStream(BackendStream):
+    """Rest of a stream whose first chunk has arrived, read against the total deadline"""
+
+    def __init__(self, owner: "ResilientBackend", response: BackendStream, chunks: AsyncIterator[TextChunk],
+                 first_chunk: Optional[TextChunk], deadline: float, sent_at: Optional[float] = None):
+        self._owner = owner
+        self._response = response
+        self._chunks = chunks
+        self._first_chunk = first_chunk
+        self._deadline = deadline
+        self.sent_at = sent_at  # When the request that answered went out (time.monotonic())
+        self.usage_metadata = None
+
+    def __aiter__(self) -> AsyncIterator[TextChunk]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[TextChunk]:
+        loop = asyncio.get_running_loop()
+        if self._first_chunk is not None:
+            yield self._first_chunk
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(self._chunks.__anext__(),
+                                                   max(0.0, self._deadline - loop.time()))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    self._owner.total_timeouts.inc()
+                    self._owner.breaker.record_failure()
+                    raise GenerationTimeout(
+                        f"The answer took longer than {self._owner.total_timeout:.0f}s"
+                    ) from None
+                except Exception as e:
+                    if is_transient_error(e):
+                        self._owner.failures.inc()
+                        self._owner.breaker.record_failure()
+                    raise
+                yield chunk
+        self.usage_metadata = getattr(self._response, 'usage_metadata', None)
+
+
+class ResilientBackend(LLMBackend):
+    """
+    Deadlines, retries and a circuit breaker around another backend.
+
+    The first chunk must arrive within `ttft_timeout` of the request being
+    sent (waiting locally for an API key doesn't count) and the whole answer
+    within `total_timeout`. Transient errors (timeouts, 5xx, connection
+    errors) before the first chunk are retried with full-jitter exponential
+    backoff; once text has been streamed to the student a failure is final.
+    Consecutive failures open the circuit, after which requests fail fast
+    with GenerationUnavailable until a trial request gets through. Running out
+    of local quota (QuotaExhausted) is neither retried nor counted as a failure.
+    """
+
+    def __init__(self, backend: LLMBackend, ttft_timeout: float = 20.0, total_timeout: float = 120.0,
+                 max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 4.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.backend = backend
+        self.name = backend.name
+        self.ttft_timeout = ttft_timeout
+        self.total_timeout = total_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(f"llm.{backend.name}")
+        self.retries = metrics.counter("llm.retries", "Generations retried before their first chunk")
+        self.failures = metrics.counter("llm.failures", "Generation attempts that failed transiently")
+        self.ttft_timeouts = metrics.counter("llm.ttft_timeouts", "Attempts without a first chunk in time")
+        self.total_timeouts = metrics.counter("llm.total_timeouts", "Answers cut off by the total deadline")
+
+    @classmethod
+    def from_config(cls, backend: LLMBackend) -> "ResilientBackend":
+        return cls(
+            backend,
+            ttft_timeout=Config.GENERATION_TTFT_TIMEOUT_SECONDS,
+            total_timeout=Config.GENERATION_TOTAL_TIMEOUT_SECONDS,
+            max_retries=Config.GENERATION_MAX_RETRIES,
+            backoff_base=Config.GENERATION_BACKOFF_BASE,
+            backoff_max=Config.GENERATION_BACKOFF_MAX,
+            breaker=CircuitBreaker(
+                f"llm.{backend.name}",
+                Config.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                Config.LLM_CIRCUIT_RESET_SECONDS
+            )
+        )
+
+    @property
+    def key_pool(self) -> Optional[KeyPool]:
+        return getattr(self.backend, 'key_pool', None)
+
+    def is_available(self) -> bool:
+        """False while the circuit is open and requests would fail fast"""
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    def count_tokens(self, text: str) -> int:
+        return self.backend.count_tokens(text)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _open_first_chunk(self, prompt: str, generation_config: Optional[Dict], on_sent):
+        response = await self.backend.stream(prompt, generation_config, on_sent=on_sent)
+        chunks = response.__aiter__()
+        try:
+            first_chunk = await chunks.__anext__()
+        except StopAsyncIteration:
+            first_chunk = None
+        return response, chunks, first_chunk
+
+    async def _first_chunk(self, prompt: str, generation_config: Optional[Dict], deadline: float,
+                           on_sent: Optional[Callable[[], None]] = None):
+        """
+        Send one attempt and wait for its first chunk
+
+        The time-to-first-chunk deadline starts when the backend sends the
+        request, so waiting locally for an API key with quota headroom never
+        looks like a slow model.
+
+        Returns:
+            The response, its chunk iterator, the first chunk and the
+            time.monotonic() the request was sent
+
+        Raises:
+            asyncio.TimeoutError: If the model sent nothing in time
+            QuotaExhausted: If no key had headroom before the total deadline
+        """
+        loop = asyncio.get_running_loop()
+        sent = loop.create_future()
+
+        def mark_sent():
+            if not sent.done():
+                sent.set_result(time.monotonic())
+            if on_sent is not None:
+                on_sent()
+
+        attempt = loop.create_task(self._open_first_chunk(prompt, generation_config, mark_sent))
+        try:
+            await asyncio.wait({attempt, sent}, timeout=max(0.0, deadline - loop.time()),
+                               return_when=asyncio.FIRST_COMPLETED)
+            if not attempt.done() and sent.done():
+                remaining = min(self.ttft_timeout - (time.monotonic() - sent.result()), deadline - loop.time())
+                await asyncio.wait({attempt}, timeout=max(0.0, remaining))
+            if not attempt.done():
+                if not sent.done():
+                    raise QuotaExhausted("No API key had quota headroom before the answer's deadline")
+                raise asyncio.TimeoutError
+            return attempt.result() + (sent.result() if sent.done() else None,)
+        finally:
+            if not attempt.done():
+                attempt.cancel()
+                await asyncio.gather(attempt, return_exceptions=True)
+
+    async def stream(self, prompt: str, generation_config: Optional[Dict] = None,
+                     on_sent: Optional[Callable[[], None]] = None) -> BackendStream:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.total_timeout
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow_request():
+                raise GenerationUnavailable("The model is unavailable right now, failing fast")
+
+            try:
+                response, chunks, first_chunk, sent_at = await self._first_chunk(
+                    prompt, generation_config, deadline, on_sent
+                )
+            except asyncio.TimeoutError:
+                self.ttft_timeouts.inc()
+                error = GenerationTimeout(f"No response from the model within {self.ttft_timeout:.1f}s")
+            except Exception as e:
+                if not is_transient_error(e):
+                    self.breaker.abandon()
+                    raise
+                error = e
+            else:
+                self.breaker.record_success()
+                return _ResilientStream(self, response, chunks, first_chunk, deadline, sent_at)
+
+            self.failures.inc()
+            self.breaker.record_failure()
+            delay = self._backoff(attempt)
+            if attempt == self.max_retries or loop.time() + delay >= deadline:
+                raise error
+            self.retries.inc()
+            print(f"Generation attempt {attempt + 1} failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, float]:
+        """Get retry, timeout and circuit counters for display"""
+        return {
+            "circuit_state": self.breaker.state,
+            "retries": self.retries.value,
+            "failures": self.failures.value,
+            "ttft_timeouts": self.ttft_timeouts.value,
+            "total_timeouts": self.total_timeouts.value,
+        }
+
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    """Build the backend selected by LLM_BACKEND (or `name`), with deadlines, retries and a circuit breaker"""
+    return ResilientBackend.from_config(_create_backend(name))
+
+
+def _create_backend(name: Optional[str] = None) -> LLMBackend:
+    name = (name or Config.LLM_BACKEND).lower()
+    if name == "fake":
+        return FakeBackend(
+            ttft_seconds=Config.FAKE_LLM_TTFT_SECONDS,
+            chunk_interval_seconds=Config.FAKE_LLM_CHUNK_INTERVAL_SECONDS,
+            chunk_chars=Config.FAKE_LLM_CHUNK_CHARS,
+            error_rate=Config.FAKE_LLM_ERROR_RATE,
+            response_chars=Config.FAKE_LLM_RESPONSE_CHARS,
+            seed=Config.FAKE_LLM_SEED,
+            quota_error_rate=Config.FAKE_LLM_QUOTA_ERROR_RATE
+        )
+    if name == "gemini":
+        return GeminiBackend(KeyPool.from_config(), Config.GEMINI_MODEL, Config.GEMINI_OUTPUT_TOKEN_ESTIMATE)
+    raise ValueError(f"Unknown LLM backend '{name}'")
+
+
+# Global backend instance
+llm_backend = create_backend()
@@ -1,73 +1,123 @@
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
-from agents.prompts import get_system_prompt, get_proficiency_guidelines
+import time
+from utils.validators import extract_title_slug
+from utils.metrics import metrics
+from utils.rate_limiter import rate_limiter
+from utils.tracing import add_span, span
+from .answer_cache import CachedResponse, RecordingStream, answer_cache
+from .canonical_questions import canonical_question_for
+from .context_builder import TOKEN_BUCKETS, context_builder
+from .generation_service import GenerationRejected, generation_service
 from .leetcode_api import fetch_leetcode_question
+from .llm_backend import llm_backend
+from .prompt_builder import prompt_builder
+from .speculative_hints import speculative_hints
+from .stream_pipeline import pipe
 
-load_dotenv()
+_prompt_tokens = metrics.histogram("prompt.tokens", "Estimated prompt tokens per turn", buckets=TOKEN_BUCKETS)
+_canonical_answers = metrics.counter("answer_cache.canonical_hits",
+                                     "First questions answered with a pre-generated canonical answer")
+_degraded_answers = metrics.counter("llm.degraded_answers", "Cached answers served while the model circuit was open")
 
-# Configure Gemini
-genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-model = genai.GenerativeModel('gemini-2.0-flash')
+_DEGRADED_NOTE = ("_The Teaching Assistant is having trouble reaching the model right now, "
+                  "so here is a saved answer to a similar question._\n\n")
 
-def get_gemini_response_stream(user_prompt, leetcode_url, conversation_history, proficiency_level):
-    """Get streaming response from Gemini with context management"""
+def get_gemini_response_stream(user_prompt, leetcode_url, conversation_history, proficiency_level,
+                               context_summary=None):
+    """
+    Get streaming response from the configured LLM backend with context management
+
+    `context_summary` is the chat's rolling summary state (see
+    components.context_builder); it is updated in place when older messages
+    are folded into it, so the caller can store it with the chat.
+    """
     
     # Fetch question context
-    question = fetch_leetcode_question(leetcode_url)
+    with span("fetch"):
+        question = fetch_leetcode_question(leetcode_url)
     if not question:
         return "Sorry, I couldn't fetch the question details. Please check the URL and try again."
-    
-    # Get system prompt and proficiency guidelines
-    system_prompt = get_system_prompt(leetcode_url, proficiency_level)
-    guidelines = get_proficiency_guidelines(proficiency_level)
-    
-    # Construct context from conversation history
-    context = "\n".join([
-        f"{msg['role']}: {msg['content']}" 
-        for msg in conversation_history[-5:]
-    ])
-    
-    # Construct the prompt
-    prompt_text = f"""
-    {system_prompt}
 
-    PROBLEM CONTEXT:
-    {question.get_formatted_context()}
+    # The current question is sent on its own, not as part of the history
+    history = conversation_history
+    if history and history[-1]['role'] == 'user' and history[-1]['content'] == user_prompt:
+        history = history[:-1]
+    window_started = time.monotonic()
+    window = context_builder.build(history, context_summary)
+    window_seconds = time.monotonic() - window_started
+    if context_summary is not None:
+        context_summary.update(window.summary_state)
 
-    STUDENT INFORMATION:
-    Proficiency Level: {proficiency_level}
-    
-    CONVERSATION HISTORY:
-    {context}
-    
-    CURRENT QUESTION:
-    {user_prompt}
-    
-    RESPONSE GUIDELINES:
-    {guidelines}
-    
-    Additional Instructions:
-    1. Use the problem details provided above to give accurate guidance
-    2. Consider the problem's difficulty ({question.difficulty}) when providing hints
-    3. Reference relevant topics: {', '.join(question.topic_tags)}
-    4. Don't provide direct solutions
-    5. Use code blocks for any code snippets (wrapped in ```)
-    6. Use mathematical notation when needed (wrapped in $ or $$)
+    title_slug = extract_title_slug(leetcode_url)
+    first_question = not any(message['role'] == 'user' for message in history)
+    cacheable = answer_cache.is_cacheable(user_prompt, history)
+    if cacheable:
+        with span("cache_lookup"):
+            cached_answer = answer_cache.lookup(title_slug, proficiency_level, user_prompt)
+            # Pre-generated answers are stored under their canonical wording
+            canonical = canonical_question_for(user_prompt) if cached_answer is None and first_question else None
+            if canonical is not None:
+                cached_answer = answer_cache.peek(title_slug, proficiency_level, canonical)
+                if cached_answer is not None:
+                    _canonical_answers.inc()
+        if cached_answer is not None:
+            print(f"Answer cache hit for '{title_slug}': {user_prompt!r}")
+            return pipe(CachedResponse(cached_answer))
+
+    # An opening hint may have been generated while the student read the problem
+    if first_question:
+        with span("cache_lookup"):
+            hint = speculative_hints.claim(title_slug, proficiency_level, user_prompt)
+        if hint is not None:
+            print(f"Speculative hint used for '{title_slug}': {user_prompt!r}")
+            return pipe(CachedResponse(hint))
+
+    if not llm_backend.is_available():
+        # The model is failing; a saved answer beats an error after a long wait
+        fallback = None if cacheable else answer_cache.lookup(title_slug, proficiency_level, user_prompt)
+        if fallback is None:
+            return "The Teaching Assistant is having trouble reaching the model. Please try again in a minute."
+        _degraded_answers.inc()
+        print(f"Model circuit open, serving a cached answer for '{title_slug}': {user_prompt!r}")
+        return pipe(CachedResponse(_DEGRADED_NOTE + fallback))
     
-    Your response:
-    """
+    # Static prefix (system prompt, guidelines, problem context) is compiled once
+    # per problem and proficiency; only the summary, history and question change per turn
+    prompt_started = time.monotonic()
+    prompt_text = prompt_builder.build(
+        title_slug,
+        proficiency_level,
+        question,
+        window.messages,
+        user_prompt,
+        summary=window.summary
+    )
+    # One prompt_build span per turn: the context window plus the prompt around it
+    add_span("prompt_build", window_seconds + time.monotonic() - prompt_started)
+
+    prompt_tokens = rate_limiter.estimate_tokens(prompt_text)
+    _prompt_tokens.observe(prompt_tokens)
+    print(f"Prompt tokens (estimated): {prompt_tokens} "
+          f"[history {window.history_tokens} over {len(window.messages)} messages, "
+          f"summary {window.summary_tokens}]")
     
+    async def start():
+        return await llm_backend.stream(prompt_text)
+
     try:
-        response = model.generate_content(
-            prompt_text,
-            stream=True,
-            generation_config={
-                'temperature': 0.7,
-                'top_p': 0.8,
-                'top_k': 40
-            }
+        # Runs on the process-wide generation loop; chunks arrive through a queue
+        response = generation_service.submit(
+            rate_limiter.get_user_identifier(), start,
+            turn=len(conversation_history), prompt_tokens=prompt_tokens
         )
+        if cacheable:
+            def cache_answer(answer, usage, seconds):
+                tokens = getattr(usage, 'total_token_count', 0) or \
+                    prompt_tokens + rate_limiter.estimate_tokens(answer)
+                answer_cache.put(title_slug, proficiency_level, user_prompt, answer, tokens, seconds)
+
+            return RecordingStream(response, cache_answer)
         return response
+    except GenerationRejected:
+        return "The Teaching Assistant is very busy right now. Please try again in a minute."
     except Exception as e:
         return f"Sorry, I encountered an error: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,60 @@
+import json
+import streamlit as st
+from typing import Callable, Dict
+from config.settings import Config
+from utils.http_client import http_client
+from utils.metrics import metrics
+from utils.problem_cache import problem_cache
+from utils.tracing import tracer
+from .answer_cache import answer_cache
+from .generation_service import generation_service
+from .llm_backend import llm_backend
+from .prompt_builder import prompt_builder
+from .similar_prefetcher import similar_prefetcher
+from .speculative_hints import speculative_hints
+
+
+def component_stats() -> Dict[str, Callable[[], Dict]]:
+    """Hit rates, queue depths and breaker states of the shared components, by section"""
+    return {
+        "Problem cache": problem_cache.stats,
+        "HTTP client": http_client.stats,
+        "Similar question prefetch": similar_prefetcher.stats,
+        "Prompt prefixes": prompt_builder.stats,
+        "Answer cache": answer_cache.stats,
+        "Speculative hints": speculative_hints.stats,
+        "Generation service": generation_service.stats,
+        "Model backend": llm_backend.stats,
+        "API keys": llm_backend.key_pool.stats if llm_backend.key_pool is not None else dict,
+    }
+
+
+def _metric_rows():
+    rows = []
+    for name, snapshot in metrics.snapshot().items():
+        row = {"metric": name, "type": snapshot["type"]}
+        if snapshot["type"] == "histogram":
+            row.update({key: snapshot[key] for key in ("count", "p50", "p90", "p99")})
+        else:
+            row["value"] = snapshot["value"]
+        rows.append(row)
+    return rows
+
+
+def render_metrics_sidebar():
+    """Show latency percentiles, component stats and every metric (LATENCY_PANEL_ENABLED)"""
+    if not Config.LATENCY_PANEL_ENABLED:
+        return
+
+    tracer.display_latency_panel()
+
+    with st.expander("📈 Service Stats", expanded=False):
+        for name, stats in component_stats().items():
+            st.markdown(f"**{name}**")
+            try:
+                st.json(json.dumps(stats(), default=str), expanded=False)
+            except Exception as e:
+                st.caption(f"Unavailable: {e}")
+
+    with st.expander("🔢 All Metrics", expanded=False):
+        st.dataframe(_metric_rows(), use_container_width=True, hide_index=True)
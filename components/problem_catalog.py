@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, Optional
+
+from config.settings import Config
+from utils.metrics import metrics
+from utils.validators import extract_title_slug
+from .problem_sources import is_valid_payload, normalize_mirror_question
+
+
+def iter_json_records(path: str, chunk_size: int = 1 << 16) -> Iterator[Dict]:
+    """
+    Stream JSON objects from a dump without loading the whole file
+
+    Accepts JSON Lines, concatenated objects, or a single top-level array of
+    objects. Only the object currently being decoded is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    separators = " \t\r\n,[]"
+    buffer = ""
+    eof = False
+
+    with open(path, encoding="utf-8") as f:
+        while True:
+            position = 0
+            while position < len(buffer) and buffer[position] in separators:
+                position += 1
+            buffer = buffer[position:]
+
+            if not buffer:
+                if eof:
+                    return
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+
+            buffer = buffer[end:]
+            if isinstance(record, dict):
+                yield record
+
+
+class ProblemCatalog:
+    """
+    Local, indexed catalog of problems imported from a dump.
+
+    Lookups by title slug use the primary key and lookups by frontend id use
+    a secondary index, so the app can serve problems without any network.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS catalog (
+                    slug TEXT PRIMARY KEY,
+                    frontend_id TEXT,
+                    title TEXT NOT NULL,
+                    difficulty TEXT,
+                    payload TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_catalog_frontend_id ON catalog (frontend_id)"
+            )
+        self.hits = metrics.counter("problem_catalog.hits", "Problems served from the offline catalog")
+        self.misses = metrics.counter("problem_catalog.misses", "Slugs not present in the offline catalog")
+
+    @classmethod
+    def from_config(cls) -> Optional["ProblemCatalog"]:
+        """Open the configured catalog, or return None if none has been imported"""
+        path = Config.PROBLEM_CATALOG_PATH
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except sqlite3.Error as e:
+            print(f"Problem catalog disabled, could not open '{path}': {e}")
+            return None
+
+    def get(self, title_slug: str, record_stats: bool = True) -> Optional[Dict]:
+        """Look up a problem payload by canonical title slug"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM catalog WHERE slug = ?", (title_slug,)
+            ).fetchone()
+        if row is None:
+            if record_stats:
+                self.misses.inc()
+            return None
+        if record_stats:
+            self.hits.inc()
+        return json.loads(row[0])
+
+    def get_by_frontend_id(self, frontend_id: str) -> Optional[Dict]:
+        """Look up a problem payload by its LeetCode number, e.g. '1' for Two Sum"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM catalog WHERE frontend_id = ?", (str(frontend_id),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, title_slug: str, payload: Dict) -> None:
+        """Replace the stored payload of an existing problem"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE catalog SET payload = ? WHERE slug = ?", (json.dumps(payload), title_slug)
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM catalog").fetchone()[0]
+
+    def import_dump(self, path: str, batch_size: int = 500) -> Dict[str, int]:
+        """
+        Stream a JSON/JSONL dump in the mirror API shape into the catalog
+
+        Args:
+            path: Dump file path
+            batch_size: Rows written per transaction
+
+        Returns:
+            Counts of imported and skipped records
+        """
+        imported, skipped = 0, 0
+        batch = []
+
+        def flush():
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO catalog (slug, frontend_id, title, difficulty, payload) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    batch
+                )
+            batch.clear()
+
+        for record in iter_json_records(path):
+            slug = record.get("titleSlug") or extract_title_slug(record.get("link", ""))
+            payload = normalize_mirror_question(record, slug) if slug else None
+            if not is_valid_payload(payload):
+                skipped += 1
+                continue
+
+            batch.append((
+                slug,
+                str(payload["questionFrontendId"]),
+                payload["questionTitle"],
+                payload["difficulty"],
+                json.dumps(payload)
+            ))
+            imported += 1
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+        return {"imported": imported, "skipped": skipped}
+
+
+# Global catalog instance (None until a dump has been imported)
+problem_catalog = ProblemCatalog.from_config()
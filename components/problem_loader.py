@@ -0,0 +1,106 @@
+import os
+import socket
+import threading
+import time
+from typing import Dict
+
+from config.settings import Config
+from utils.metrics import metrics
+from utils.problem_cache import problem_cache
+from utils.single_flight import SingleFlight
+from .problem_catalog import problem_catalog
+from .problem_sources import ProblemFetchError, problem_sources
+
+# Concurrent fetches of the same slug within this process share one upstream request
+_problem_fetches = SingleFlight("problem_fetch")
+_remote_coalesced = metrics.counter(
+    "single_flight.problem_fetch.coalesced_remote",
+    "Fetches that waited for another process holding the slug's lease"
+)
+
+
+def _lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def _fetch_with_lease(title_slug: str) -> Dict:
+    """Fetch a slug upstream, or wait for the process that already holds its lease"""
+    payload = problem_cache.get(title_slug, record_stats=False)
+    if payload is not None:
+        return payload
+
+    owner = _lease_owner()
+    lease_seconds = Config.PROBLEM_FETCH_TIMEOUT_SECONDS
+    deadline = time.monotonic() + lease_seconds
+    waited = False
+
+    while True:
+        if problem_cache.acquire_lease(title_slug, owner, lease_seconds):
+            try:
+                payload = problem_cache.get(title_slug, record_stats=False)
+                if payload is None:
+                    payload = problem_sources.fetch(title_slug)
+                    problem_cache.put(title_slug, payload)
+                return payload
+            finally:
+                problem_cache.release_lease(title_slug, owner)
+
+        if not waited:
+            _remote_coalesced.inc()
+            waited = True
+        if time.monotonic() >= deadline:
+            raise ProblemFetchError(f"Timed out waiting for another worker to fetch '{title_slug}'")
+        time.sleep(Config.PROBLEM_LEASE_POLL_SECONDS)
+
+        payload = problem_cache.get(title_slug, record_stats=False)
+        if payload is not None:
+            return payload
+
+
+def is_problem_available_locally(title_slug: str) -> bool:
+    """True if the problem can be served from the catalog or the cache without a fetch"""
+    if problem_catalog is not None and problem_catalog.get(title_slug, record_stats=False) is not None:
+        return True
+    return problem_cache.get(title_slug, record_stats=False) is not None
+
+
+def load_problem_payload(title_slug: str) -> Dict:
+    """
+    Load the canonical payload for a problem
+
+    The offline catalog (if one has been imported) is consulted first, then
+    the persistent problem cache. On a miss, concurrent callers for the same
+    slug are coalesced: one thread per process fetches, and across processes
+    a lease in the problem store lets a single worker go upstream while the
+    others wait for its result to land in the cache.
+
+    Args:
+        title_slug: Canonical title slug
+
+    Returns:
+        The canonical problem payload
+
+    Raises:
+        ProblemFetchError: If the problem could not be fetched
+    """
+    if problem_catalog is not None:
+        payload = problem_catalog.get(title_slug)
+        if payload is not None:
+            return payload
+
+    payload = problem_cache.get(title_slug)
+    if payload is not None:
+        return payload
+
+    if Config.PROBLEM_CATALOG_ONLY:
+        raise ProblemFetchError(f"'{title_slug}' is not in the offline catalog")
+
+    return _problem_fetches.do(title_slug, lambda: _fetch_with_lease(title_slug))
+
+
+def store_problem_payload(title_slug: str, payload: Dict) -> None:
+    """Write an enriched payload (e.g. with its parsed artifact) back where it was loaded from"""
+    if problem_catalog is not None and problem_catalog.get(title_slug, record_stats=False) is not None:
+        problem_catalog.update(title_slug, payload)
+    else:
+        problem_cache.update(title_slug, payload)
@@ -0,0 +1,300 @@
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from config.settings import Config
+from utils.http_client import RequestCancelled, http_client
+from utils.metrics import metrics
+
+
+class ProblemFetchError(Exception):
+    """Raised when no problem source produced a valid payload"""
+
+
+class FetchCancelled(RequestCancelled):
+    """Raised inside a source when the coordinator no longer needs its answer"""
+
+
+def _read_json(response: requests.Response, cancel_event: threading.Event) -> Dict:
+    """Read a streamed JSON body, aborting as soon as the fetch is cancelled"""
+    body = bytearray()
+    try:
+        for chunk in response.iter_content(chunk_size=16384):
+            if cancel_event.is_set():
+                raise FetchCancelled()
+            body.extend(chunk)
+    finally:
+        response.close()
+    return json.loads(body)
+
+
+def normalize_mirror_question(data: Dict, title_slug: str) -> Dict:
+    """Reduce a mirror API response to the canonical problem payload"""
+    return {
+        "questionId": data.get("questionId", ""),
+        "questionFrontendId": data.get("questionFrontendId", data.get("questionId", "")),
+        "questionTitle": data.get("questionTitle", ""),
+        "titleSlug": data.get("titleSlug") or title_slug,
+        "link": data.get("link") or f"https://leetcode.com/problems/{title_slug}/",
+        "difficulty": data.get("difficulty", ""),
+        "question": data.get("question") or "",
+        "exampleTestcases": data.get("exampleTestcases") or "",
+        "topicTags": [{"name": tag["name"]} for tag in data.get("topicTags") or []],
+        "similarQuestions": data.get("similarQuestions") or "[]",
+    }
+
+
+def normalize_graphql_question(data: Dict, title_slug: str) -> Dict:
+    """Convert a LeetCode GraphQL `question` object to the canonical problem payload"""
+    return {
+        "questionId": data.get("questionId", ""),
+        "questionFrontendId": data.get("questionFrontendId") or data.get("questionId", ""),
+        "questionTitle": data.get("title", ""),
+        "titleSlug": data.get("titleSlug") or title_slug,
+        "link": f"https://leetcode.com/problems/{title_slug}/",
+        "difficulty": data.get("difficulty", ""),
+        "question": data.get("content") or "",
+        "exampleTestcases": data.get("exampleTestcases") or "",
+        "topicTags": [{"name": tag["name"]} for tag in data.get("topicTags") or []],
+        "similarQuestions": data.get("similarQuestions") or "[]",
+    }
+
+
+def is_valid_payload(payload: Optional[Dict]) -> bool:
+    """A payload is usable once it has at least a title and a description"""
+    return bool(payload and payload.get("questionTitle") and payload.get("question"))
+
+
+class MirrorSource:
+    """The community LeetCode mirror hosted on render.com (cold-starts when idle)"""
+
+    name = "mirror"
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    def fetch(self, title_slug: str, cancel_event: threading.Event, timeout: Optional[Tuple[float, float]] = None) -> Dict:
+        response = http_client.get(
+            f"{self.base_url}/select",
+            cancel_event=cancel_event,
+            params={"titleSlug": title_slug},
+            stream=True,
+            **({"timeout": timeout} if timeout else {})
+        )
+        response.raise_for_status()
+        return normalize_mirror_question(_read_json(response, cancel_event), title_slug)
+
+
+class GraphQLSource:
+    """LeetCode's own GraphQL endpoint"""
+
+    name = "graphql"
+
+    FIELDS = """
+        questionId
+        questionFrontendId
+        title
+        titleSlug
+        content
+        difficulty
+        exampleTestcases
+        topicTags {
+          name
+        }
+        similarQuestions
+    """
+
+    QUERY = f"""
+    query questionData($titleSlug: String!) {{
+      question(titleSlug: $titleSlug) {{{FIELDS}}}
+    }}
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+
+    def fetch(self, title_slug: str, cancel_event: threading.Event, timeout: Optional[Tuple[float, float]] = None) -> Dict:
+        response = http_client.post(
+            self.endpoint,
+            cancel_event=cancel_event,
+            json={"query": self.QUERY, "variables": {"titleSlug": title_slug}},
+            headers={"Content-Type": "application/json"},
+            stream=True,
+            **({"timeout": timeout} if timeout else {})
+        )
+        response.raise_for_status()
+        data = _read_json(response, cancel_event)
+        question = (data.get("data") or {}).get("question")
+        if not question:
+            raise ProblemFetchError(f"GraphQL returned no question for '{title_slug}'")
+        return normalize_graphql_question(question, title_slug)
+
+    def fetch_many(self, title_slugs: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch several problems in one request using aliased `question` fields
+
+        Args:
+            title_slugs: Canonical title slugs
+
+        Returns:
+            Mapping of slug to canonical payload for every slug LeetCode returned
+        """
+        variables = {f"s{i}": slug for i, slug in enumerate(title_slugs)}
+        declarations = ", ".join(f"${name}: String!" for name in variables)
+        selections = "\n".join(
+            f"q{i}: question(titleSlug: $s{i}) {{{self.FIELDS}}}" for i in range(len(title_slugs))
+        )
+        query = f"query questionBatch({declarations}) {{\n{selections}\n}}"
+
+        response = http_client.post(
+            self.endpoint,
+            json={"query": query, "variables": variables},
+            headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+        data = response.json().get("data") or {}
+
+        payloads = {}
+        for i, slug in enumerate(title_slugs):
+            question = data.get(f"q{i}")
+            if question:
+                payload = normalize_graphql_question(question, slug)
+                if is_valid_payload(payload):
+                    payloads[slug] = payload
+        return payloads
+
+
+class ProblemSourceCoordinator:
+    """
+    Fetch a problem from several upstream sources with request hedging.
+
+    The preferred source is queried first. If it has not answered within
+    `hedge_delay` seconds (or fails), the next source is fired as well; the
+    first valid payload wins and the remaining in-flight fetches are cancelled.
+    A cancelled fetch stops between reads and is not retried. Hedged fetches
+    use the shorter `hedge_timeout` (connect, read), since a request blocked
+    on connecting or on its headers can't be interrupted.
+    """
+
+    def __init__(self, sources: List, hedge_delay: float, timeout: float,
+                 max_workers: int = 8, hedge_timeout: Optional[Tuple[float, float]] = None):
+        self.sources = sources
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.hedge_timeout = hedge_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="problem-source")
+        self.hedges = metrics.counter("problem_source.hedges", "Secondary sources fired by the hedge timer")
+        self._latency = {
+            source.name: metrics.histogram(f"problem_source.{source.name}.latency_seconds")
+            for source in sources
+        }
+        self._wins = {source.name: metrics.counter(f"problem_source.{source.name}.wins") for source in sources}
+        self._errors = {source.name: metrics.counter(f"problem_source.{source.name}.errors") for source in sources}
+        self._cancelled = {
+            source.name: metrics.counter(f"problem_source.{source.name}.cancelled") for source in sources
+        }
+
+    @classmethod
+    def from_config(cls) -> "ProblemSourceCoordinator":
+        """Build the coordinator described by the LEETCODE_* / PROBLEM_* settings"""
+        available = {
+            MirrorSource.name: MirrorSource(Config.LEETCODE_MIRROR_URL),
+            GraphQLSource.name: GraphQLSource(Config.LEETCODE_GRAPHQL_URL),
+        }
+        preferred = Config.PROBLEM_SOURCE_PREFERRED.lower()
+        if preferred not in available:
+            preferred = MirrorSource.name
+        sources = [available.pop(preferred)] + list(available.values())
+        return cls(
+            sources, Config.PROBLEM_HEDGE_DELAY_SECONDS, Config.PROBLEM_FETCH_TIMEOUT_SECONDS,
+            hedge_timeout=(Config.PROBLEM_HEDGE_CONNECT_TIMEOUT, Config.PROBLEM_HEDGE_READ_TIMEOUT)
+        )
+
+    def _timed_fetch(self, source, title_slug: str, cancel_event: threading.Event,
+                     timeout: Optional[Tuple[float, float]]) -> Dict:
+        started = time.perf_counter()
+        try:
+            payload = source.fetch(title_slug, cancel_event, timeout)
+        except RequestCancelled:
+            self._cancelled[source.name].inc()
+            raise
+        except Exception:
+            self._errors[source.name].inc()
+            raise
+        self._latency[source.name].observe(time.perf_counter() - started)
+        if not is_valid_payload(payload):
+            self._errors[source.name].inc()
+            raise ProblemFetchError(f"{source.name} returned an incomplete payload")
+        return payload
+
+    def fetch(self, title_slug: str) -> Dict:
+        """
+        Fetch a canonical problem payload
+
+        Args:
+            title_slug: Canonical title slug
+
+        Returns:
+            The first valid payload returned by any source
+
+        Raises:
+            ProblemFetchError: If every source failed or the overall timeout passed
+        """
+        waiting = list(self.sources)
+        in_flight = {}
+        errors = []
+        deadline = time.monotonic() + self.timeout
+
+        def launch(hedged=False):
+            source = waiting.pop(0)
+            cancel_event = threading.Event()
+            timeout = self.hedge_timeout if hedged else None
+            future = self._executor.submit(self._timed_fetch, source, title_slug, cancel_event, timeout)
+            in_flight[future] = (source, cancel_event)
+
+        launch()
+        try:
+            while in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                timeout = min(remaining, self.hedge_delay) if waiting else remaining
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    if waiting:
+                        self.hedges.inc()
+                        launch(hedged=True)
+                    continue
+
+                for future in done:
+                    source, _ = in_flight.pop(future)
+                    try:
+                        payload = future.result()
+                    except Exception as e:
+                        errors.append(f"{source.name}: {e}")
+                        continue
+                    self._wins[source.name].inc()
+                    return payload
+
+                # Every finished source failed, fail over without waiting for the hedge timer
+                if waiting:
+                    launch()
+        finally:
+            for future, (source, cancel_event) in in_flight.items():
+                cancel_event.set()
+                if future.cancel():
+                    self._cancelled[source.name].inc()
+
+        if not errors:
+            errors.append(f"timed out after {self.timeout:g}s")
+        raise ProblemFetchError(f"Could not fetch '{title_slug}' ({'; '.join(errors)})")
+
+
+# Global coordinator instance shared by every problem fetcher
+problem_sources = ProblemSourceCoordinator.from_config()
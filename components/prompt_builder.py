@@ -0,0 +1,154 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from agents.prompts import get_system_prompt
+from config.settings import Config
+from utils.metrics import metrics
+from .leetcode_api import LeetCodeQuestion
+
+# The static prefix comes first and is byte-identical on every turn for the same
+# (problem, proficiency), so the model backend's prefix caching can reuse it.
+# get_system_prompt already embeds the proficiency guidelines and level, and the
+# problem context already lists difficulty and topics; none of that is repeated.
+_STATIC_TEMPLATE = """{system_prompt}
+
+PROBLEM CONTEXT:
+{problem_context}
+
+Additional Instructions:
+1. Use the problem details provided above to give accurate guidance
+2. Consider the problem's difficulty and topics when providing hints
+3. Don't provide direct solutions
+4. Use code blocks for any code snippets (wrapped in ```)
+5. Use mathematical notation when needed (wrapped in $ or $$)
+"""
+
+_TURN_TEMPLATE = """
+{summary_section}CONVERSATION HISTORY:
+{history}
+
+CURRENT QUESTION:
+{question}
+
+Your response:
+"""
+
+_SUMMARY_SECTION = """EARLIER CONVERSATION (summary):
+{summary}
+
+"""
+
+
+def format_history(messages: List[Dict]) -> str:
+    """Render messages as `role: content` lines"""
+    return "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+
+
+class PromptBuilder:
+    """
+    Build Gemini prompts from a compiled static prefix plus the per-turn part.
+
+    The static part (system prompt, guidelines and problem context) is compiled
+    once per (title slug, proficiency) and kept in a bounded LRU. An entry is
+    recompiled if the problem's data changed since it was compiled.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._prefixes: "OrderedDict[Tuple[str, str], Tuple[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = metrics.counter("prompt_prefix.hits", "Prompts built from a compiled static prefix")
+        self.misses = metrics.counter("prompt_prefix.misses", "Static prompt prefixes compiled")
+        self.evictions = metrics.counter("prompt_prefix.evictions", "Compiled prefixes evicted")
+        self.entries = metrics.gauge("prompt_prefix.entries", "Compiled prefixes held in memory")
+
+    @classmethod
+    def from_config(cls) -> "PromptBuilder":
+        return cls(max_entries=Config.PROMPT_PREFIX_CACHE_SIZE)
+
+    @staticmethod
+    def compile_prefix(title_slug: str, proficiency_level: str, question: LeetCodeQuestion) -> str:
+        """Render the static part of the prompt"""
+        # The canonical URL keeps the prefix identical however the student pasted the link
+        problem_url = f"https://leetcode.com/problems/{title_slug}/"
+        return _STATIC_TEMPLATE.format(
+            system_prompt=get_system_prompt(problem_url, proficiency_level).strip(),
+            problem_context=question.get_formatted_context()
+        )
+
+    def static_prefix(self, title_slug: str, proficiency_level: str,
+                      question: LeetCodeQuestion) -> str:
+        """
+        Get the compiled static prefix for a problem and proficiency level
+
+        Args:
+            title_slug: Canonical title slug of the problem
+            proficiency_level: Student proficiency level
+            question: The problem the prefix is compiled from
+
+        Returns:
+            The static prompt prefix
+        """
+        key = (title_slug, proficiency_level)
+        source_key = question._context_key
+        with self._lock:
+            entry = self._prefixes.get(key)
+            if entry is not None and entry[0] == source_key:
+                self._prefixes.move_to_end(key)
+                self.hits.inc()
+                return entry[1]
+
+        prefix = self.compile_prefix(title_slug, proficiency_level, question)
+        self.misses.inc()
+        with self._lock:
+            self._prefixes[key] = (source_key, prefix)
+            self._prefixes.move_to_end(key)
+            while len(self._prefixes) > self.max_entries:
+                self._prefixes.popitem(last=False)
+                self.evictions.inc()
+            self.entries.set(len(self._prefixes))
+        return prefix
+
+    def build(self, title_slug: str, proficiency_level: str, question: LeetCodeQuestion,
+              history_messages: List[Dict], user_prompt: str, summary: str = "") -> str:
+        """
+        Build the full prompt for one chat turn
+
+        Args:
+            title_slug: Canonical title slug of the problem
+            proficiency_level: Student proficiency level
+            question: The problem being discussed
+            history_messages: Recent messages selected for the prompt
+            user_prompt: The student's current question
+            summary: Rolling summary of the older messages
+
+        Returns:
+            The static prefix followed by the summary, history and current question
+        """
+        prefix = self.static_prefix(title_slug, proficiency_level, question)
+        return prefix + _TURN_TEMPLATE.format(
+            summary_section=_SUMMARY_SECTION.format(summary=summary) if summary else "",
+            history=format_history(history_messages),
+            question=user_prompt
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._prefixes.clear()
+            self.entries.set(0)
+
+    def stats(self) -> Dict[str, float]:
+        """Get prefix cache counters for display"""
+        lookups = self.hits.value + self.misses.value
+        return {
+            "entries": len(self._prefixes),
+            "hits": self.hits.value,
+            "misses": self.misses.value,
+            "evictions": self.evictions.value,
+            "hit_rate": self.hits.value / lookups if lookups else 0.0,
+        }
+
+
+# Global prompt builder instance
+prompt_builder = PromptBuilder.from_config()
@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from config.settings import Config
+from utils.metrics import metrics
+from utils.rate_limiter import TokenBucket
+from .leetcode_api import fetch_question_by_slug
+from .problem_loader import is_problem_available_locally
+
+
+class SimilarQuestionPrefetcher:
+    """
+    Warm the problem caches with a problem's similar questions in the background.
+
+    Work runs on a small dedicated pool, paced by its own token bucket and
+    capped in how much may be pending, so prefetching never blocks the script
+    thread or competes noticeably with foreground fetches. When it cannot keep
+    up, new work is dropped rather than queued.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 20,
+                 max_per_problem: int = 5, rate: float = 1.0, enabled: bool = True):
+        self.enabled = enabled
+        self.max_per_problem = max_per_problem
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="similar-prefetch")
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._bucket = TokenBucket(rate)
+        self._in_progress = set()
+        self._prefetched = OrderedDict()  # slugs we fetched upstream and no student has loaded yet
+        self._lock = threading.Lock()
+        self.scheduled = metrics.counter("prefetch.scheduled", "Similar questions queued for prefetch")
+        self.dropped = metrics.counter("prefetch.dropped", "Prefetches skipped because the queue was full")
+        self.fetched = metrics.counter("prefetch.fetched", "Similar questions fetched upstream")
+        self.already_cached = metrics.counter("prefetch.already_cached", "Similar questions already cached")
+        self.failed = metrics.counter("prefetch.failed", "Prefetches that failed")
+        self.used = metrics.counter("prefetch.used", "Problems loaded after being fetched by the prefetcher")
+
+    @classmethod
+    def from_config(cls) -> "SimilarQuestionPrefetcher":
+        return cls(
+            max_workers=Config.PREFETCH_WORKERS,
+            max_pending=Config.PREFETCH_MAX_PENDING,
+            max_per_problem=Config.PREFETCH_MAX_PER_PROBLEM,
+            rate=Config.PREFETCH_RATE_PER_SECOND,
+            enabled=Config.PREFETCH_SIMILAR_ENABLED
+        )
+
+    def schedule(self, similar_questions: List[Dict]) -> int:
+        """
+        Queue similar questions for prefetch without blocking
+
+        Args:
+            similar_questions: `LeetCodeQuestion.similar_questions` entries
+
+        Returns:
+            Number of questions queued
+        """
+        if not self.enabled:
+            return 0
+
+        queued = 0
+        for question in similar_questions[:self.max_per_problem]:
+            slug = question.get("titleSlug")
+            if not slug:
+                continue
+            with self._lock:
+                if slug in self._in_progress or slug in self._prefetched:
+                    continue
+                if not self._pending.acquire(blocking=False):
+                    self.dropped.inc()
+                    break
+                self._in_progress.add(slug)
+            self.scheduled.inc()
+            self._executor.submit(self._prefetch, slug)
+            queued += 1
+        return queued
+
+    def _prefetch(self, slug: str) -> None:
+        try:
+            cached = is_problem_available_locally(slug)
+            if not cached:
+                self._bucket.acquire()
+            # Parse too, so the student's click is served from the in-process cache
+            fetch_question_by_slug(slug)
+            if cached:
+                # Nothing was warmed, so a later click says nothing about prefetching
+                self.already_cached.inc()
+                return
+            self.fetched.inc()
+            with self._lock:
+                self._prefetched[slug] = True
+                while len(self._prefetched) > 10000:
+                    self._prefetched.popitem(last=False)
+        except Exception as e:
+            self.failed.inc()
+            print(f"Error prefetching similar question '{slug}': {e}")
+        finally:
+            with self._lock:
+                self._in_progress.discard(slug)
+            self._pending.release()
+
+    def record_load(self, title_slug: str) -> bool:
+        """Note that a student loaded a problem; returns True if we had fetched it upstream for them"""
+        with self._lock:
+            was_prefetched = self._prefetched.pop(title_slug, None) is not None
+        if was_prefetched:
+            self.used.inc()
+        return was_prefetched
+
+    def stats(self) -> Dict[str, float]:
+        """Get prefetch counters and the share of upstream fetches a student went on to load"""
+        fetched = self.fetched.value
+        return {
+            "scheduled": self.scheduled.value,
+            "dropped": self.dropped.value,
+            "fetched": self.fetched.value,
+            "already_cached": self.already_cached.value,
+            "failed": self.failed.value,
+            "used": self.used.value,
+            "hit_rate": self.used.value / fetched if fetched else 0.0,
+        }
+
+
+# Global prefetcher instance
+similar_prefetcher = SimilarQuestionPrefetcher.from_config()
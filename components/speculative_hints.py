@@ -0,0 +1,287 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from config.settings import Config
+from utils.metrics import metrics
+from utils.rate_limiter import TokenBucket, rate_limiter
+from .answer_cache import answer_cache, normalize_question
+from .generation_service import GenerationRejected, generation_service
+from .llm_backend import llm_backend
+from .prompt_builder import prompt_builder
+
+# Question the opening hint answers; also its key in the answer cache
+OPENING_QUESTION = "How should I start thinking about this problem? Give me an overview and a first hint."
+
+# First questions asking for a way in, rather than about something specific
+_OPENING_INTENT = re.compile(
+    r"\b(hint|hints|start|started|begin|overview|approach|idea|stuck|clue|nudge|"
+    r"explain the problem|understand the problem|where do i|how do i|how should i|what should i)\b"
+)
+_SPECIFIC_INTENT = re.compile(
+    r"\b(complexity|big o|code|bug|error|wrong|fail|failing|tle|time limit|test case|edge case|"
+    r"solution|my approach|optimi[sz]e)\b"
+)
+_MAX_OPENING_WORDS = 15
+
+
+def matches_opening_intent(question: str) -> bool:
+    """Tell whether a student's first question asks for a general way into the problem"""
+    normalized = normalize_question(question)
+    if not normalized or len(normalized.split()) > _MAX_OPENING_WORDS:
+        return False
+    return bool(_OPENING_INTENT.search(normalized)) and not _SPECIFIC_INTENT.search(normalized)
+
+
+class _Speculation:
+    def __init__(self):
+        self.answer: Optional[str] = None
+        self.tokens = 0
+        self.seconds = 0.0
+        self.persisted = False  # Written to the answer cache once first served
+        self.stream = None  # GenerationStream once submitted
+        self.done = threading.Event()
+
+    @property
+    def started(self) -> bool:
+        """Whether the generation has a slot and is being answered"""
+        return self.stream is not None and self.stream.started
+
+
+def _share_of_quota(per_minute: float, share: float) -> Optional[TokenBucket]:
+    """Bucket refilled at `share` of a per-minute quota; None if the quota is unlimited"""
+    if per_minute <= 0:
+        return None
+    budget_per_minute = per_minute * share
+    return TokenBucket(budget_per_minute / 60.0, capacity=max(1.0, budget_per_minute))
+
+
+class SpeculativeHintGenerator:
+    """
+    Generate a problem's opening hint in the background as soon as it is loaded.
+
+    Most students open with "where do I start?", so the answer for the
+    student's proficiency is generated while they read the description and
+    held in memory. If the first question matches it (`matches_opening_intent`)
+    it is served at once and written to the answer cache for later students;
+    otherwise it is never persisted and is evicted once `max_entries` newer
+    speculations push it out. Speculation runs on the generation service
+    under its own user, so it only ever takes one slot, and is capped by
+    buckets refilled at `max_quota_share` of the model's tokens-per-minute and
+    requests-per-minute quotas; when either is empty, problems are simply
+    loaded without a speculative hint. A first question never waits for a
+    speculation that is still queued behind other generations.
+    """
+
+    user_id = "speculative-hints"
+
+    def __init__(self, tokens_per_minute: int = 1000000, requests_per_minute: int = 0, max_quota_share: float = 0.1,
+                 expected_output_tokens: int = 600, max_wait_seconds: float = 10.0,
+                 max_workers: int = 2, max_pending: int = 10, max_entries: int = 1000,
+                 enabled: bool = True):
+        self.enabled = enabled and max_quota_share > 0
+        self.expected_output_tokens = expected_output_tokens
+        self.max_wait_seconds = max_wait_seconds
+        self.max_entries = max_entries
+        self._budget = _share_of_quota(tokens_per_minute, max_quota_share)
+        self._request_budget = _share_of_quota(requests_per_minute, max_quota_share)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="speculative-hint")
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._speculations: "OrderedDict[Tuple[str, str], _Speculation]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.scheduled = metrics.counter("speculative_hint.scheduled", "Opening hints generated speculatively")
+        self.already_cached = metrics.counter("speculative_hint.already_cached", "Problems whose opening hint was already cached")
+        self.over_budget = metrics.counter("speculative_hint.over_budget", "Speculations skipped because the budget was spent")
+        self.dropped = metrics.counter("speculative_hint.dropped", "Speculations skipped because too many were pending")
+        self.completed = metrics.counter("speculative_hint.completed", "Speculative opening hints generated")
+        self.failed = metrics.counter("speculative_hint.failed", "Speculative generations that failed")
+        self.used = metrics.counter("speculative_hint.used", "First questions answered with a speculative hint")
+        self.discarded = metrics.counter("speculative_hint.discarded", "Speculative hints not used because the first question differed")
+        self.late = metrics.counter("speculative_hint.late", "Matching first questions asked before the hint was ready")
+        self.tokens_spent = metrics.counter("speculative_hint.tokens", "Tokens spent on speculative hints")
+
+    @classmethod
+    def from_config(cls) -> "SpeculativeHintGenerator":
+        return cls(
+            tokens_per_minute=Config.GEMINI_TOKENS_PER_MINUTE,
+            requests_per_minute=Config.GEMINI_REQUESTS_PER_MINUTE,
+            max_quota_share=Config.SPECULATIVE_HINT_MAX_QUOTA_SHARE,
+            expected_output_tokens=Config.SPECULATIVE_HINT_OUTPUT_TOKENS,
+            max_wait_seconds=Config.SPECULATIVE_HINT_MAX_WAIT_SECONDS,
+            enabled=Config.SPECULATIVE_HINTS_ENABLED
+        )
+
+    def schedule(self, slug: str, proficiency_level: str, question) -> bool:
+        """
+        Start generating a problem's opening hint without blocking
+
+        Args:
+            slug: Canonical title slug of the problem
+            proficiency_level: Student proficiency level
+            question: The problem's LeetCodeQuestion
+
+        Returns:
+            True if a generation was started
+        """
+        if not self.enabled:
+            return False
+
+        key = (slug, proficiency_level)
+        with self._lock:
+            if key in self._speculations:
+                self._speculations.move_to_end(key)
+                return False
+        if answer_cache.peek(slug, proficiency_level, OPENING_QUESTION) is not None:
+            self.already_cached.inc()
+            return False
+
+        prompt_text = prompt_builder.build(slug, proficiency_level, question, [], OPENING_QUESTION)
+        estimated = rate_limiter.estimate_tokens(prompt_text) + self.expected_output_tokens
+        if not self._take_budget(estimated):
+            self.over_budget.inc()
+            return False
+        if not self._pending.acquire(blocking=False):
+            self._refund_budget(estimated)
+            self.dropped.inc()
+            return False
+
+        speculation = _Speculation()
+        with self._lock:
+            self._speculations[key] = speculation
+            while len(self._speculations) > self.max_entries:
+                self._speculations.popitem(last=False)
+        self.scheduled.inc()
+        self._executor.submit(self._speculate, key, speculation, prompt_text, estimated)
+        return True
+
+    def _take_budget(self, estimated: int) -> bool:
+        if self._budget is not None and not self._budget.try_acquire(estimated):
+            return False
+        if self._request_budget is not None and not self._request_budget.try_acquire(1):
+            if self._budget is not None:
+                self._budget.charge(-estimated)
+            return False
+        return True
+
+    def _refund_budget(self, estimated: int) -> None:
+        if self._budget is not None:
+            self._budget.charge(-estimated)
+        if self._request_budget is not None:
+            self._request_budget.charge(-1)
+
+    def _speculate(self, key: Tuple[str, str], speculation: _Speculation,
+                   prompt_text: str, estimated: int) -> None:
+        slug, proficiency_level = key
+
+        async def start():
+            return await llm_backend.stream(prompt_text)
+
+        started = time.monotonic()
+        try:
+            stream = generation_service.submit(self.user_id, start)
+            speculation.stream = stream
+            answer = "".join(chunk.text for chunk in stream)
+            seconds = time.monotonic() - started
+            usage = stream.usage_metadata
+            tokens = getattr(usage, 'total_token_count', 0) or \
+                rate_limiter.estimate_tokens(prompt_text) + rate_limiter.estimate_tokens(answer)
+            if self._budget is not None:
+                self._budget.charge(tokens - estimated)
+            self.tokens_spent.inc(tokens)
+            if answer:
+                speculation.tokens = tokens
+                speculation.seconds = seconds
+                speculation.answer = answer
+                self.completed.inc()
+        except GenerationRejected:
+            self._refund_budget(estimated)
+            self.dropped.inc()
+        except Exception as e:
+            self.failed.inc()
+            print(f"Error generating speculative hint for '{slug}': {e}")
+        finally:
+            speculation.done.set()
+            self._pending.release()
+            if speculation.answer is None:
+                with self._lock:
+                    if self._speculations.get(key) is speculation:
+                        del self._speculations[key]
+
+    def claim(self, slug: str, proficiency_level: str, question: str) -> Optional[str]:
+        """
+        Get the opening hint for a student's first question, if it asks for one
+
+        Waits up to `max_wait_seconds` for a speculation already being
+        answered; one still queued is a miss, since the student's own request
+        would not start any later than it.
+
+        Args:
+            slug: Canonical title slug of the problem
+            proficiency_level: Student proficiency level
+            question: The student's first question
+
+        Returns:
+            The opening hint, or None if the question asks for something else
+            or no hint is ready
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            speculation = self._speculations.get((slug, proficiency_level))
+        if not matches_opening_intent(question):
+            if speculation is not None:
+                self.discarded.inc()
+            return None
+
+        answer = None
+        if speculation is not None and (speculation.done.is_set() or speculation.started):
+            speculation.done.wait(self.max_wait_seconds)
+            answer = speculation.answer
+            if answer is not None:
+                self._persist(slug, proficiency_level, speculation)
+        if answer is None:
+            answer = answer_cache.peek(slug, proficiency_level, OPENING_QUESTION)
+        if answer is None:
+            if speculation is not None:
+                self.late.inc()
+            return None
+        self.used.inc()
+        return answer
+
+    def _persist(self, slug: str, proficiency_level: str, speculation: _Speculation) -> None:
+        """Write a served hint to the answer cache, once, so it outlives this process"""
+        with self._lock:
+            if speculation.persisted:
+                return
+            speculation.persisted = True
+        answer_cache.put(slug, proficiency_level, OPENING_QUESTION, speculation.answer,
+                         speculation.tokens, speculation.seconds)
+
+    def stats(self) -> Dict[str, float]:
+        """Get speculation counters, hit rate and budget for display"""
+        completed = self.completed.value
+        return {
+            "scheduled": self.scheduled.value,
+            "completed": completed,
+            "failed": self.failed.value,
+            "over_budget": self.over_budget.value,
+            "used": self.used.value,
+            "discarded": self.discarded.value,
+            "late": self.late.value,
+            "hit_rate": self.used.value / completed if completed else 0.0,
+            "tokens": self.tokens_spent.value,
+            "budget_available_tokens": self._budget.available() if self._budget is not None else None,
+            "budget_available_requests": (
+                self._request_budget.available() if self._request_budget is not None else None
+            ),
+        }
+
+
+# Global speculative hint generator instance
+speculative_hints = SpeculativeHintGenerator.from_config()
@@ -1,64 +1,261 @@
 import streamlit as st
 import time
 import re
+from typing import Callable, List, Optional
+from config.settings import Config
+from utils.metrics import metrics
+from utils.tracing import add_span
+from .context_builder import TOKEN_BUCKETS
 
-def stream_response(response_stream, typing_speed: float = 0.25):
-    """Stream the response with typewriter effect and formatting"""
-    full_response = ""
-    message_placeholder = st.empty()
-    
+_billed_prompt_tokens = metrics.histogram(
+    "gemini.prompt_tokens", "Prompt tokens billed per turn", buckets=TOKEN_BUCKETS
+)
+_billed_output_tokens = metrics.histogram(
+    "gemini.output_tokens", "Output tokens billed per turn", buckets=TOKEN_BUCKETS
+)
+_frames = metrics.histogram(
+    "render.frames", "Placeholder updates per streamed answer", buckets=(1, 5, 10, 25, 50, 100, 250, 500)
+)
+
+_FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+_BACKTICK_RUN = re.compile(r"`+")
+_UNESCAPED_DOLLAR = re.compile(r"(?<!\\)\$")
+_CURSOR = "▌"
+
+
+def record_usage(response_stream) -> None:
+    """Log the token usage Gemini reports once a stream has been consumed"""
+    usage = getattr(response_stream, 'usage_metadata', None)
+    if not usage or not getattr(usage, 'prompt_token_count', None):
+        return
+    _billed_prompt_tokens.observe(usage.prompt_token_count)
+    _billed_output_tokens.observe(usage.candidates_token_count or 0)
+    print(f"Gemini usage: {usage.prompt_token_count} prompt tokens, "
+          f"{usage.candidates_token_count} output tokens")
+
+
+def format_line(line: str) -> str:
+    """
+    Format one line of prose: escape `$` outside inline code so Streamlit
+    shows dollar signs literally instead of treating them as LaTeX delimiters
+    """
+    if "$" not in line:
+        return line
+
+    # Pair backtick runs of equal length into code spans; unmatched runs are literal
+    spans = []
+    runs = list(_BACKTICK_RUN.finditer(line))
+    index = 0
+    while index < len(runs):
+        opening = runs[index]
+        closing = next((run for run in runs[index + 1:]
+                        if len(run.group()) == len(opening.group())), None)
+        if closing is None:
+            index += 1
+            continue
+        spans.append((opening.start(), closing.end()))
+        index = runs.index(closing) + 1
+
+    parts = []
+    position = 0
+    for start, end in spans:
+        parts.append(_UNESCAPED_DOLLAR.sub(r"\\$", line[position:start]))
+        parts.append(line[start:end])
+        position = end
+    parts.append(_UNESCAPED_DOLLAR.sub(r"\\$", line[position:]))
+    return "".join(parts)
+
+
+class MarkdownStreamFormatter:
+    """
+    Format a markdown answer as it streams in, touching each character once.
+
+    Text is formatted a line at a time; only the incomplete last line is
+    re-formatted when more text arrives. Fenced code blocks are passed through
+    untouched, and the fence state is carried across chunks. A block ends at
+    a blank line (or closing fence) not followed by an indented continuation;
+    finished blocks are handed out once through `pop_blocks()`, so a renderer
+    never has to re-send them.
+    """
+
+    def __init__(self):
+        self._fence: Optional[str] = None  # Opening marker of the code fence we are in
+        self._blank = False                 # Last line was blank; the block ends unless the next is indented
+        self._partial = ""                  # Incomplete last line, raw
+        self._open_lines: List[str] = []    # Formatted complete lines of the unfinished block
+        self._blocks: List[str] = []        # Finished blocks not yet popped
+
+    def _close_block(self) -> None:
+        if self._open_lines:
+            self._blocks.append("".join(self._open_lines))
+            self._open_lines = []
+
+    def _commit_line(self, line: str) -> None:
+        fence = _FENCE.match(line)
+        if self._fence is None:
+            if not line.strip():
+                self._open_lines.append("\n")
+                self._blank = True
+                return
+            if self._blank and not line[:1].isspace():
+                # An indented line would continue the block (e.g. a list item's paragraph)
+                self._close_block()
+            self._blank = False
+            if fence:
+                self._fence = fence.group(1)
+                self._open_lines.append(line + "\n")
+            else:
+                self._open_lines.append(format_line(line) + "\n")
+        else:
+            self._open_lines.append(line + "\n")
+            closing = fence.group(1) if fence else ""
+            if closing.startswith(self._fence[0]) and len(closing) >= len(self._fence) \
+                    and not line.strip()[len(closing):].strip():
+                self._fence = None
+                self._blank = True
+
+    def feed(self, text: str) -> None:
+        """Add streamed text"""
+        self._partial += text
+        if "\n" not in text:
+            return
+        *lines, self._partial = self._partial.split("\n")
+        for line in lines:
+            self._commit_line(line)
+
+    def pop_blocks(self) -> List[str]:
+        """Take the blocks finished since the last call"""
+        blocks, self._blocks = self._blocks, []
+        return blocks
+
+    def tail(self) -> str:
+        """Formatted text of the unfinished block, including the incomplete last line"""
+        partial = self._partial
+        if partial and self._fence is None:
+            partial = format_line(partial)
+        return "".join(self._open_lines) + partial
+
+    def finish(self) -> None:
+        """Commit the last line once the stream has ended"""
+        if self._partial:
+            partial, self._partial = self._partial, ""
+            self._commit_line(partial)
+            # The last line had no newline of its own
+            self._open_lines[-1] = self._open_lines[-1][:-1]
+        self._close_block()
+
+
+def format_markdown(text: str) -> str:
+    """Format a complete answer the same way it is formatted while streaming"""
+    formatter = MarkdownStreamFormatter()
+    formatter.feed(text)
+    formatter.finish()
+    return "".join(formatter.pop_blocks())
+
+
+class StreamRenderer:
+    """
+    Render a streamed answer into a Streamlit container.
+
+    Finished blocks are written once into their own element; only the
+    unfinished tail is redrawn, at most `fps` times per second.
+    """
+
+    def __init__(self, container, fps: float = 10.0, clock: Callable[[], float] = time.monotonic):
+        self._container = container
+        self._tail = container.empty()
+        self._interval = 1.0 / fps if fps > 0 else 0.0
+        self._clock = clock
+        self._last_frame = float("-inf")
+        self.formatter = MarkdownStreamFormatter()
+        self.frames = 0
+
+    def _write_blocks(self) -> None:
+        for block in self.formatter.pop_blocks():
+            self._tail.markdown(block)
+            self._tail = self._container.empty()
+
+    def _draw_tail(self, cursor: bool) -> None:
+        tail = self.formatter.tail()
+        if tail or cursor:
+            self._tail.markdown(tail + (_CURSOR if cursor else ""))
+        self.frames += 1
+
+    def feed(self, text: str) -> None:
+        """Add streamed text, redrawing if a frame is due"""
+        self.formatter.feed(text)
+        now = self._clock()
+        if now - self._last_frame >= self._interval:
+            self._write_blocks()
+            self._draw_tail(cursor=True)
+            self._last_frame = now
+
+    def finish(self) -> None:
+        """Draw the final state without the cursor"""
+        self.formatter.finish()
+        self._write_blocks()
+        self._draw_tail(cursor=False)
+
+
+def stream_response(response_stream, typing_speed: Optional[float] = None, fps: Optional[float] = None):
+    """
+    Stream the response into the chat, formatted incrementally
+
+    Args:
+        response_stream: Iterable of chunks with a `text` attribute (usually a
+            StreamPipeline drained by a background producer), or an error
+            message string
+        typing_speed: Pause after each chunk for a typewriter effect
+            (STREAM_TYPING_DELAY_SECONDS, none by default)
+        fps: Maximum redraws per second (STREAM_RENDER_FPS)
+
+    Returns:
+        The full response text
+    """
+    if isinstance(response_stream, str):
+        st.markdown(response_stream)
+        return response_stream
+
+    typing_speed = Config.STREAM_TYPING_DELAY_SECONDS if typing_speed is None else typing_speed
+    renderer = StreamRenderer(st.container(), Config.STREAM_RENDER_FPS if fps is None else fps)
+    parts = []
+    render_seconds = 0.0  # Formatting and drawing only, not waiting for chunks
+
+    chunks = iter(response_stream)
     try:
         with st.spinner("Teaching Assistant is typing..."):
-            for chunk in response_stream:
+            for chunk in chunks:
                 # Check if chunk is an error message (string)
                 if isinstance(chunk, str):
                     return chunk
-                
+
                 # Get the text from the chunk
                 if hasattr(chunk, 'text'):
                     chunk_text = chunk.text
                 else:
                     chunk_text = chunk.parts[0].text  # For newer versions of Gemini API
-                
-                full_response += chunk_text
-                
-                # Format the response with code blocks and math equations
-                formatted_response = format_code_blocks(full_response)
-                formatted_response = format_math_equations(formatted_response)
-                
-                # Add typewriter effect
-                message_placeholder.markdown(formatted_response + "▌")
-                time.sleep(typing_speed)
-        
-        message_placeholder.markdown(formatted_response)
-        return full_response
-        
+
+                parts.append(chunk_text)
+                started = time.monotonic()
+                renderer.feed(chunk_text)
+                render_seconds += time.monotonic() - started
+                if typing_speed:
+                    time.sleep(typing_speed)
+
+        started = time.monotonic()
+        renderer.finish()
+        render_seconds += time.monotonic() - started
+        add_span("render", render_seconds)
+        _frames.observe(renderer.frames)
+        record_usage(response_stream)
+        return "".join(parts)
+
     except Exception as e:
         error_message = f"An error occurred during streaming: {str(e)}"
         st.error(error_message)
         return error_message
-
-def format_code_blocks(text: str) -> str:
-    """Format code blocks with syntax highlighting"""
-    
-    # Replace ``` code blocks with proper markdown
-    pattern = r"```(\w+)?\n(.*?)```"
-    
-    def replace_code_block(match):
-        language = match.group(1) or ""
-        code = match.group(2)
-        return f"```{language}\n{code}```"
-    
-    formatted_text = re.sub(pattern, replace_code_block, text, flags=re.DOTALL)
-    return formatted_text
-
-def format_math_equations(text: str) -> str:
-    """Format mathematical equations"""
-    
-    # Replace inline math expressions ($...$) with proper LaTeX
-    text = re.sub(r'\$(.+?)\$', r'\$\1\$', text)
-    
-    # Replace block math expressions ($$...$$) with proper LaTeX
-    text = re.sub(r'\$\$(.*?)\$\$', r'\$$\1\$$', text, flags=re.DOTALL)
-    
-    return text
\ No newline at end of file
+    finally:
+        # Stops the producer if rendering ended early (error, early return or script stop)
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
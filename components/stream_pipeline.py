@@ -0,0 +1,161 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from config.settings import Config
+from utils.metrics import metrics
+
+_END = object()
+
+_queue_lag = metrics.histogram("stream.queue_lag_seconds", "Time chunks waited in the queue for the script thread")
+_backpressure = metrics.counter("stream.backpressure_waits", "Times a producer found the chunk queue full")
+
+
+class StreamPipeline:
+    """
+    Bounded hand-off of response chunks from a producer to the script thread.
+
+    The producer (the generation loop for live answers, a small thread for
+    cached ones) calls `put`/`put_async` for each chunk and `finish` at the
+    end, so network reads never wait for rendering and rendering never waits
+    for the network. When the consumer falls `maxsize` chunks behind, the
+    producer waits (backpressure). Chunks are stamped when produced; the
+    consumer iterates and may `cancel()` to stop the producer.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self._queue = queue.Queue(maxsize)
+        self._done = threading.Event()
+        self._cancelled = threading.Event()
+        self._error: Optional[BaseException] = None
+        self.cancel_reason: Optional[str] = None
+        self.first_chunk_at: Optional[float] = None
+        self.last_chunk_at: Optional[float] = None
+        self.chunk_gaps: List[float] = []  # Seconds between consecutive chunks, as produced
+        self.chunks = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def done(self) -> bool:
+        """Whether the producer has finished, however it finished"""
+        return self._done.is_set()
+
+    def _stamp(self) -> float:
+        now = time.monotonic()
+        if self.first_chunk_at is None:
+            self.first_chunk_at = now
+        else:
+            self.chunk_gaps.append(now - self.last_chunk_at)
+        self.last_chunk_at = now
+        self.chunks += 1
+        return now
+
+    # Producer side
+
+    def put(self, chunk) -> bool:
+        """Queue a chunk from a producer thread, waiting for space; False once cancelled"""
+        item = (chunk, self._stamp())
+        waited = False
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if not waited:
+                    _backpressure.inc()
+                    waited = True
+        return False
+
+    async def put_async(self, chunk) -> bool:
+        """Queue a chunk from an event loop without blocking it; False once cancelled"""
+        item = (chunk, self._stamp())
+        waited = False
+        while not self._cancelled.is_set():
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                if not waited:
+                    _backpressure.inc()
+                    waited = True
+                await asyncio.sleep(0.01)
+        return False
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """End the stream, with the error to raise in the consumer if it failed"""
+        if self._done.is_set():
+            return
+        self._error = error
+        self._done.set()
+        try:
+            self._queue.put_nowait((_END, None))
+        except queue.Full:
+            pass  # The consumer notices `_done` once it has drained the queue
+
+    # Consumer side
+
+    def __iter__(self):
+        finished = False
+        try:
+            while True:
+                try:
+                    chunk, produced_at = self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    if self._done.is_set() and self._queue.empty():
+                        chunk = _END
+                    else:
+                        continue
+                if chunk is _END:
+                    finished = True
+                    if self._error is not None:
+                        raise self._error
+                    return
+                _queue_lag.observe(time.monotonic() - produced_at)
+                yield chunk
+        finally:
+            if not finished:
+                # The consumer stopped early; don't keep producing for nobody
+                self.cancel("abandoned")
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Stop the producer, unless it has already finished"""
+        if self._cancelled.is_set() or self._done.is_set():
+            return
+        self.cancel_reason = reason
+        self._cancelled.set()
+        self._on_cancel()
+
+    def _on_cancel(self) -> None:
+        """Hook for producers that must be stopped actively rather than at their next put"""
+
+
+class IterablePipeline(StreamPipeline):
+    """A pipeline fed from a blocking iterable (e.g. a cached answer) by a daemon thread"""
+
+    def __init__(self, source: Iterable, maxsize: int = 64):
+        super().__init__(maxsize)
+        self._source = source
+        threading.Thread(target=self._produce, name="stream-producer", daemon=True).start()
+
+    @property
+    def usage_metadata(self):
+        return getattr(self._source, 'usage_metadata', None)
+
+    def _produce(self) -> None:
+        try:
+            for chunk in self._source:
+                if not self.put(chunk):
+                    return
+            self.finish()
+        except Exception as e:
+            self.finish(e)
+
+
+def pipe(source: Iterable) -> IterablePipeline:
+    """Feed a blocking iterable of chunks through a pipeline drained on a background thread"""
+    return IterablePipeline(source, Config.STREAM_QUEUE_MAXSIZE)
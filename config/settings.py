@@ -18,4 +18,111 @@ class Config:
     ENABLE_RATE_LIMITING = os.getenv('ENABLE_RATE_LIMITING', 'false').lower() == 'true'
     MAX_QUERIES_PER_HOUR = int(os.getenv('MAX_QUERIES_PER_HOUR', '50'))
     MAX_TOKENS_PER_QUERY = int(os.getenv('MAX_TOKENS_PER_QUERY', '4000'))
-    RATE_LIMIT_STORAGE_TYPE = os.getenv('RATE_LIMIT_STORAGE_TYPE', 'session')  # 'session' or 'database'
\ No newline at end of file
+    RATE_LIMIT_STORAGE_TYPE = os.getenv('RATE_LIMIT_STORAGE_TYPE', 'session')  # 'session' or 'database'
+
+    # Problem cache configuration
+    PROBLEM_CACHE_BACKEND = os.getenv('PROBLEM_CACHE_BACKEND', 'sqlite')  # 'sqlite', 'mongodb' or 'none'
+    PROBLEM_CACHE_PATH = os.getenv('PROBLEM_CACHE_PATH', '.cache/problems.sqlite3')
+    PROBLEM_CACHE_TTL_HOURS = float(os.getenv('PROBLEM_CACHE_TTL_HOURS', '168'))
+    PROBLEM_CACHE_MAX_ENTRIES = int(os.getenv('PROBLEM_CACHE_MAX_ENTRIES', '5000'))
+
+    # Problem sources configuration
+    LEETCODE_MIRROR_URL = os.getenv('LEETCODE_MIRROR_URL', 'https://api-miy0.onrender.com')
+    LEETCODE_GRAPHQL_URL = os.getenv('LEETCODE_GRAPHQL_URL', 'https://leetcode.com/graphql')
+    PROBLEM_SOURCE_PREFERRED = os.getenv('PROBLEM_SOURCE_PREFERRED', 'mirror')  # 'mirror' or 'graphql'
+    PROBLEM_HEDGE_DELAY_SECONDS = float(os.getenv('PROBLEM_HEDGE_DELAY_SECONDS', '2.0'))
+    PROBLEM_FETCH_TIMEOUT_SECONDS = float(os.getenv('PROBLEM_FETCH_TIMEOUT_SECONDS', '90'))
+    PROBLEM_HEDGE_CONNECT_TIMEOUT = float(os.getenv('PROBLEM_HEDGE_CONNECT_TIMEOUT', '2'))
+    PROBLEM_HEDGE_READ_TIMEOUT = float(os.getenv('PROBLEM_HEDGE_READ_TIMEOUT', '15'))  # Hedges are a backup, not worth a cold start
+
+    # Outbound HTTP configuration
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '75'))  # The mirror can take 30-60s to wake up
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+    HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '0.5'))
+    HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '8'))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))
+    HTTP_POOL_SIZES = os.getenv('HTTP_POOL_SIZES', '')  # e.g. 'leetcode.com=20,api-miy0.onrender.com=10'
+    HTTP_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('HTTP_CIRCUIT_FAILURE_THRESHOLD', '5'))
+    HTTP_CIRCUIT_RESET_SECONDS = float(os.getenv('HTTP_CIRCUIT_RESET_SECONDS', '30'))
+
+    # Seconds between cache checks while another worker holds a problem's fetch lease
+    PROBLEM_LEASE_POLL_SECONDS = float(os.getenv('PROBLEM_LEASE_POLL_SECONDS', '0.25'))
+
+    # Offline problem catalog configuration
+    PROBLEM_CATALOG_PATH = os.getenv('PROBLEM_CATALOG_PATH', '.cache/catalog.sqlite3')
+    PROBLEM_CATALOG_ONLY = os.getenv('PROBLEM_CATALOG_ONLY', 'false').lower() == 'true'  # Never go to the network
+
+    # Background prefetch of similar questions
+    PREFETCH_SIMILAR_ENABLED = os.getenv('PREFETCH_SIMILAR_ENABLED', 'true').lower() == 'true'
+    PREFETCH_WORKERS = int(os.getenv('PREFETCH_WORKERS', '2'))
+    PREFETCH_MAX_PENDING = int(os.getenv('PREFETCH_MAX_PENDING', '20'))
+    PREFETCH_MAX_PER_PROBLEM = int(os.getenv('PREFETCH_MAX_PER_PROBLEM', '5'))
+    PREFETCH_RATE_PER_SECOND = float(os.getenv('PREFETCH_RATE_PER_SECOND', '1.0'))
+
+    # Compiled static prompt prefixes kept per (problem, proficiency)
+    PROMPT_PREFIX_CACHE_SIZE = int(os.getenv('PROMPT_PREFIX_CACHE_SIZE', '256'))
+
+    # Conversation context configuration (token estimates, ~4 characters per token)
+    CONTEXT_HISTORY_TOKEN_BUDGET = int(os.getenv('CONTEXT_HISTORY_TOKEN_BUDGET', '800'))
+    CONTEXT_SUMMARY_TOKEN_BUDGET = int(os.getenv('CONTEXT_SUMMARY_TOKEN_BUDGET', '300'))
+    CONTEXT_MAX_CODE_LINES = int(os.getenv('CONTEXT_MAX_CODE_LINES', '30'))  # Longer code blocks in history are elided
+
+    # Answer cache configuration
+    ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() == 'true'
+    ANSWER_CACHE_BACKEND = os.getenv('ANSWER_CACHE_BACKEND', 'mongodb')  # 'mongodb' or 'none' (memory only)
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv('ANSWER_CACHE_MAX_ENTRIES', '2000'))
+    ANSWER_CACHE_TTL_HOURS = float(os.getenv('ANSWER_CACHE_TTL_HOURS', '168'))
+    ANSWER_CACHE_FIRST_TURN_ONLY = os.getenv('ANSWER_CACHE_FIRST_TURN_ONLY', 'true').lower() == 'true'
+    ANSWER_CACHE_MAX_QUESTION_CHARS = int(os.getenv('ANSWER_CACHE_MAX_QUESTION_CHARS', '300'))
+    ANSWER_CACHE_SEMANTIC = os.getenv('ANSWER_CACHE_SEMANTIC', 'false').lower() == 'true'
+    ANSWER_CACHE_EMBEDDER = os.getenv('ANSWER_CACHE_EMBEDDER', 'hashing')  # 'hashing' or 'sentence-transformers'
+    ANSWER_CACHE_EMBEDDING_MODEL = os.getenv('ANSWER_CACHE_EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+    ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv('ANSWER_CACHE_SIMILARITY_THRESHOLD', '0.9'))
+
+    # Generation service configuration
+    GENERATION_MAX_CONCURRENCY = int(os.getenv('GENERATION_MAX_CONCURRENCY', '8'))  # Model streams running at once per process
+    GENERATION_MAX_PER_USER = int(os.getenv('GENERATION_MAX_PER_USER', '1'))
+    GENERATION_MAX_QUEUE = int(os.getenv('GENERATION_MAX_QUEUE', '100'))  # Waiting requests beyond this are rejected
+
+    # LLM backend configuration
+    LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')  # 'gemini' or 'fake' (local, for benchmarks and load tests)
+    GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash')
+    FAKE_LLM_TTFT_SECONDS = float(os.getenv('FAKE_LLM_TTFT_SECONDS', '0.5'))
+    FAKE_LLM_CHUNK_INTERVAL_SECONDS = float(os.getenv('FAKE_LLM_CHUNK_INTERVAL_SECONDS', '0.05'))
+    FAKE_LLM_CHUNK_CHARS = int(os.getenv('FAKE_LLM_CHUNK_CHARS', '40'))
+    FAKE_LLM_ERROR_RATE = float(os.getenv('FAKE_LLM_ERROR_RATE', '0'))
+    FAKE_LLM_RESPONSE_CHARS = int(os.getenv('FAKE_LLM_RESPONSE_CHARS', '1200'))
+    FAKE_LLM_SEED = int(os.getenv('FAKE_LLM_SEED', '0'))
+
+    # Speculative opening hint configuration
+    SPECULATIVE_HINTS_ENABLED = os.getenv('SPECULATIVE_HINTS_ENABLED', 'true').lower() == 'true'
+    SPECULATIVE_HINT_MAX_QUOTA_SHARE = float(os.getenv('SPECULATIVE_HINT_MAX_QUOTA_SHARE', '0.1'))  # Of GEMINI_TOKENS_PER_MINUTE and GEMINI_REQUESTS_PER_MINUTE (one key)
+    SPECULATIVE_HINT_OUTPUT_TOKENS = int(os.getenv('SPECULATIVE_HINT_OUTPUT_TOKENS', '600'))  # Estimate reserved up front
+    SPECULATIVE_HINT_MAX_WAIT_SECONDS = float(os.getenv('SPECULATIVE_HINT_MAX_WAIT_SECONDS', '10'))
+
+    # API key pool configuration (quotas are per key)
+    GEMINI_API_KEYS = os.getenv('GEMINI_API_KEYS', '')  # Comma-separated; defaults to GOOGLE_API_KEY alone
+    GEMINI_REQUESTS_PER_MINUTE = int(os.getenv('GEMINI_REQUESTS_PER_MINUTE', '0'))  # 0 = unlimited (e.g. 15 on the free tier)
+    GEMINI_TOKENS_PER_MINUTE = int(os.getenv('GEMINI_TOKENS_PER_MINUTE', '1000000'))  # 0 = unlimited
+    GEMINI_OUTPUT_TOKEN_ESTIMATE = int(os.getenv('GEMINI_OUTPUT_TOKEN_ESTIMATE', '600'))  # Reserved per request until usage is known
+    GEMINI_KEY_BENCH_SECONDS = float(os.getenv('GEMINI_KEY_BENCH_SECONDS', '60'))  # Out of rotation after a 429
+    GEMINI_KEY_MAX_WAIT_SECONDS = float(os.getenv('GEMINI_KEY_MAX_WAIT_SECONDS', '30'))
+    FAKE_LLM_QUOTA_ERROR_RATE = float(os.getenv('FAKE_LLM_QUOTA_ERROR_RATE', '0'))
+
+    # Model call resilience configuration
+    GENERATION_TTFT_TIMEOUT_SECONDS = float(os.getenv('GENERATION_TTFT_TIMEOUT_SECONDS', '20'))  # Per attempt
+    GENERATION_TOTAL_TIMEOUT_SECONDS = float(os.getenv('GENERATION_TOTAL_TIMEOUT_SECONDS', '120'))  # Whole answer, retries included
+    GENERATION_MAX_RETRIES = int(os.getenv('GENERATION_MAX_RETRIES', '2'))  # Only before the first chunk
+    GENERATION_BACKOFF_BASE = float(os.getenv('GENERATION_BACKOFF_BASE', '0.5'))
+    GENERATION_BACKOFF_MAX = float(os.getenv('GENERATION_BACKOFF_MAX', '4'))
+    LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('LLM_CIRCUIT_FAILURE_THRESHOLD', '5'))
+    LLM_CIRCUIT_RESET_SECONDS = float(os.getenv('LLM_CIRCUIT_RESET_SECONDS', '30'))
+
+    # Stream rendering configuration
+    STREAM_RENDER_FPS = float(os.getenv('STREAM_RENDER_FPS', '10'))  # Redraws per second while an answer streams
+    STREAM_TYPING_DELAY_SECONDS = float(os.getenv('STREAM_TYPING_DELAY_SECONDS', '0'))  # Optional pause per chunk
+    STREAM_QUEUE_MAXSIZE = int(os.getenv('STREAM_QUEUE_MAXSIZE', '64'))  # Chunks buffered before the producer waits
+
+    # Latency tracing configuration
+    LATENCY_PANEL_ENABLED = os.getenv('LATENCY_PANEL_ENABLED', 'false').lower() == 'true'  # Per-phase percentiles in the sidebar
@@ -0,0 +1,200 @@
+"""
+Benchmark the single-pass HTML to markdown converter against the three
+BeautifulSoup-based parsers it replaced.
+
+The corpus is real problem HTML taken from a dump file, the offline catalog
+or the problem cache; a small built-in sample is used if none is available.
+
+Usage:
+    python -m scripts.bench_html_markdown
+    python -m scripts.bench_html_markdown --dump problems.jsonl --repeat 5
+"""
+import argparse
+import json
+import re
+import sqlite3
+import sys
+import time
+from typing import Callable, List
+
+from bs4 import BeautifulSoup
+
+from components.problem_catalog import iter_json_records
+from config.settings import Config
+from utils.html_markdown import html_to_markdown
+
+SAMPLE_HTML = """<p>Given an array of integers <code>nums</code>&nbsp;and an integer <code>target</code>, return <em>indices of the two numbers such that they add up to <code>target</code></em>.</p>
+
+<p>You may assume that each input would have <strong><em>exactly</em> one solution</strong>, and you may not use the <em>same</em> element twice.</p>
+
+<p>&nbsp;</p>
+<p><strong class="example">Example 1:</strong></p>
+
+<pre>
+<strong>Input:</strong> nums = [2,7,11,15], target = 9
+<strong>Output:</strong> [0,1]
+<strong>Explanation:</strong> Because nums[0] + nums[1] == 9, we return [0, 1].
+</pre>
+
+<p><strong class="example">Example 2:</strong></p>
+<img alt="" src="https://assets.leetcode.com/uploads/2020/10/03/remove_ex1.jpg" style="width: 542px; height: 222px;" />
+<pre>
+<strong>Input:</strong> nums = [3,2,4], target = 6
+<strong>Output:</strong> [1,2]
+</pre>
+
+<table>
+<thead><tr><th>Column Name</th><th>Type</th></tr></thead>
+<tbody><tr><td>id</td><td>int</td></tr><tr><td>name</td><td>varchar</td></tr></tbody>
+</table>
+
+<p><strong>Constraints:</strong></p>
+
+<ul>
+	<li><code>2 &lt;= nums.length &lt;= 10<sup>4</sup></code></li>
+	<li><code>-10<sup>9</sup> &lt;= nums[i] &lt;= 10<sup>9</sup></code></li>
+	<li><strong>Only one valid answer exists.</strong></li>
+</ul>
+
+<p>&nbsp;</p>
+<strong>Follow-up:&nbsp;</strong>Can you come up with an algorithm that is less than <code>O(n<sup>2</sup>)</code><font face="monospace">&nbsp;</font>time complexity?"""
+
+
+# The implementations below are the parsers that html_to_markdown replaced,
+# kept verbatim so the comparison stays honest.
+
+def _legacy_table_to_markdown(table) -> str:
+    markdown = []
+    headers = []
+    for th in table.find_all('th'):
+        headers.append(th.get_text().strip())
+    markdown.append('| ' + ' | '.join(headers) + ' |')
+    markdown.append('| ' + ' | '.join(['---'] * len(headers)) + ' |')
+    for row in table.find_all('tr')[1:]:
+        cols = []
+        for td in row.find_all('td'):
+            cols.append(td.get_text().strip())
+        markdown.append('| ' + ' | '.join(cols) + ' |')
+    return '\n'.join(markdown)
+
+
+def legacy_leetcode_question(html_content: str):
+    """LeetCodeQuestion._process_html"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    images = []
+    for img in soup.find_all('img'):
+        src = img.get('src', '')
+        alt = img.get('alt', '')
+        if src:
+            images.append({'src': src, 'alt': alt})
+        img.replace_with(f'[Image {len(images)}]')
+    for table in soup.find_all('table'):
+        markdown_table = _legacy_table_to_markdown(table)
+        table.replace_with(soup.new_string(markdown_table))
+    text = soup.get_text()
+    return text.strip(), images
+
+
+def legacy_problem_fetcher(html_content: str):
+    """ProblemFetcher._process_html / _format_text"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    images = []
+    for img in soup.find_all('img'):
+        src = img.get('src', '')
+        alt = img.get('alt', '')
+        if src:
+            images.append({'src': src, 'alt': alt})
+    for code in soup.find_all('code'):
+        code_text = code.get_text()
+        code.replace_with(f'`{code_text}`')
+    for ul in soup.find_all('ul'):
+        items = ul.find_all('li')
+        formatted_items = '\n'.join(f"- {item.get_text().strip()}" for item in items)
+        ul.replace_with(soup.new_string(formatted_items))
+    for table in soup.find_all('table'):
+        markdown_table = _legacy_table_to_markdown(table)
+        table.replace_with(BeautifulSoup(markdown_table, 'html.parser').new_tag('p'))
+    text = soup.get_text('\n', strip=True)
+    text = '\n\n'.join(line.strip() for line in text.split('\n') if line.strip())
+    return text, images
+
+
+def legacy_extract_text(html_content: str) -> str:
+    """utils.leetcode_parser.extract_text_from_html"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    parts = []
+    for element in soup.recursiveChildGenerator():
+        if isinstance(element, str):
+            parts.append(element.strip())
+        elif element.name in ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li']:
+            parts.append(element.get_text(separator=" ", strip=True))
+        elif element.name == 'code':
+            parts.append(f"```{element.get_text(strip=True)}```")
+    text = "\n".join(filter(None, parts))
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r' +', ' ', text)
+    return text.strip()
+
+
+def load_corpus(dump: str, limit: int) -> List[str]:
+    """Collect problem HTML from a dump, the offline catalog or the problem cache"""
+    corpus = []
+    if dump:
+        for record in iter_json_records(dump):
+            if record.get("question"):
+                corpus.append(record["question"])
+            if len(corpus) >= limit:
+                return corpus
+        return corpus
+
+    for path, table in ((Config.PROBLEM_CATALOG_PATH, "catalog"), (Config.PROBLEM_CACHE_PATH, "problems")):
+        try:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            rows = conn.execute(f"SELECT payload FROM {table} LIMIT ?", (limit - len(corpus),)).fetchall()
+            conn.close()
+        except sqlite3.Error:
+            continue
+        corpus.extend(json.loads(row[0]).get("question", "") for row in rows)
+        corpus = [html for html in corpus if html]
+        if len(corpus) >= limit:
+            break
+
+    return corpus or [SAMPLE_HTML]
+
+
+def bench(name: str, fn: Callable, corpus: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for html in corpus:
+            fn(html)
+        best = min(best, time.perf_counter() - started)
+    per_doc = best / len(corpus) * 1000
+    print(f"{name:<42} {best * 1000:9.1f} ms total  {per_doc:7.3f} ms/problem")
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark HTML to markdown conversion")
+    parser.add_argument("--dump", help="JSON/JSONL dump to take problem HTML from")
+    parser.add_argument("--limit", type=int, default=500, help="Maximum problems in the corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation (best is kept)")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.dump, args.limit)
+    size_kb = sum(len(html) for html in corpus) / 1024
+    print(f"Corpus: {len(corpus)} problems, {size_kb:.0f} KiB of HTML\n")
+
+    legacy_total = 0.0
+    legacy_total += bench("legacy LeetCodeQuestion._process_html", legacy_leetcode_question, corpus, args.repeat)
+    legacy_total += bench("legacy ProblemFetcher._process_html", legacy_problem_fetcher, corpus, args.repeat)
+    legacy_total += bench("legacy extract_text_from_html", legacy_extract_text, corpus, args.repeat)
+    single = bench("html_to_markdown (one pass, all callers)", html_to_markdown, corpus, args.repeat)
+
+    print(f"\nAverage speed-up per caller: {legacy_total / 3 / single:.1f}x; "
+          f"the three legacy passes together took {legacy_total / single:.1f}x as long")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
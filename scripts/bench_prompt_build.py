@@ -0,0 +1,108 @@
+"""
+Micro-benchmark of the per-turn cost of rendering a problem for the prompt.
+
+"before" re-renders the LLM context and the image-expanded description on
+every turn, as the app used to; "after" uses the memoized renderings of
+LeetCodeQuestion. Problems come from the offline catalog or the problem cache,
+with a built-in sample as fallback.
+
+Usage:
+    python -m scripts.bench_prompt_build
+    python -m scripts.bench_prompt_build --turns 200 --limit 50
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from typing import Dict, List
+
+from components.leetcode_api import LeetCodeQuestion
+from config.settings import Config
+from scripts.bench_html_markdown import SAMPLE_HTML
+
+SAMPLE_PAYLOAD = {
+    "questionFrontendId": "1",
+    "questionTitle": "Two Sum",
+    "titleSlug": "two-sum",
+    "difficulty": "Easy",
+    "question": SAMPLE_HTML,
+    "exampleTestcases": "[2,7,11,15]\n9\n[3,2,4]\n6\n[3,3]\n6",
+    "topicTags": [{"name": "Array"}, {"name": "Hash Table"}],
+    "similarQuestions": json.dumps([
+        {"title": "3Sum", "titleSlug": "3sum", "difficulty": "Medium"},
+        {"title": "4Sum", "titleSlug": "4sum", "difficulty": "Medium"},
+        {"title": "Two Sum II - Input Array Is Sorted",
+         "titleSlug": "two-sum-ii-input-array-is-sorted", "difficulty": "Medium"},
+    ]),
+}
+
+
+def load_payloads(limit: int) -> List[Dict]:
+    """Collect problem payloads from the offline catalog and the problem cache"""
+    payloads = []
+    for path, table in ((Config.PROBLEM_CATALOG_PATH, "catalog"), (Config.PROBLEM_CACHE_PATH, "problems")):
+        try:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            rows = conn.execute(f"SELECT payload FROM {table} LIMIT ?", (limit - len(payloads),)).fetchall()
+            conn.close()
+        except sqlite3.Error:
+            continue
+        payloads.extend(json.loads(row[0]) for row in rows)
+        if len(payloads) >= limit:
+            break
+    return payloads or [SAMPLE_PAYLOAD]
+
+
+def legacy_description(question: LeetCodeQuestion) -> str:
+    """The previous get_formatted_description: one str.replace per image over the whole text"""
+    description = question.question_text
+    for i, image in enumerate(question.images, 1):
+        description = description.replace(
+            f'[Image {i}]',
+            f'\n\n![{image["alt"]}]({image["src"]})\n\n'
+        )
+    return description
+
+
+def turn_before(question: LeetCodeQuestion) -> None:
+    question._render_context()
+    legacy_description(question)
+
+
+def turn_after(question: LeetCodeQuestion) -> None:
+    question.get_formatted_context()
+    question.get_formatted_description()
+
+
+def bench(name: str, turn, questions: List[LeetCodeQuestion], turns: int) -> float:
+    started = time.perf_counter()
+    for _ in range(turns):
+        for question in questions:
+            turn(question)
+    per_turn = (time.perf_counter() - started) / (turns * len(questions))
+    print(f"{name:<8} {per_turn * 1e6:9.2f} us/turn")
+    return per_turn
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark per-turn prompt rendering")
+    parser.add_argument("--limit", type=int, default=100, help="Maximum problems to load")
+    parser.add_argument("--turns", type=int, default=100, help="Chat turns simulated per problem")
+    args = parser.parse_args(argv)
+
+    questions = [LeetCodeQuestion({k: v for k, v in payload.items() if k != "parsed"})
+                 for payload in load_payloads(args.limit)]
+    # HTML parsing happens once per problem either way; keep it out of the per-turn numbers
+    for question in questions:
+        question.question_text
+
+    print(f"{len(questions)} problems, {args.turns} turns each\n")
+    before = bench("before", turn_before, questions, args.turns)
+    after = bench("after", turn_after, questions, args.turns)
+    print(f"\nSpeed-up: {before / after:.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
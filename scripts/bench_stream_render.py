@@ -0,0 +1,187 @@
+"""
+Benchmark the incremental stream renderer against the per-chunk full reformat
+it replaced, on long synthetic answers.
+
+The legacy loop reformatted and re-sent the whole accumulated answer after
+every chunk and slept 0.25s per chunk; the renderer formats each line once,
+writes finished blocks once and redraws only the unfinished tail at a capped
+frame rate. Streamlit is replaced by a recorder that counts the markdown
+bytes each approach would send to the browser.
+
+Usage:
+    python -m scripts.bench_stream_render
+    python -m scripts.bench_stream_render --chars 2000 20000 100000 --chunk-chars 40 --interval 0.02
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from typing import List
+
+from components.stream_handler import StreamRenderer, format_markdown
+
+LEGACY_TYPING_SPEED = 0.25
+
+PARAGRAPHS = (
+    "Let's think about what the problem asks. If each item costs $5 and you have $20, "
+    "how many can you buy? The same idea applies with `prices[i]` and a running `budget`.",
+    "A hash map gives $O(1)$ average lookups, so the whole scan is $O(n)$ instead of $O(n^2)$.",
+    "- Sort the intervals by start\n- Merge while `cur.start <= last.end`\n- Append otherwise",
+    "```python\ndef two_sum(nums, target):\n    seen = {}\n    for i, num in enumerate(nums):\n"
+    "        if target - num in seen:\n            return [seen[target - num], i]\n"
+    "        seen[num] = i\n    return []\n```",
+    "```bash\necho \"cost: $TOTAL\"\n```",
+    "1. Try a small example by hand.\n\n    Watch which values you look up more than once.\n\n2. Write the brute force first.",
+)
+
+
+def synthetic_answer(chars: int, seed: int = 0) -> str:
+    """Build a markdown answer of about `chars` characters"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < chars:
+        paragraph = rng.choice(PARAGRAPHS)
+        parts.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(parts)
+
+
+def chunked(text: str, size: int) -> List[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def legacy_format_code_blocks(text: str) -> str:
+    """`format_code_blocks` as it was"""
+    pattern = r"```(\w+)?\n(.*?)```"
+
+    def replace_code_block(match):
+        language = match.group(1) or ""
+        code = match.group(2)
+        return f"```{language}\n{code}```"
+
+    return re.sub(pattern, replace_code_block, text, flags=re.DOTALL)
+
+
+def legacy_format_math_equations(text: str) -> str:
+    """`format_math_equations` as it was"""
+    text = re.sub(r'\$(.+?)\$', r'\$\1\$', text)
+    text = re.sub(r'\$\$(.*?)\$\$', r'\$$\1\$$', text, flags=re.DOTALL)
+    return text
+
+
+class RecordingElement:
+    """Stand-in for a Streamlit element that counts what would be sent"""
+
+    def __init__(self, recorder: "Recorder"):
+        self._recorder = recorder
+
+    def markdown(self, text: str) -> None:
+        self._recorder.updates += 1
+        self._recorder.bytes += len(text.encode("utf-8"))
+
+    def empty(self) -> "RecordingElement":
+        return RecordingElement(self._recorder)
+
+
+class Recorder:
+    def __init__(self):
+        self.updates = 0
+        self.bytes = 0
+
+
+class CollectingContainer:
+    """Stand-in for a Streamlit container that keeps each element's final text"""
+
+    def __init__(self):
+        self.elements: List["CollectingContainer"] = []
+        self.text = ""
+
+    def markdown(self, text: str) -> None:
+        self.text = text
+
+    def empty(self) -> "CollectingContainer":
+        element = CollectingContainer()
+        self.elements.append(element)
+        return element
+
+    def rendered(self) -> str:
+        return "".join(element.text for element in self.elements)
+
+
+def run_legacy(chunks: List[str]) -> Recorder:
+    recorder = Recorder()
+    placeholder = RecordingElement(recorder)
+    full_response = ""
+    for chunk in chunks:
+        full_response += chunk
+        formatted = legacy_format_code_blocks(full_response)
+        formatted = legacy_format_math_equations(formatted)
+        placeholder.markdown(formatted + "▌")
+    placeholder.markdown(formatted)
+    return recorder
+
+
+def run_incremental(chunks: List[str], fps: float, interval: float) -> Recorder:
+    recorder = Recorder()
+    now = [0.0]  # Simulated arrival time of the current chunk
+    renderer = StreamRenderer(RecordingElement(recorder), fps=fps, clock=lambda: now[0])
+    for chunk in chunks:
+        renderer.feed(chunk)
+        now[0] += interval
+    renderer.finish()
+    return recorder
+
+
+def check_equivalence(text: str, trials: int = 20) -> None:
+    """Formatting must not depend on where the stream was split"""
+    expected = format_markdown(text)
+    rng = random.Random(1)
+    for _ in range(trials):
+        cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(1, 200))))
+        pieces = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+        container = CollectingContainer()
+        renderer = StreamRenderer(container, fps=0)
+        for piece in pieces:
+            renderer.feed(piece)
+        renderer.finish()
+        rendered = container.rendered()
+        if rendered != expected:
+            raise AssertionError("Incremental rendering differs from one-shot formatting")
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark streamed answer rendering")
+    parser.add_argument("--chars", type=int, nargs="+", default=[2000, 10000, 50000],
+                        help="Answer lengths to simulate")
+    parser.add_argument("--chunk-chars", type=int, default=40, help="Characters per streamed chunk")
+    parser.add_argument("--interval", type=float, default=0.02, help="Simulated seconds between chunks")
+    parser.add_argument("--fps", type=float, default=10.0, help="Renderer frame rate")
+    args = parser.parse_args(argv)
+
+    print(f"{'chars':>7} {'chunks':>6} | {'legacy cpu':>10} {'sent':>9} {'sleep':>7} | "
+          f"{'new cpu':>8} {'sent':>8} {'frames':>6} | {'cpu x':>6} {'bytes x':>7}")
+    for chars in args.chars:
+        text = synthetic_answer(chars)
+        check_equivalence(text)
+        chunks = chunked(text, args.chunk_chars)
+
+        legacy, legacy_seconds = timed(run_legacy, chunks)
+        incremental, new_seconds = timed(run_incremental, chunks, args.fps, args.interval)
+        print(f"{len(text):>7} {len(chunks):>6} | {legacy_seconds * 1000:8.1f}ms "
+              f"{legacy.bytes / 1024:7.0f}KB {len(chunks) * LEGACY_TYPING_SPEED:6.0f}s | "
+              f"{new_seconds * 1000:6.1f}ms {incremental.bytes / 1024:6.0f}KB {incremental.updates:>6} | "
+              f"{legacy_seconds / new_seconds:5.1f}x {legacy.bytes / max(1, incremental.bytes):6.1f}x")
+    print("\nsleep: artificial delay the legacy loop added per answer; the renderer adds none by default")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
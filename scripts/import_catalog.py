@@ -0,0 +1,40 @@
+"""
+Import a LeetCode problem dump into the offline problem catalog.
+
+The dump may be JSON Lines or a JSON array of objects in the same shape the
+mirror API returns for a single problem. The file is streamed, so dumps with
+thousands of problems import within a small memory budget.
+
+Usage:
+    python -m scripts.import_catalog problems.jsonl
+    python -m scripts.import_catalog problems.json --catalog /data/catalog.sqlite3
+"""
+import argparse
+import sys
+import time
+
+from components.problem_catalog import ProblemCatalog
+from config.settings import Config
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import a problem dump into the offline catalog")
+    parser.add_argument("path", help="JSON or JSONL dump in the mirror API shape")
+    parser.add_argument("--catalog", default=Config.PROBLEM_CATALOG_PATH,
+                        help=f"Catalog file to write (default: {Config.PROBLEM_CATALOG_PATH})")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    catalog = ProblemCatalog(args.catalog)
+    result = catalog.import_dump(args.path)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"Imported {result['imported']} problems ({result['skipped']} skipped) "
+        f"into {args.catalog} in {elapsed:.1f}s; catalog now holds {catalog.count()} problems"
+    )
+    return 0 if result["imported"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Load-test the generation path offline with simulated students.
+
+Each student thread builds real prompts for a problem (static prefix, token
+budgeted history) and streams answers through the process-wide generation
+service, by default from the deterministic fake backend so no quota is spent.
+Reports time to first chunk, total latency, errors and throughput.
+
+Usage:
+    python -m scripts.load_test --students 50 --turns 3
+    python -m scripts.load_test --students 20 --ttft 1.5 --error-rate 0.05
+    GENERATION_TTFT_TIMEOUT_SECONDS=1 python -m scripts.load_test --ttft 2
+    python -m scripts.load_test --keys 3 --rpm 30 --quota-error-rate 0.02
+    python -m scripts.load_test --backend gemini --students 2 --turns 1
+"""
+import argparse
+import sys
+import threading
+import time
+from typing import Dict, List
+
+from components.generation_service import GenerationRejected, GenerationService
+from components.key_pool import KeyPool
+from components.leetcode_api import LeetCodeQuestion
+from components.llm_backend import FakeBackend, ResilientBackend, create_backend
+from components.context_builder import ConversationContextBuilder
+from components.prompt_builder import PromptBuilder
+from config.settings import Config
+from scripts.bench_prompt_build import SAMPLE_PAYLOAD
+from utils.metrics import _percentile
+
+QUESTIONS = (
+    "Can you give me a hint?",
+    "What's the time complexity of the brute force approach?",
+    "Which data structure should I use here?",
+    "How do I handle duplicates?",
+)
+
+
+class LoadReport:
+    """Thread-safe collection of per-turn timings"""
+
+    def __init__(self):
+        self.ttft: List[float] = []
+        self.total: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.chars = 0
+        self._lock = threading.Lock()
+
+    def record(self, ttft: float, total: float, chars: int) -> None:
+        with self._lock:
+            self.ttft.append(ttft)
+            self.total.append(total)
+            self.chars += chars
+
+    def error(self, e: Exception) -> None:
+        with self._lock:
+            name = type(e).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def simulate_student(student: int, turns: int, service: GenerationService, backend, question: LeetCodeQuestion,
+                     prompts: PromptBuilder, context: ConversationContextBuilder, report: LoadReport) -> None:
+    history = []
+    summary_state = None
+    for turn in range(turns):
+        user_prompt = QUESTIONS[(student + turn) % len(QUESTIONS)]
+        window = context.build(history, summary_state)
+        summary_state = window.summary_state
+        prompt = prompts.build("two-sum", Config.DEFAULT_PROFICIENCY, question, window.messages, user_prompt,
+                               summary=window.summary)
+
+        started = time.monotonic()
+        first = None
+        parts = []
+        try:
+            for chunk in service.submit(f"student-{student}", lambda: backend.stream(prompt)):
+                if first is None:
+                    first = time.monotonic() - started
+                parts.append(chunk.text)
+        except (GenerationRejected, Exception) as e:
+            report.error(e)
+            continue
+        answer = "".join(parts)
+        report.record(first or 0.0, time.monotonic() - started, len(answer))
+        history += [{"role": "user", "content": user_prompt}, {"role": "assistant", "content": answer}]
+
+
+def describe(name: str, values: List[float]) -> str:
+    ordered = sorted(values)
+    if not ordered:
+        return f"{name:<6} no samples"
+    return (f"{name:<6} p50 {_percentile(ordered, 50):6.2f}s  p90 {_percentile(ordered, 90):6.2f}s  "
+            f"p99 {_percentile(ordered, 99):6.2f}s  max {ordered[-1]:6.2f}s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test generation with simulated students")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=3, help="Questions per student")
+    parser.add_argument("--backend", default="fake", choices=["fake", "gemini"])
+    parser.add_argument("--ttft", type=float, default=Config.FAKE_LLM_TTFT_SECONDS, help="Fake time to first chunk")
+    parser.add_argument("--interval", type=float, default=Config.FAKE_LLM_CHUNK_INTERVAL_SECONDS,
+                        help="Fake seconds between chunks")
+    parser.add_argument("--chunk-chars", type=int, default=Config.FAKE_LLM_CHUNK_CHARS)
+    parser.add_argument("--error-rate", type=float, default=Config.FAKE_LLM_ERROR_RATE)
+    parser.add_argument("--concurrency", type=int, default=Config.GENERATION_MAX_CONCURRENCY,
+                        help="Generation service concurrency cap")
+    parser.add_argument("--seed", type=int, default=Config.FAKE_LLM_SEED)
+    parser.add_argument("--keys", type=int, default=1, help="Fake API keys in the pool")
+    parser.add_argument("--rpm", type=int, default=0, help="Fake requests per minute per key (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="Fake tokens per minute per key (0 = unlimited)")
+    parser.add_argument("--quota-error-rate", type=float, default=Config.FAKE_LLM_QUOTA_ERROR_RATE,
+                        help="Fraction of fake requests answered with a quota error")
+    args = parser.parse_args(argv)
+
+    if args.backend == "fake":
+        key_pool = KeyPool([f"fake-{index}" for index in range(max(1, args.keys))],
+                           requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+                           bench_seconds=Config.GEMINI_KEY_BENCH_SECONDS,
+                           max_wait_seconds=Config.GEMINI_KEY_MAX_WAIT_SECONDS)
+        backend = ResilientBackend.from_config(FakeBackend(
+            ttft_seconds=args.ttft, chunk_interval_seconds=args.interval,
+            chunk_chars=args.chunk_chars, error_rate=args.error_rate,
+            response_chars=Config.FAKE_LLM_RESPONSE_CHARS, seed=args.seed,
+            key_pool=key_pool, quota_error_rate=args.quota_error_rate
+        ))
+    else:
+        backend = create_backend("gemini")
+    service = GenerationService(max_concurrency=args.concurrency, max_per_user=1,
+                                max_queue=Config.GENERATION_MAX_QUEUE)
+    question = LeetCodeQuestion(SAMPLE_PAYLOAD)
+    prompts = PromptBuilder()
+    context = ConversationContextBuilder.from_config()
+    report = LoadReport()
+
+    started = time.monotonic()
+    threads = [
+        threading.Thread(target=simulate_student,
+                         args=(student, args.turns, service, backend, question, prompts, context, report))
+        for student in range(args.students)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    completed = len(report.total)
+    print(f"{args.students} students x {args.turns} turns on '{backend.name}' "
+          f"(concurrency {args.concurrency}) in {elapsed:.1f}s")
+    print(describe("ttft", report.ttft))
+    print(describe("total", report.total))
+    print(f"completed {completed}, errors {sum(report.errors.values())} {report.errors or ''}")
+    print(f"throughput {completed / elapsed:.2f} answers/s, {report.chars / elapsed:.0f} chars/s")
+    stats = service.stats()
+    print(f"queue wait p50 {stats['wait_p50_seconds'] or 0:.2f}s  p99 {stats['wait_p99_seconds'] or 0:.2f}s")
+    resilience = backend.stats()
+    print(f"retries {resilience['retries']:.0f}, ttft timeouts {resilience['ttft_timeouts']:.0f}, "
+          f"total timeouts {resilience['total_timeouts']:.0f}, circuit {resilience['circuit_state']}")
+    for key_id, key_stats in backend.key_pool.stats().items():
+        print(f"{key_id}: {key_stats['requests']:.0f} requests, {key_stats['tokens']:.0f} tokens, "
+              f"{key_stats['rate_limited']:.0f} quota errors, "
+              f"utilization requests {key_stats['requests_utilization']:.0%} "
+              f"tokens {key_stats['tokens_utilization']:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
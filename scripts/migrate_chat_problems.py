@@ -0,0 +1,166 @@
+"""
+Move the problem details embedded in saved chats into the problem store.
+
+Older chats each carry a full copy of their problem (HTML, text, images,
+examples). This streams through `chat_history` in `_id` order and writes
+every referenced problem to the durable `problems` collection, which is
+never expired or evicted. Each problem comes from the offline catalog or
+problem cache, or is fetched upstream. The embedded copy is stored only as
+a last resort, marked incomplete so a later live load replaces it. The chat
+is then rewritten to hold only `problem_slug` next to its title and
+difficulty. A chat keeps its embedded details until its problem is stored,
+and migrated chats no longer match, so the job can be stopped and rerun.
+
+Usage:
+    python -m scripts.migrate_chat_problems --dry-run
+    python -m scripts.migrate_chat_problems --batch-size 200 --no-fetch
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+from components.db_handler import DatabaseHandler, payload_from_problem_details
+from components.leetcode_api import LeetCodeQuestion
+from components.problem_loader import is_problem_available_locally, load_problem_payload
+from utils.validators import extract_title_slug
+
+
+class MigrationReport:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.chats = 0
+        self.migrated = 0
+        self.outcomes: Dict[str, str] = {}  # slug -> stored, copied, fetched, seeded or failed
+        self.failures: Dict[str, str] = {}
+
+    def record_problem(self, slug: str, outcome: str, detail: str = "") -> None:
+        self.outcomes[slug] = outcome
+        if outcome == "failed":
+            self.failures[slug] = detail
+
+    def progress(self) -> None:
+        print(f"{self.chats} chats scanned, {self.migrated} migrated, "
+              f"{len(self.outcomes)} problems", flush=True)
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        counts = {}
+        for outcome in self.outcomes.values():
+            counts[outcome] = counts.get(outcome, 0) + 1
+        lines = [
+            f"Scanned {self.chats} chats in {elapsed:.1f}s",
+            f"  migrated:          {self.migrated}",
+            f"  problems stored:   {counts.get('stored', 0)} (already)",
+            f"  problems copied:   {counts.get('copied', 0)} (from the catalog or problem cache)",
+            f"  problems fetched:  {counts.get('fetched', 0)}",
+            f"  problems seeded:   {counts.get('seeded', 0)} (from embedded details, incomplete)",
+            f"  problems failed:   {counts.get('failed', 0)}",
+        ]
+        lines.extend(f"    {slug}: {error}" for slug, error in self.failures.items())
+        return "\n".join(lines)
+
+
+def ensure_problem(db: DatabaseHandler, slug: str, problem_details: Dict, fetch: bool, dry_run: bool) -> str:
+    """
+    Make sure the durable problem store holds a problem
+
+    Returns:
+        'stored' if it already did, 'copied', 'fetched' or 'seeded' if it
+        was added (or would be, with `dry_run`)
+
+    Raises:
+        Exception: If the problem could not be stored
+    """
+    stored = db.get_problem(slug)
+    if stored is not None and stored['complete']:
+        return "stored"
+
+    local = is_problem_available_locally(slug)
+    if local or fetch:
+        outcome = "copied" if local else "fetched"
+        try:
+            if dry_run:
+                return outcome
+            if db.store_problem(slug, load_problem_payload(slug)):
+                return outcome
+        except Exception as e:
+            print(f"Could not load '{slug}' ({e}), using the embedded details", flush=True)
+
+    if stored is not None:
+        return "stored"  # Seeded by an earlier run
+    payload = payload_from_problem_details(problem_details)
+    LeetCodeQuestion(payload)  # Broken details fail here rather than when a chat loads
+    # Kept out of the problem cache: live loads must not be served this partial payload
+    if not dry_run and not db.store_problem(slug, payload, complete=False):
+        raise RuntimeError("could not write to the problem store")
+    return "seeded"
+
+
+def migrate(db: DatabaseHandler, batch_size: int, fetch: bool, dry_run: bool, report: MigrationReport) -> None:
+    from pymongo import UpdateOne
+
+    chats = db.chats
+    query = {'problem_details': {'$exists': True}}
+    projection = {'problem_url': 1, 'problem_slug': 1, 'problem_title': 1, 'difficulty': 1, 'problem_details': 1}
+    last_id = None
+    while True:
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        batch = list(chats.find(query, projection).sort('_id', 1).limit(batch_size))
+        if not batch:
+            return
+
+        updates: List = []
+        for chat in batch:
+            last_id = chat['_id']
+            report.chats += 1
+            details = chat['problem_details'] or {}
+            slug = chat.get('problem_slug') or extract_title_slug(chat.get('problem_url') or '')
+            if not slug:
+                report.record_problem(str(chat['_id']), "failed", "chat has no problem URL")
+                continue
+
+            if slug not in report.outcomes:
+                try:
+                    report.record_problem(slug, ensure_problem(db, slug, details, fetch, dry_run))
+                except Exception as e:
+                    report.record_problem(slug, "failed", str(e))
+            if report.outcomes[slug] == "failed":
+                continue
+
+            header = {'problem_slug': slug}
+            for field, key in (('problem_title', 'title'), ('difficulty', 'difficulty')):
+                if not chat.get(field) and details.get(key):
+                    header[field] = details[key]
+            updates.append(UpdateOne({'_id': chat['_id']},
+                                     {'$set': header, '$unset': {'problem_details': ''}}))
+
+        if updates and not dry_run:
+            chats.bulk_write(updates, ordered=False)
+        report.migrated += len(updates)
+        report.progress()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Move problem details out of saved chats into the problem store")
+    parser.add_argument("--batch-size", type=int, default=100, help="Chats read and updated per round trip (default: 100)")
+    parser.add_argument("--no-fetch", action="store_true",
+                        help="Never go upstream; store the embedded details for problems not available locally")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args(argv)
+
+    db = DatabaseHandler()
+    if not db.problem_store_ready():
+        print("The durable problem store (the `problems` collection) can't be reached; "
+              "chats would lose their problems. Check MONGODB_URI first.")
+        return 1
+
+    report = MigrationReport()
+    migrate(db, max(1, args.batch_size), not args.no_fetch, args.dry_run, report)
+    print(report.summary())
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Warm the problem cache before a course session.
+
+Reads LeetCode problem URLs or title slugs (one per line, `#` starts a
+comment) and loads every problem that is not cached yet into the persistent
+problem cache using a bounded worker pool, paced by a token bucket so the
+upstream is not flooded.
+
+Usage:
+    python -m scripts.prefetch_problems problems.txt
+    python -m scripts.prefetch_problems problems.txt --source graphql --batch-size 20
+"""
+import argparse
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List
+
+from components.leetcode_api import LeetCodeQuestion
+from components.problem_loader import is_problem_available_locally, load_problem_payload
+from components.problem_sources import GraphQLSource
+from config.settings import Config
+from utils.problem_cache import problem_cache
+from utils.rate_limiter import TokenBucket
+from utils.validators import extract_title_slug
+
+
+def read_slugs(path: str) -> List[str]:
+    """Read unique title slugs from a file of URLs or slugs, keeping file order"""
+    slugs = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            slug = extract_title_slug(line)
+            if slug and slug not in seen:
+                seen.add(slug)
+                slugs.append(slug)
+    return slugs
+
+
+def chunked(items: List[str], size: int) -> Iterable[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class PrefetchReport:
+    """Thread-safe progress and result accounting"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.cached = 0
+        self.catalog = 0
+        self.fetched = 0
+        self.failures: Dict[str, str] = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, slug: str, outcome: str, error: str = "") -> None:
+        with self._lock:
+            self.done += 1
+            if outcome == "cached":
+                self.cached += 1
+            elif outcome == "catalog":
+                self.catalog += 1
+            elif outcome == "fetched":
+                self.fetched += 1
+            else:
+                self.failures[slug] = error
+            detail = f" ({error})" if error else ""
+            print(f"[{self.done}/{self.total}] {slug}: {outcome}{detail}", flush=True)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        lines = [
+            f"Processed {self.done} problems in {elapsed:.1f}s ({rate:.1f} problems/s)",
+            f"  already cached: {self.cached}",
+            f"  in catalog:     {self.catalog}",
+            f"  fetched:        {self.fetched}",
+            f"  failed:         {len(self.failures)}",
+        ]
+        lines.extend(f"    {slug}: {error}" for slug, error in self.failures.items())
+        return "\n".join(lines)
+
+
+def _parse(payload: Dict) -> None:
+    """Run the same parsing the app does so broken payloads are reported now"""
+    LeetCodeQuestion(payload)
+
+
+def prefetch_one(slug: str, bucket: TokenBucket, report: PrefetchReport) -> None:
+    try:
+        if is_problem_available_locally(slug):
+            # Served from the offline catalog, so no upstream request to pace
+            _parse(load_problem_payload(slug))
+            report.record(slug, "catalog")
+            return
+        bucket.acquire()
+        _parse(load_problem_payload(slug))
+        report.record(slug, "fetched")
+    except Exception as e:
+        report.record(slug, "failed", str(e))
+
+
+def prefetch_batch(slugs: List[str], source: GraphQLSource, bucket: TokenBucket,
+                   report: PrefetchReport) -> None:
+    local = [slug for slug in slugs if is_problem_available_locally(slug)]
+    for slug in local:
+        prefetch_one(slug, bucket, report)
+    slugs = [slug for slug in slugs if slug not in local]
+    if not slugs:
+        return
+    try:
+        bucket.acquire()
+        payloads = source.fetch_many(slugs)
+    except Exception as e:
+        print(f"Batch of {len(slugs)} failed ({e}), falling back to single fetches", flush=True)
+        payloads = {}
+
+    for slug in slugs:
+        payload = payloads.get(slug)
+        if payload is None:
+            prefetch_one(slug, bucket, report)
+            continue
+        try:
+            _parse(payload)
+            problem_cache.put(slug, payload)
+            report.record(slug, "fetched")
+        except Exception as e:
+            report.record(slug, "failed", str(e))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Warm the problem cache from a list of LeetCode problems")
+    parser.add_argument("path", help="File with one LeetCode URL or title slug per line")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent upstream requests (default: 4)")
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="Upstream requests per second across all workers (default: 2)")
+    parser.add_argument("--source", choices=["auto", "graphql"], default="auto",
+                        help="'auto' uses the hedged mirror/GraphQL fetch per problem; "
+                             "'graphql' batches several problems into one GraphQL query")
+    parser.add_argument("--batch-size", type=int, default=10,
+                        help="Problems per GraphQL query with --source graphql (default: 10)")
+    args = parser.parse_args(argv)
+
+    if not problem_cache.enabled:
+        print("The problem cache is disabled (PROBLEM_CACHE_BACKEND=none), nothing to warm.")
+        return 1
+
+    slugs = read_slugs(args.path)
+    report = PrefetchReport(len(slugs))
+    missing = []
+    for slug in slugs:
+        if problem_cache.get(slug, record_stats=False) is not None:
+            report.record(slug, "cached")
+        else:
+            missing.append(slug)
+
+    bucket = TokenBucket(args.rate, capacity=max(1, args.workers))
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        if args.source == "graphql":
+            source = GraphQLSource(Config.LEETCODE_GRAPHQL_URL)
+            futures = [
+                pool.submit(prefetch_batch, batch, source, bucket, report)
+                for batch in chunked(missing, max(1, args.batch_size))
+            ]
+        else:
+            futures = [pool.submit(prefetch_one, slug, bucket, report) for slug in missing]
+        for future in as_completed(futures):
+            future.result()
+
+    print(report.summary())
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Pre-generate canonical answers for a problem set into the answer cache.
+
+Reads LeetCode problem URLs or title slugs (one per line, `#` starts a
+comment) and, for every problem and proficiency level, generates the answers
+to a few questions most students ask first (how to start, what complexity to
+aim for, common pitfalls) through the configured LLM backend and stores them
+in the persistent answer cache, so daytime traffic is served from cache.
+
+Generations run with bounded parallelism, paced by a token bucket. Every
+finished item is appended to a checkpoint file; rerunning the same command
+skips what is already done, so an interrupted run resumes where it stopped.
+`--force` starts a fresh checkpoint and regenerates every answer; an
+interrupted forced run is resumed by rerunning without `--force`.
+
+Usage:
+    python -m scripts.pregenerate_answers problems.txt
+    python -m scripts.pregenerate_answers problems.txt --levels beginner advanced --workers 2
+    python -m scripts.pregenerate_answers problems.txt --checkpoint run.jsonl --rate 0.5
+    python -m scripts.pregenerate_answers problems.txt --force
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Set, Tuple
+
+from components.answer_cache import answer_cache
+from components.canonical_questions import CANONICAL_QUESTIONS
+from components.leetcode_api import fetch_question_by_slug
+from components.llm_backend import create_backend
+from components.prompt_builder import prompt_builder
+from config.settings import Config
+from scripts.prefetch_problems import read_slugs
+from utils.rate_limiter import TokenBucket
+
+def resolve_levels(names: List[str]) -> List[str]:
+    """Map level names ('beginner', 'Advanced (...)') to the configured proficiency levels"""
+    if not names:
+        return list(Config.PROFICIENCY_LEVELS)
+    levels = []
+    for name in names:
+        matches = [level for level in Config.PROFICIENCY_LEVELS if level.lower().startswith(name.lower())]
+        if not matches:
+            raise ValueError(f"Unknown proficiency level '{name}'")
+        if matches[0] not in levels:
+            levels.append(matches[0])
+    return levels
+
+
+Item = Tuple[str, str, str]  # slug, proficiency level, question kind
+
+
+class Checkpoint:
+    """Append-only JSON Lines record of finished items"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> Set[Item]:
+        """Read the items a previous run finished"""
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by the interruption
+                done.add((record["slug"], record["proficiency_level"], record["kind"]))
+        return done
+
+    def reset(self) -> None:
+        """Forget every finished item, starting an empty checkpoint"""
+        with self._lock:
+            open(self.path, "w", encoding="utf-8").close()
+
+    def record(self, item: Item, tokens: int) -> None:
+        slug, proficiency_level, kind = item
+        line = json.dumps({
+            "slug": slug,
+            "proficiency_level": proficiency_level,
+            "kind": kind,
+            "tokens": tokens,
+            "finished_at": time.time(),
+        })
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+
+
+class PregenerateReport:
+    """Progress and result accounting"""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.generated = 0
+        self.skipped = 0
+        self.tokens = 0
+        self.failures: Dict[str, str] = {}
+        self.started = time.perf_counter()
+
+    def record(self, item: Item, outcome: str, detail: str = "") -> None:
+        self.done += 1
+        if outcome == "generated":
+            self.generated += 1
+        elif outcome == "skipped":
+            self.skipped += 1
+        else:
+            self.failures["/".join(item)] = detail
+        suffix = f" ({detail})" if detail else ""
+        print(f"[{self.done}/{self.total}] {item[0]} [{item[1].split('(')[0].strip()}] "
+              f"{item[2]}: {outcome}{suffix}", flush=True)
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        lines = [
+            f"Processed {self.done} answers in {elapsed:.1f}s",
+            f"  generated:       {self.generated} ({self.tokens} tokens)",
+            f"  already cached:  {self.skipped}",
+            f"  failed:          {len(self.failures)}",
+        ]
+        lines.extend(f"    {item}: {error}" for item, error in self.failures.items())
+        return "\n".join(lines)
+
+
+async def pregenerate_one(item: Item, backend, limit: asyncio.Semaphore, bucket: TokenBucket,
+                          checkpoint: Checkpoint, report: PregenerateReport, force: bool) -> None:
+    slug, proficiency_level, kind = item
+    user_prompt = CANONICAL_QUESTIONS[kind]
+    async with limit:
+        try:
+            cached = None if force else await asyncio.to_thread(
+                answer_cache.peek, slug, proficiency_level, user_prompt
+            )
+            if cached is not None:
+                checkpoint.record(item, 0)
+                report.record(item, "skipped")
+                return
+
+            question = await asyncio.to_thread(fetch_question_by_slug, slug)
+            prompt_text = prompt_builder.build(slug, proficiency_level, question, [], user_prompt)
+
+            while not bucket.try_acquire():
+                await asyncio.sleep(0.1)
+            started = time.perf_counter()
+            stream = await backend.stream(prompt_text)
+            answer = "".join([chunk.text async for chunk in stream])
+            seconds = time.perf_counter() - started
+            if not answer:
+                raise ValueError("empty answer")
+
+            usage = stream.usage_metadata
+            tokens = getattr(usage, 'total_token_count', 0) or \
+                backend.count_tokens(prompt_text) + backend.count_tokens(answer)
+            await asyncio.to_thread(
+                answer_cache.put, slug, proficiency_level, user_prompt, answer, tokens, seconds
+            )
+            checkpoint.record(item, tokens)
+            report.tokens += tokens
+            report.record(item, "generated", f"{tokens} tokens, {seconds:.1f}s")
+        except Exception as e:
+            report.record(item, "failed", str(e))
+
+
+async def pregenerate(items: List[Item], backend, workers: int, rate: float,
+                      checkpoint: Checkpoint, report: PregenerateReport, force: bool) -> None:
+    limit = asyncio.Semaphore(max(1, workers))
+    bucket = TokenBucket(rate, capacity=max(1, workers))
+    await asyncio.gather(*[
+        pregenerate_one(item, backend, limit, bucket, checkpoint, report, force) for item in items
+    ])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-generate canonical answers into the answer cache")
+    parser.add_argument("path", help="File with one LeetCode URL or title slug per line")
+    parser.add_argument("--levels", nargs="*", default=[],
+                        help="Proficiency levels by name prefix, e.g. beginner advanced (default: all)")
+    parser.add_argument("--questions", nargs="*", choices=sorted(CANONICAL_QUESTIONS), default=[],
+                        help="Canonical questions to answer (default: all)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent generations (default: 4)")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="Generations started per second across all workers (default: 1)")
+    parser.add_argument("--checkpoint", help="Progress file (default: <path>.progress.jsonl)")
+    parser.add_argument("--backend", choices=["gemini", "fake"], default=Config.LLM_BACKEND,
+                        help=f"LLM backend (default: {Config.LLM_BACKEND})")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate every answer, ignoring the cache and starting a fresh checkpoint")
+    args = parser.parse_args(argv)
+
+    if not answer_cache.enabled or answer_cache.store is None:
+        print("The answer cache is disabled or not persistent (ANSWER_CACHE_BACKEND=none), nothing to fill.")
+        return 1
+    try:
+        levels = resolve_levels(args.levels)
+    except ValueError as e:
+        print(e)
+        return 2
+
+    checkpoint = Checkpoint(args.checkpoint or f"{args.path}.progress.jsonl")
+    if args.force:
+        checkpoint.reset()
+    finished = checkpoint.load()
+    kinds = args.questions or list(CANONICAL_QUESTIONS)
+    items = [
+        (slug, level, kind)
+        for slug in read_slugs(args.path)
+        for level in levels
+        for kind in kinds
+        if (slug, level, kind) not in finished
+    ]
+    if finished:
+        print(f"Resuming from {checkpoint.path}: {len(finished)} answers already done")
+
+    report = PregenerateReport(len(items))
+    asyncio.run(pregenerate(items, create_backend(args.backend), args.workers, args.rate,
+                            checkpoint, report, args.force))
+    print(report.summary())
+    return 1 if report.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
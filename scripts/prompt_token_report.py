@@ -0,0 +1,133 @@
+"""
+Report the prompt tokens saved by the compiled static prefix and the
+token-budgeted conversation window.
+
+Builds the prompt for a simulated conversation with the previous inline
+template and with the prompt builder, and prints per-turn and total sizes, the
+part of each new prompt that is a byte-identical (prefix-cacheable) block, and
+the savings. The new prompts use the token-budgeted history window and rolling
+summary, so their size stays bounded as the chat grows. Token counts are the app's usual ~4 characters per token estimate,
+or Gemini's own count with --gemini.
+
+Usage:
+    python -m scripts.prompt_token_report
+    python -m scripts.prompt_token_report --slug two-sum --turns 10 --gemini
+"""
+import argparse
+import sys
+from typing import Callable, Dict, List
+
+from agents.prompts import get_proficiency_guidelines, get_system_prompt
+from components.context_builder import ConversationContextBuilder, new_summary_state
+from components.leetcode_api import LeetCodeQuestion
+from components.prompt_builder import PromptBuilder
+from config.settings import Config
+from scripts.bench_prompt_build import SAMPLE_PAYLOAD
+
+
+def legacy_prompt(user_prompt: str, leetcode_url: str, question: LeetCodeQuestion,
+                  conversation_history: List[Dict], proficiency_level: str) -> str:
+    """The prompt get_gemini_response_stream used to build inline (the context then also repeated the topics)"""
+    system_prompt = get_system_prompt(leetcode_url, proficiency_level)
+    guidelines = get_proficiency_guidelines(proficiency_level)
+    context = "\n".join([
+        f"{msg['role']}: {msg['content']}"
+        for msg in conversation_history[-5:]
+    ])
+    return f"""
+    {system_prompt}
+
+    PROBLEM CONTEXT:
+    {question._render_context()}
+    Related Topics: {', '.join(question.topic_tags)}
+
+    STUDENT INFORMATION:
+    Proficiency Level: {proficiency_level}
+    
+    CONVERSATION HISTORY:
+    {context}
+    
+    CURRENT QUESTION:
+    {user_prompt}
+    
+    RESPONSE GUIDELINES:
+    {guidelines}
+    
+    Additional Instructions:
+    1. Use the problem details provided above to give accurate guidance
+    2. Consider the problem's difficulty ({question.difficulty}) when providing hints
+    3. Reference relevant topics: {', '.join(question.topic_tags)}
+    4. Don't provide direct solutions
+    5. Use code blocks for any code snippets (wrapped in ```)
+    6. Use mathematical notation when needed (wrapped in $ or $$)
+    
+    Your response:
+    """
+
+
+# A typical hint with a code sketch, so long chats exercise the history budget
+ASSISTANT_REPLY = (
+    "Good question! Think about what you need to remember as you scan the array. "
+    "What if you stored each number you've seen along with its index?\n\n"
+    "```python\n" + "\n".join(f"# step {i}: look up target - nums[i]" for i in range(40)) + "\n```\n\n"
+    "What would the time complexity of that lookup be?"
+)
+
+
+def token_counter(use_gemini: bool) -> Callable[[str], int]:
+    if not use_gemini:
+        return lambda text: len(text) // 4
+    from components.llm_backend import create_backend
+    return create_backend("gemini").count_tokens
+
+
+def load_question(slug: str) -> LeetCodeQuestion:
+    if not slug:
+        return LeetCodeQuestion(SAMPLE_PAYLOAD)
+    from components.leetcode_api import fetch_question_by_slug
+    return fetch_question_by_slug(slug)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Report prompt token savings")
+    parser.add_argument("--slug", help="Problem to report on (default: a built-in Two Sum sample)")
+    parser.add_argument("--proficiency", default=Config.DEFAULT_PROFICIENCY, choices=Config.PROFICIENCY_LEVELS)
+    parser.add_argument("--turns", type=int, default=20, help="Simulated chat turns")
+    parser.add_argument("--gemini", action="store_true", help="Count tokens with the Gemini API")
+    args = parser.parse_args(argv)
+
+    count = token_counter(args.gemini)
+    question = load_question(args.slug)
+    slug = args.slug or SAMPLE_PAYLOAD["titleSlug"]
+    url = f"https://leetcode.com/problems/{slug}/"
+    builder = PromptBuilder(max_entries=8)
+    context = ConversationContextBuilder.from_config()
+    summary_state = new_summary_state()
+    prefix_tokens = count(builder.static_prefix(slug, args.proficiency, question))
+
+    history: List[Dict] = []
+    legacy_total = new_total = 0
+    print(f"{'turn':>4} {'legacy':>8} {'new':>8} {'static':>8} {'saved':>7}")
+    for turn in range(1, args.turns + 1):
+        user_prompt = f"Turn {turn}: can you give me another hint about the approach?"
+        legacy = count(legacy_prompt(user_prompt, url, question,
+                                     history + [{"role": "user", "content": user_prompt}], args.proficiency))
+        window = context.build(history, summary_state)
+        summary_state = window.summary_state
+        new = count(builder.build(slug, args.proficiency, question, window.messages, user_prompt,
+                                  summary=window.summary))
+        history.append({"role": "user", "content": user_prompt})
+        legacy_total += legacy
+        new_total += new
+        print(f"{turn:>4} {legacy:>8} {new:>8} {prefix_tokens:>8} {1 - new / legacy:>7.1%}")
+        history.append({"role": "assistant", "content": ASSISTANT_REPLY})
+
+    print(f"\nTotal over {args.turns} turns: legacy {legacy_total}, new {new_total} "
+          f"({legacy_total - new_total} tokens, {1 - new_total / legacy_total:.1%} saved)")
+    print(f"Byte-identical static prefix: {prefix_tokens} tokens per turn "
+          f"({prefix_tokens * args.turns / new_total:.0%} of new prompt tokens are prefix-cacheable)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Modules build their global instances from the environment on import
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("PROBLEM_CACHE_BACKEND", "none")
+os.environ.setdefault("ANSWER_CACHE_BACKEND", "none")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
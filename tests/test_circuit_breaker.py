@@ -0,0 +1,67 @@
+import time
+
+from utils.circuit_breaker import CircuitBreaker
+
+
+def tripped(reset_timeout=30.0):
+    breaker = CircuitBreaker("test.breaker", failure_threshold=2, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("test.breaker", failure_threshold=3)
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("test.breaker", failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_lets_one_trial_through_once_the_reset_timeout_passes():
+    breaker = tripped(reset_timeout=0.05)
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # Only one trial at a time
+
+
+def test_successful_trial_closes_the_circuit():
+    breaker = tripped(reset_timeout=0.05)
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = tripped(reset_timeout=0.05)
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_abandoned_trial_frees_the_slot_without_closing():
+    breaker = tripped(reset_timeout=0.05)
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.abandon()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
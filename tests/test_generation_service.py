@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from components.generation_service import GenerationRejected, GenerationService
+from components.llm_backend import TextChunk
+
+
+class Reply:
+    """Model response streaming a single chunk"""
+
+    def __init__(self, text):
+        self.text = text
+
+    async def __aiter__(self):
+        yield TextChunk(self.text)
+
+
+class GatedJobs:
+    """Generations that record when they start and finish only once released"""
+
+    def __init__(self):
+        self.started = []
+        self._gates = {}
+
+    def start_fn(self, name):
+        gate = self._gates[name] = threading.Event()
+
+        async def start():
+            self.started.append(name)
+            while not gate.is_set():
+                await asyncio.sleep(0.01)
+            return Reply(name)
+
+        return start
+
+    def release(self, name):
+        self._gates[name].set()
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def read(stream):
+    return "".join(chunk.text for chunk in stream)
+
+
+def test_user_never_runs_more_than_their_share():
+    service = GenerationService(max_concurrency=4, max_per_user=1, max_queue=10)
+    jobs = GatedJobs()
+    first = service.submit("alice", jobs.start_fn("alice-1"))
+    second = service.submit("alice", jobs.start_fn("alice-2"))
+    other = service.submit("bob", jobs.start_fn("bob-1"))
+
+    # Free slots remain, but alice's second request waits for her first
+    assert wait_for(lambda: sorted(jobs.started) == ["alice-1", "bob-1"])
+    time.sleep(0.1)
+    assert not second.started
+
+    jobs.release("alice-1")
+    assert read(first) == "alice-1"
+    assert wait_for(lambda: second.started)
+
+    jobs.release("alice-2")
+    jobs.release("bob-1")
+    assert read(second) == "alice-2"
+    assert read(other) == "bob-1"
+
+
+def test_per_user_cap_above_one():
+    service = GenerationService(max_concurrency=4, max_per_user=2, max_queue=10)
+    jobs = GatedJobs()
+    streams = [service.submit("alice", jobs.start_fn(f"alice-{i}")) for i in range(3)]
+
+    assert wait_for(lambda: len(jobs.started) == 2)
+    time.sleep(0.1)
+    assert jobs.started == ["alice-0", "alice-1"]
+
+    for i in range(3):
+        jobs.release(f"alice-{i}")
+    assert [read(stream) for stream in streams] == ["alice-0", "alice-1", "alice-2"]
+
+
+def test_least_recently_served_user_goes_first():
+    service = GenerationService(max_concurrency=1, max_per_user=1, max_queue=10)
+    jobs = GatedJobs()
+    streams = [service.submit("alice", jobs.start_fn("alice-1"))]
+    assert wait_for(lambda: jobs.started == ["alice-1"])
+
+    # alice queues a burst before bob and carol ask once each
+    for name in ("alice-2", "alice-3", "bob-1", "carol-1"):
+        streams.append(service.submit(name.split("-")[0], jobs.start_fn(name)))
+
+    for name in ("alice-1", "bob-1", "carol-1", "alice-2", "alice-3"):
+        assert wait_for(lambda: jobs.started[-1:] == [name])
+        jobs.release(name)
+
+    assert jobs.started == ["alice-1", "bob-1", "carol-1", "alice-2", "alice-3"]
+    assert sorted(read(stream) for stream in streams) == sorted(jobs.started)
+
+
+def test_full_queue_rejects_new_requests():
+    service = GenerationService(max_concurrency=1, max_per_user=1, max_queue=2)
+    jobs = GatedJobs()
+    running = service.submit("alice", jobs.start_fn("alice-1"))
+    assert wait_for(lambda: running.started)
+    queued = service.submit("bob", jobs.start_fn("bob-1"))
+    service.submit("carol", jobs.start_fn("carol-1"))
+    rejected = service.rejected.value
+
+    with pytest.raises(GenerationRejected):
+        service.submit("dave", jobs.start_fn("dave-1"))
+    assert service.rejected.value == rejected + 1
+
+    # Cancelling a queued request frees its place
+    queued.cancel()
+    assert wait_for(lambda: service.stats()["queue_depth"] == 1)
+    later = service.submit("dave", jobs.start_fn("dave-1"))
+
+    for name in ("alice-1", "carol-1", "dave-1"):
+        jobs.release(name)
+    assert read(running) == "alice-1"
+    assert read(later) == "dave-1"
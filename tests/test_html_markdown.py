@@ -0,0 +1,62 @@
+import re
+
+from scripts.bench_html_markdown import SAMPLE_HTML, legacy_leetcode_question
+from utils.html_markdown import html_to_markdown
+
+
+def words(text):
+    """Reduce converter output to its words, ignoring markdown markup and layout"""
+    text = re.sub(r"```|`|\^|^\s*(- |\d+\. )", "", text, flags=re.MULTILINE)
+    return text.replace("\xa0", " ").split()
+
+
+def test_sample_problem_keeps_the_legacy_text_images_and_table():
+    legacy_text, legacy_images = legacy_leetcode_question(SAMPLE_HTML)
+    result = html_to_markdown(SAMPLE_HTML)
+
+    # Superscripts are now marked (10^4); the legacy parser ran them together (104)
+    assert words(result.text) == words(legacy_text)
+    assert result.images == legacy_images
+    assert len(result.tables) == 1
+    assert result.tables[0] in legacy_text
+    assert result.tables[0] in result.text
+
+
+def test_sample_problem_markdown():
+    text = html_to_markdown(SAMPLE_HTML).text
+
+    assert text.startswith("Given an array of integers `nums` and an integer `target`, return indices")
+    assert "```\nInput: nums = [2,7,11,15], target = 9\nOutput: [0,1]\n" in text
+    assert "Example 2:\n\n[Image 1]\n\n```\nInput: nums = [3,2,4], target = 6" in text
+    assert "- `2 <= nums.length <= 10^4`\n- `-10^9 <= nums[i] <= 10^9`\n- Only one valid answer exists." in text
+    assert text.endswith("less than `O(n^2)` time complexity?")
+    assert "\n\n\n" not in text
+
+
+def test_ordered_and_nested_lists():
+    html = "<ol><li>First</li><li>Second<ul><li>Detail</li></ul></li></ol><p>After</p>"
+    assert html_to_markdown(html).text == "1. First\n2. Second\n  - Detail\n\nAfter"
+
+
+def test_pre_keeps_whitespace_and_skips_inline_code_marks():
+    html = "<pre>\n<code>for i in range(n):\n    total += i</code>\n</pre>"
+    assert html_to_markdown(html).text == "```\nfor i in range(n):\n    total += i\n```"
+
+
+def test_table_cells_are_escaped_and_padded():
+    html = "<table><tr><th>a|b</th><th>c</th></tr><tr><td>1</td></tr></table>"
+    result = html_to_markdown(html)
+    assert result.tables == ["| a\\|b | c |\n| --- | --- |\n| 1 |  |"]
+    assert result.text == result.tables[0]
+
+
+def test_images_without_a_source_are_dropped():
+    html = '<p>See <img alt="none" /> and <img src="https://example.com/a.png" alt="tree" /></p>'
+    result = html_to_markdown(html)
+    assert result.text.split() == ["See", "and", "[Image", "1]"]
+    assert result.images == [{"src": "https://example.com/a.png", "alt": "tree"}]
+
+
+def test_empty_input():
+    assert html_to_markdown(None) == ("", [], [])
+    assert html_to_markdown("") == ("", [], [])
@@ -0,0 +1,182 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from components import problem_sources
+from components.problem_sources import GraphQLSource, MirrorSource, ProblemFetchError, ProblemSourceCoordinator
+from utils.http_client import HttpClient
+
+MIRROR_BODY = {
+    "questionId": "1",
+    "questionTitle": "Two Sum",
+    "titleSlug": "two-sum",
+    "difficulty": "Easy",
+    "question": "<p>Find two numbers that add up to target.</p>",
+}
+GRAPHQL_BODY = {"data": {"question": {
+    "questionId": "1",
+    "title": "Two Sum",
+    "titleSlug": "two-sum",
+    "difficulty": "Easy",
+    "content": "<p>Find two numbers that add up to target.</p>",
+}}}
+
+
+class StubServer:
+    """Local HTTP server answering every request with `respond(stub, handler)`"""
+
+    def __init__(self, respond):
+        self.requests = 0
+        self.chunks_sent = 0
+        self.disconnected = threading.Event()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests += 1
+                respond(stub, self)
+
+            do_POST = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def send_json(handler, body, status=200):
+    data = json.dumps(body).encode()
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Content-Length", str(len(data)))
+    handler.end_headers()
+    handler.wfile.write(data)
+
+
+def trickle(stub, handler, chunks=50, interval=0.05):
+    """Stream a long body slowly, noting when the client hangs up"""
+    handler.send_response(200)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Transfer-Encoding", "chunked")
+    handler.end_headers()
+    try:
+        for _ in range(chunks):
+            handler.wfile.write(b"1\r\n \r\n")
+            handler.wfile.flush()
+            stub.chunks_sent += 1
+            time.sleep(interval)
+        handler.wfile.write(b"0\r\n\r\n")
+    except OSError:
+        stub.disconnected.set()
+    handler.close_connection = True
+
+
+def unavailable(stub, handler):
+    handler.send_response(503)
+    handler.send_header("Content-Length", "0")
+    handler.end_headers()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """A fresh HTTP client with slow retries, so losers would linger if not cancelled"""
+    http = HttpClient(max_retries=3, backoff_base=2.0, backoff_max=2.0)
+    monkeypatch.setattr(problem_sources, "http_client", http)
+    return http
+
+
+def coordinator(mirror, graphql, hedge_delay=0.1, timeout=5.0):
+    return ProblemSourceCoordinator(
+        [MirrorSource(mirror.url), GraphQLSource(f"{graphql.url}/graphql")],
+        hedge_delay, timeout, hedge_timeout=(1.0, 1.0)
+    )
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_hedge_wins_and_slow_primary_is_cancelled(client):
+    mirror = StubServer(trickle)
+    graphql = StubServer(lambda stub, handler: send_json(handler, GRAPHQL_BODY))
+    try:
+        sources = coordinator(mirror, graphql)
+        hedges = sources.hedges.value
+        cancelled = sources._cancelled["mirror"].value
+
+        started = time.monotonic()
+        payload = sources.fetch("two-sum")
+
+        assert payload["questionTitle"] == "Two Sum"
+        assert time.monotonic() - started < 1.0
+        assert sources.hedges.value == hedges + 1
+        # The primary stops reading at its next chunk instead of draining the body
+        assert wait_for(lambda: sources._cancelled["mirror"].value == cancelled + 1)
+        assert wait_for(mirror.disconnected.is_set)
+        assert mirror.chunks_sent < 50
+    finally:
+        mirror.close()
+        graphql.close()
+
+
+def test_cancelled_primary_is_not_retried(client):
+    mirror = StubServer(unavailable)
+    graphql = StubServer(lambda stub, handler: send_json(handler, GRAPHQL_BODY))
+    try:
+        client._backoff = lambda attempt: 0.5
+        sources = coordinator(mirror, graphql)
+        cancelled = sources._cancelled["mirror"].value
+
+        # The mirror's 503 would be retried after 0.5s; the hedge answers first
+        payload = sources.fetch("two-sum")
+
+        assert payload["questionTitle"] == "Two Sum"
+        assert wait_for(lambda: sources._cancelled["mirror"].value == cancelled + 1, timeout=0.4)
+        time.sleep(0.5)
+        assert mirror.requests == 1
+    finally:
+        mirror.close()
+        graphql.close()
+
+
+def test_primary_answer_skips_the_hedge(client):
+    mirror = StubServer(lambda stub, handler: send_json(handler, MIRROR_BODY))
+    graphql = StubServer(lambda stub, handler: send_json(handler, GRAPHQL_BODY))
+    try:
+        sources = coordinator(mirror, graphql, hedge_delay=1.0)
+        payload = sources.fetch("two-sum")
+
+        assert payload["questionTitle"] == "Two Sum"
+        assert graphql.requests == 0
+    finally:
+        mirror.close()
+        graphql.close()
+
+
+def test_fails_when_every_source_fails(client):
+    client.max_retries = 0
+    mirror = StubServer(unavailable)
+    graphql = StubServer(unavailable)
+    try:
+        with pytest.raises(ProblemFetchError):
+            coordinator(mirror, graphql).fetch("two-sum")
+    finally:
+        mirror.close()
+        graphql.close()
@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+
+from components.key_pool import KeyPool, QuotaExhausted
+from components.llm_backend import (
+    BackendStream, FakeBackend, FakeBackendError, GenerationTimeout, GenerationUnavailable, ResilientBackend,
+    TextChunk
+)
+from utils.circuit_breaker import CircuitBreaker
+
+
+class FlakyBackend(FakeBackend):
+    """Fake backend whose first `failures` requests fail before streaming"""
+
+    def __init__(self, failures: int, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.opened = 0
+
+    async def _open(self, key, prompt, generation_config):
+        self.opened += 1
+        if self.opened <= self.failures:
+            raise FakeBackendError("Injected failure before the first chunk")
+        return await super()._open(key, prompt, generation_config)
+
+
+class BrokenStreamBackend(FakeBackend):
+    """Fake backend whose answers break off after the first chunk"""
+
+    opened = 0
+
+    async def _open(self, key, prompt, generation_config):
+        self.opened += 1
+
+        class Stream(BackendStream):
+            usage_metadata = None
+
+            async def __aiter__(self):
+                yield TextChunk("Partial answer")
+                raise FakeBackendError("Injected failure after 1 chunk")
+
+        return Stream()
+
+
+class SlowKeyPool(KeyPool):
+    """Key pool that makes every request wait locally before it gets a key"""
+
+    def __init__(self, wait_seconds: float, **kwargs):
+        super().__init__(["fake"], tokens_per_minute=0, **kwargs)
+        self.wait_seconds = wait_seconds
+
+    async def acquire(self, estimated_tokens):
+        await asyncio.sleep(self.wait_seconds)
+        return await super().acquire(estimated_tokens)
+
+
+def resilient(backend, **kwargs):
+    options = dict(ttft_timeout=0.2, total_timeout=5.0, max_retries=2, backoff_base=0.01, backoff_max=0.01,
+                   breaker=CircuitBreaker("test.llm", failure_threshold=3, reset_timeout=60.0))
+    options.update(kwargs)
+    return ResilientBackend(backend, **options)
+
+
+async def answer(backend, prompt="How should I start?"):
+    stream = await backend.stream(prompt)
+    return "".join([chunk.text async for chunk in stream])
+
+
+def fast_fake(**kwargs):
+    return FakeBackend(ttft_seconds=0.01, chunk_interval_seconds=0.0, response_chars=200, **kwargs)
+
+
+def test_streams_the_whole_answer():
+    fake = fast_fake()
+    backend = resilient(fake)
+    assert asyncio.run(answer(backend)) == fake.answer_for("How should I start?")
+    assert backend.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_slow_first_chunk_times_out_and_is_retried():
+    backend = resilient(FakeBackend(ttft_seconds=1.0), max_retries=1)
+    failures, retries, timeouts = backend.failures.value, backend.retries.value, backend.ttft_timeouts.value
+
+    with pytest.raises(GenerationTimeout):
+        asyncio.run(answer(backend))
+
+    assert backend.ttft_timeouts.value == timeouts + 2
+    assert backend.failures.value == failures + 2
+    assert backend.retries.value == retries + 1
+
+
+def test_transient_failure_is_retried_until_it_succeeds():
+    fake = FlakyBackend(failures=2, ttft_seconds=0.01, chunk_interval_seconds=0.0, response_chars=200)
+    backend = resilient(fake)
+    retries = backend.retries.value
+
+    assert asyncio.run(answer(backend)) == fake.answer_for("How should I start?")
+    assert fake.opened == 3
+    assert backend.retries.value == retries + 2
+    assert backend.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_repeated_failures_open_the_circuit_and_fail_fast():
+    fake = FlakyBackend(failures=100, ttft_seconds=0.01)
+    backend = resilient(fake)
+
+    with pytest.raises(FakeBackendError):
+        asyncio.run(answer(backend))
+    assert backend.breaker.state == CircuitBreaker.OPEN
+    assert not backend.is_available()
+
+    opened = fake.opened
+    with pytest.raises(GenerationUnavailable):
+        asyncio.run(answer(backend))
+    assert fake.opened == opened
+
+
+def test_failure_after_the_first_chunk_is_not_retried():
+    fake = BrokenStreamBackend(ttft_seconds=0.01)
+    backend = resilient(fake)
+    retries = backend.retries.value
+    received = []
+
+    async def consume():
+        stream = await backend.stream("How should I start?")
+        async for chunk in stream:
+            received.append(chunk.text)
+
+    with pytest.raises(FakeBackendError):
+        asyncio.run(consume())
+    assert received == ["Partial answer"]
+    assert fake.opened == 1
+    assert backend.retries.value == retries
+
+
+def test_waiting_for_a_key_does_not_count_against_the_first_chunk_deadline():
+    fake = FakeBackend(ttft_seconds=0.05, chunk_interval_seconds=0.0, response_chars=200,
+                       key_pool=SlowKeyPool(wait_seconds=0.4))
+    backend = resilient(fake, ttft_timeout=0.2)
+    timeouts = backend.ttft_timeouts.value
+
+    assert asyncio.run(answer(backend)) == fake.answer_for("How should I start?")
+    assert backend.ttft_timeouts.value == timeouts
+
+
+def test_running_out_of_local_quota_is_not_an_upstream_failure():
+    pool = KeyPool(["fake"], requests_per_minute=1, tokens_per_minute=0, max_wait_seconds=0.3)
+    backend = resilient(fast_fake(key_pool=pool), ttft_timeout=0.1)
+    failures, retries = backend.failures.value, backend.retries.value
+
+    asyncio.run(answer(backend))
+    with pytest.raises(QuotaExhausted):
+        asyncio.run(answer(backend))
+
+    assert backend.failures.value == failures
+    assert backend.retries.value == retries
+    assert backend.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_key_wait_past_the_total_deadline_is_quota_exhausted():
+    pool = KeyPool(["fake"], requests_per_minute=1, tokens_per_minute=0, max_wait_seconds=30.0)
+    backend = resilient(fast_fake(key_pool=pool), total_timeout=0.5)
+    failures = backend.failures.value
+
+    asyncio.run(answer(backend))
+    with pytest.raises(QuotaExhausted):
+        asyncio.run(answer(backend))
+
+    assert backend.failures.value == failures
+    assert backend.breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def run_concurrently(flight, key, fn, callers=5):
+    """Call `flight.do` from several threads that all start while `fn` is running"""
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        futures = [pool.submit(flight.do, key, fn) for _ in range(callers)]
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test.shared")
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "payload"
+
+    threading.Timer(0.2, release.set).start()
+    results = run_concurrently(flight, "two-sum", work)
+
+    assert results == ["payload"] * 5
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_error_reaches_every_waiting_caller():
+    flight = SingleFlight("test.error")
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    threading.Timer(0.2, release.set).start()
+    results = run_concurrently(flight, "two-sum", work)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_key_is_released_once_the_call_finishes():
+    flight = SingleFlight("test.release")
+    calls = []
+
+    def work():
+        calls.append(1)
+        return len(calls)
+
+    assert flight.do("two-sum", work) == 1
+    assert flight.do("two-sum", work) == 2
+
+    with pytest.raises(ValueError):
+        flight.do("two-sum", lambda: int("x"))
+    assert flight.do("two-sum", work) == 3
+
+
+def test_different_keys_run_independently():
+    flight = SingleFlight("test.keys")
+    assert flight.do("two-sum", lambda: "a") == "a"
+    assert flight.do("add-two-numbers", lambda: "b") == "b"
@@ -1,3 +1,4 @@
 from .cache import cache_data
+from .html_markdown import html_to_markdown
 from .leetcode_parser import extract_text_from_html
-from .validators import is_valid_leetcode_url
+from .validators import extract_title_slug, is_valid_leetcode_url
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from utils.metrics import metrics
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for a single upstream.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are rejected for `reset_timeout` seconds. A single trial call is then let
+    through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    _STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._state_gauge = metrics.gauge(
+            f"circuit.{name}.state", "0 = closed, 1 = half open, 2 = open"
+        )
+        self._opened = metrics.counter(f"circuit.{name}.opened", "Times the circuit tripped open")
+        self._rejected = metrics.counter(f"circuit.{name}.rejected", "Calls failed fast while open")
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        self._state_gauge.set(self._STATE_VALUES[state])
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go through right now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._rejected.inc()
+                    return False
+                self._set_state(self.HALF_OPEN)
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                self._rejected.inc()
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            if self._state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def abandon(self) -> None:
+        """Release a half-open trial whose outcome says nothing about the upstream"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._opened.inc()
+                self._set_state(self.OPEN)
+                self._opened_at = time.monotonic()
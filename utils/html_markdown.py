@@ -0,0 +1,187 @@
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, NamedTuple
+
+_WHITESPACE = re.compile(r"\s+")
+_EXTRA_NEWLINES = re.compile(r"\n{3,}")
+_BLOCK_TAGS = {"p", "div", "section", "blockquote", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+class MarkdownResult(NamedTuple):
+    """Output of `html_to_markdown`"""
+    text: str
+    images: List[Dict[str, str]]
+    tables: List[str]
+
+
+class _MarkdownConverter(HTMLParser):
+    """Single-pass, streaming HTML to markdown converter (no parse tree is built)"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.images = []
+        self.tables = []
+        self._line_start = True
+        self._pre_depth = 0
+        self._pre_start = False  # a newline right after <pre> is not content
+        self._lists = []  # stack of [ordered, next_number]
+        self._rows = None  # cell texts of the table being read, row by row
+        self._cell = None  # text fragments of the table cell being read
+
+    # Output helpers
+
+    def _emit(self, text: str) -> None:
+        if not text:
+            return
+        if self._cell is not None:
+            self._cell.append(text)
+            return
+        if self._rows is not None:
+            return  # whitespace between table tags
+        self.out.append(text)
+        self._line_start = text.endswith("\n")
+
+    def _newline(self) -> None:
+        if self._cell is not None:
+            self._cell.append(" ")
+        elif not self._line_start:
+            self._emit("\n")
+
+    def _block_break(self) -> None:
+        if self._lists:
+            self._newline()
+        else:
+            self._newline()
+            self._emit("\n")
+
+    # Tokenizer callbacks
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "img":
+            attributes = dict(attrs)
+            src = attributes.get("src") or ""
+            if src:
+                self.images.append({"src": src, "alt": attributes.get("alt") or ""})
+                self._emit(f"[Image {len(self.images)}]")
+        elif tag == "br":
+            if self._pre_depth:
+                self._emit("\n")
+            else:
+                self._newline()
+        elif tag == "pre":
+            self._block_break()
+            self._emit("```\n")
+            self._pre_depth += 1
+            self._pre_start = True
+        elif tag == "code":
+            if not self._pre_depth:
+                self._emit("`")
+        elif tag == "sup":
+            self._emit("^")
+        elif tag == "sub":
+            self._emit("_")
+        elif tag in ("ul", "ol"):
+            self._newline()
+            self._lists.append([tag == "ol", 1])
+        elif tag == "li":
+            self._newline()
+            indent = "  " * max(0, len(self._lists) - 1)
+            if self._lists and self._lists[-1][0]:
+                marker = f"{self._lists[-1][1]}. "
+                self._lists[-1][1] += 1
+            else:
+                marker = "- "
+            self._emit(indent + marker)
+        elif tag == "table":
+            self._block_break()
+            self._rows = []
+        elif tag == "tr" and self._rows is not None:
+            self._rows.append([])
+        elif tag in ("th", "td") and self._rows is not None:
+            if not self._rows:
+                self._rows.append([])
+            self._cell = []
+        elif tag in _BLOCK_TAGS:
+            self._block_break()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "pre":
+            if self._pre_depth:
+                self._pre_depth -= 1
+                self._newline()
+                self._emit("```\n")
+                self._block_break()
+        elif tag == "code":
+            if not self._pre_depth:
+                self._emit("`")
+        elif tag in ("ul", "ol"):
+            if self._lists:
+                self._lists.pop()
+            self._block_break()
+        elif tag in ("th", "td") and self._cell is not None:
+            text = _WHITESPACE.sub(" ", "".join(self._cell)).strip().replace("|", "\\|")
+            self._rows[-1].append(text)
+            self._cell = None
+        elif tag == "table" and self._rows is not None:
+            rows = [row for row in self._rows if row]
+            self._rows = None
+            if rows:
+                table = self._render_table(rows)
+                self.tables.append(table)
+                self._emit(table)
+            self._block_break()
+        elif tag in _BLOCK_TAGS:
+            self._block_break()
+
+    def handle_data(self, data):
+        if self._pre_depth:
+            if self._pre_start and data.startswith("\n"):
+                data = data[1:]
+            self._pre_start = False
+            self._emit(data.replace("\xa0", " "))
+            return
+        text = _WHITESPACE.sub(" ", data)
+        if self._line_start and self._cell is None:
+            text = text.lstrip()
+        self._emit(text)
+
+    @staticmethod
+    def _render_table(rows: List[List[str]]) -> str:
+        width = max(len(row) for row in rows)
+
+        def render_row(cells):
+            return "| " + " | ".join(cells + [""] * (width - len(cells))) + " |"
+
+        lines = [render_row(rows[0]), "| " + " | ".join(["---"] * width) + " |"]
+        lines.extend(render_row(row) for row in rows[1:])
+        return "\n".join(lines)
+
+    def result(self) -> MarkdownResult:
+        text = "\n".join(line.rstrip() for line in "".join(self.out).split("\n"))
+        text = _EXTRA_NEWLINES.sub("\n\n", text).strip()
+        return MarkdownResult(text, self.images, self.tables)
+
+
+def html_to_markdown(html_content: str) -> MarkdownResult:
+    """
+    Convert LeetCode problem HTML to markdown in a single streaming pass.
+
+    Inline code, `pre` blocks (as fenced code), ordered/unordered and nested
+    lists, tables, `sup`/`sub` and images are handled. Images are replaced by
+    `[Image N]` placeholders and returned separately so callers can render
+    them where the placeholder appears.
+
+    Args:
+        html_content (str): Problem description HTML.
+
+    Returns:
+        MarkdownResult: The markdown text, the images and the markdown tables.
+    """
+    converter = _MarkdownConverter()
+    converter.feed(html_content or "")
+    converter.close()
+    return converter.result()
@@ -0,0 +1,204 @@
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import Config
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import metrics
+
+
+class UpstreamUnavailable(requests.exceptions.ConnectionError):
+    """Raised without touching the network while an upstream's circuit is open"""
+
+
+class RequestCancelled(Exception):
+    """Raised instead of sending or retrying a request whose caller no longer needs it"""
+
+
+class _Upstream:
+    """Pooled session, circuit breaker and metrics for a single host"""
+
+    def __init__(self, host: str, pool_size: int, failure_threshold: int, reset_timeout: float):
+        self.host = host
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.breaker = CircuitBreaker(f"http.{host}", failure_threshold, reset_timeout)
+        self.requests = metrics.counter(f"http.{host}.requests", "Attempts sent to the upstream")
+        self.retries = metrics.counter(f"http.{host}.retries", "Attempts that were retried")
+        self.failures = metrics.counter(f"http.{host}.failures", "5xx responses and connection errors")
+        self.in_flight = metrics.gauge(f"http.{host}.in_flight", "Requests currently waiting on the upstream")
+        self.utilization = metrics.gauge(f"http.{host}.pool_utilization", "in_flight / pool size")
+        self.latency = metrics.histogram(f"http.{host}.latency_seconds")
+        metrics.gauge(f"http.{host}.pool_size").set(pool_size)
+
+    def acquire(self) -> None:
+        self.in_flight.inc()
+        self.utilization.set(self.in_flight.value / self.pool_size)
+
+    def release(self) -> None:
+        self.in_flight.dec()
+        self.utilization.set(self.in_flight.value / self.pool_size)
+
+
+class HttpClient:
+    """
+    Shared, thread-safe HTTP client for all outbound fetches.
+
+    Each upstream host gets its own keep-alive connection pool and circuit
+    breaker. 5xx responses and connection errors are retried with jittered
+    exponential backoff; every request carries a connect/read timeout.
+    """
+
+    def __init__(self, connect_timeout: float = 5.0, read_timeout: float = 75.0,
+                 max_retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 default_pool_size: int = 10, pool_sizes: Optional[Dict[str, int]] = None,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.default_pool_size = default_pool_size
+        self.pool_sizes = pool_sizes or {}
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._upstreams = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "HttpClient":
+        """Build the client described by the HTTP_* settings"""
+        pool_sizes = {}
+        for entry in Config.HTTP_POOL_SIZES.split(","):
+            host, _, size = entry.partition("=")
+            if host.strip() and size.strip().isdigit():
+                pool_sizes[host.strip()] = int(size)
+
+        return cls(
+            connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+            read_timeout=Config.HTTP_READ_TIMEOUT,
+            max_retries=Config.HTTP_MAX_RETRIES,
+            backoff_base=Config.HTTP_BACKOFF_BASE,
+            backoff_max=Config.HTTP_BACKOFF_MAX,
+            default_pool_size=Config.HTTP_POOL_MAXSIZE,
+            pool_sizes=pool_sizes,
+            failure_threshold=Config.HTTP_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=Config.HTTP_CIRCUIT_RESET_SECONDS
+        )
+
+    def _upstream(self, url: str) -> _Upstream:
+        host = urlsplit(url).netloc
+        with self._lock:
+            upstream = self._upstreams.get(host)
+            if upstream is None:
+                upstream = _Upstream(
+                    host,
+                    self.pool_sizes.get(host, self.default_pool_size),
+                    self.failure_threshold,
+                    self.reset_timeout
+                )
+                self._upstreams[host] = upstream
+            return upstream
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, cancel_event: Optional[threading.Event] = None,
+                **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session for the URL's host
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            cancel_event: Once set, no further attempt is sent and backoff
+                waits are cut short
+            **kwargs: Passed to `requests.Session.request`
+
+        Returns:
+            The response. Non-retryable and final 5xx responses are returned
+            as-is so that callers can keep using `raise_for_status()`.
+
+        Raises:
+            UpstreamUnavailable: If the upstream's circuit is open
+            RequestCancelled: If `cancel_event` was set before an attempt
+            requests.exceptions.RequestException: On the final connection error
+        """
+        upstream = self._upstream(url)
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+
+        for attempt in range(self.max_retries + 1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise RequestCancelled(f"Request to {upstream.host} cancelled")
+            if not upstream.breaker.allow_request():
+                raise UpstreamUnavailable(f"Circuit open for {upstream.host}, failing fast")
+
+            upstream.requests.inc()
+            upstream.acquire()
+            started = time.perf_counter()
+            response, error = None, None
+            try:
+                response = upstream.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            except Exception:
+                upstream.breaker.abandon()
+                raise
+            finally:
+                upstream.release()
+                upstream.latency.observe(time.perf_counter() - started)
+
+            if response is not None and response.status_code < 500:
+                upstream.breaker.record_success()
+                return response
+
+            upstream.failures.inc()
+            upstream.breaker.record_failure()
+            if attempt == self.max_retries:
+                if response is not None:
+                    return response
+                raise error
+
+            if response is not None:
+                response.close()
+            upstream.retries.inc()
+            if cancel_event is not None:
+                cancel_event.wait(self._backoff(attempt))
+            else:
+                time.sleep(self._backoff(attempt))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Get pool utilization, retry counts and breaker state per upstream"""
+        with self._lock:
+            upstreams = list(self._upstreams.values())
+        return {
+            upstream.host: {
+                "pool_size": upstream.pool_size,
+                "in_flight": upstream.in_flight.value,
+                "pool_utilization": upstream.utilization.value,
+                "requests": upstream.requests.value,
+                "retries": upstream.retries.value,
+                "failures": upstream.failures.value,
+                "circuit_state": upstream.breaker.state,
+            }
+            for upstream in upstreams
+        }
+
+
+# Global HTTP client shared by every outbound fetch
+http_client = HttpClient.from_config()
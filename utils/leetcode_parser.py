@@ -1,6 +1,4 @@
-import re
-
-from bs4 import BeautifulSoup
+from .html_markdown import html_to_markdown
 
 
 def extract_text_from_html(html_content: str) -> str:
@@ -13,19 +11,4 @@ def extract_text_from_html(html_content: str) -> str:
     Returns:
         str: The text content extracted from the HTML, cleaned up.
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-
-    parts = []
-    for element in soup.recursiveChildGenerator():
-        if isinstance(element, str):
-            parts.append(element.strip())
-        elif element.name in ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li']:
-            parts.append(element.get_text(separator=" ", strip=True))
-        elif element.name == 'code': # Handle <code> tags specifically
-            parts.append(f"```{element.get_text(strip=True)}```")  # Use markdown-like fences
-
-    text = "\n".join(filter(None, parts))  # Join with newlines, removing empty strings
-    text = re.sub(r'\n{3,}', '\n\n', text) # Reduce multiple newlines to two
-    text = re.sub(r' +', ' ', text)     # Reduce multiple spaces to single space
-
-    return text.strip()
\ No newline at end of file
+    return html_to_markdown(html_content).text
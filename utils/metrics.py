@@ -0,0 +1,179 @@
+import threading
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Optional, Sequence
+
+
+def _percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (0-100) of an already sorted sequence"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class Counter:
+    """Monotonic counter that can be incremented from any thread"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase the counter by the given amount"""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> Dict[str, float]:
+        return {"type": "counter", "value": self._value}
+
+
+class Gauge:
+    """Value that can go up and down, e.g. entries currently stored"""
+
+    def __init__(self, name: str, description: str = ""):
+        self.name = name
+        self.description = description
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> Dict[str, float]:
+        return {"type": "gauge", "value": self._value}
+
+
+class Histogram:
+    """
+    Bucketed distribution of observed values (typically latencies in seconds).
+
+    Cumulative bucket counts are kept for the whole process lifetime, while
+    percentiles are computed over a rolling window of the latest observations.
+    """
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, name: str, description: str = "",
+                 buckets: Optional[Sequence[float]] = None, window: int = 1024):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+        self._bucket_counts = [0] * (len(self.buckets) + 1)
+        self._window = deque(maxlen=window)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record a single observation"""
+        with self._lock:
+            self._bucket_counts[bisect_left(self.buckets, value)] += 1
+            self._window.append(value)
+            self._count += 1
+            self._sum += value
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-th percentile (0-100) of the rolling window"""
+        with self._lock:
+            values = sorted(self._window)
+        return _percentile(values, q)
+
+    def snapshot(self) -> Dict[str, any]:
+        with self._lock:
+            values = sorted(self._window)
+            bucket_counts = list(self._bucket_counts)
+            count, total = self._count, self._sum
+
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(list(self.buckets) + [float("inf")], bucket_counts):
+            cumulative += bucket_count
+            buckets[bound] = cumulative
+
+        return {
+            "type": "histogram",
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else None,
+            "p50": _percentile(values, 50),
+            "p90": _percentile(values, 90),
+            "p99": _percentile(values, 99),
+            "max": values[-1] if values else None,
+            "buckets": buckets,
+        }
+
+
+class MetricsRegistry:
+    """Process-wide registry of named metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_cls, name: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_cls(name, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_cls):
+                raise TypeError(f"Metric '{name}' is already registered as {type(metric).__name__}")
+            return metric
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        """Get or create a counter"""
+        return self._get_or_create(Counter, name, description=description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        """Get or create a gauge"""
+        return self._get_or_create(Gauge, name, description=description)
+
+    def histogram(self, name: str, description: str = "",
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        """Get or create a histogram"""
+        return self._get_or_create(Histogram, name, description=description, buckets=buckets)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, Dict]:
+        """
+        Return the current value of every metric
+
+        Args:
+            prefix: Only include metrics whose name starts with this prefix
+
+        Returns:
+            Dictionary mapping metric name to its snapshot
+        """
+        with self._lock:
+            metrics = list(self._metrics.items())
+        return {
+            name: metric.snapshot()
+            for name, metric in sorted(metrics)
+            if name.startswith(prefix)
+        }
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
@@ -0,0 +1,372 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from config.settings import Config
+from utils.metrics import metrics
+
+
+class SQLiteProblemStore:
+    """On-disk problem store shared by every process on the host"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            # WAL lets several Streamlit workers read while one of them writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS problems (
+                    slug TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_problems_last_access ON problems (last_access)"
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS leases (
+                    slug TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+
+    def get(self, slug: str) -> Optional[Tuple[Dict, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, fetched_at FROM problems WHERE slug = ?", (slug,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def put(self, slug: str, payload: Dict, fetched_at: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO problems (slug, payload, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (slug, json.dumps(payload), fetched_at, fetched_at)
+            )
+
+    def touch(self, slug: str, accessed_at: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE problems SET last_access = ? WHERE slug = ?", (accessed_at, slug)
+            )
+
+    def delete(self, slug: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM problems WHERE slug = ?", (slug,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM problems").fetchone()[0]
+
+    def evict(self, max_entries: int) -> int:
+        """Delete least recently used entries beyond max_entries"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM problems WHERE slug IN ("
+                "SELECT slug FROM problems ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (max_entries,)
+            )
+            return cursor.rowcount
+
+    def oldest_fetched_at(self) -> Optional[float]:
+        with self._lock:
+            return self._conn.execute("SELECT MIN(fetched_at) FROM problems").fetchone()[0]
+
+    def acquire_lease(self, slug: str, owner: str, ttl_seconds: float) -> bool:
+        """Claim the right to fetch a slug unless another live owner holds it"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM leases WHERE slug = ? AND expires_at < ?", (slug, now)
+            )
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO leases (slug, owner, expires_at) VALUES (?, ?, ?)",
+                (slug, owner, now + ttl_seconds)
+            )
+            return cursor.rowcount == 1
+
+    def release_lease(self, slug: str, owner: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM leases WHERE slug = ? AND owner = ?", (slug, owner))
+
+
+class MongoProblemStore:
+    """Problem store backed by the `problem_cache` collection in MongoDB"""
+
+    def __init__(self, uri: str):
+        from pymongo import ASCENDING, MongoClient
+
+        self.client = MongoClient(uri)
+        self.problems = self.client["dsa_assistant"]["problem_cache"]
+        self.problems.create_index([("last_access", ASCENDING)])
+        self.leases = self.client["dsa_assistant"]["problem_leases"]
+
+    def get(self, slug: str) -> Optional[Tuple[Dict, float]]:
+        doc = self.problems.find_one({"_id": slug}, {"payload": 1, "fetched_at": 1})
+        if doc is None or "payload" not in doc:
+            return None
+        return doc["payload"], doc["fetched_at"].timestamp()
+
+    def put(self, slug: str, payload: Dict, fetched_at: float) -> None:
+        fetched = datetime.fromtimestamp(fetched_at)
+        self.problems.update_one(
+            {"_id": slug},
+            {"$set": {"payload": payload, "fetched_at": fetched, "last_access": fetched}},
+            upsert=True
+        )
+
+    def touch(self, slug: str, accessed_at: float) -> None:
+        self.problems.update_one(
+            {"_id": slug}, {"$set": {"last_access": datetime.fromtimestamp(accessed_at)}}
+        )
+
+    def delete(self, slug: str) -> None:
+        self.problems.delete_one({"_id": slug})
+
+    def count(self) -> int:
+        return self.problems.estimated_document_count()
+
+    def evict(self, max_entries: int) -> int:
+        """Delete least recently used entries beyond max_entries"""
+        excess = self.count() - max_entries
+        if excess <= 0:
+            return 0
+        stale = [
+            doc["_id"]
+            for doc in self.problems.find({}, {"_id": 1}).sort("last_access", 1).limit(excess)
+        ]
+        return self.problems.delete_many({"_id": {"$in": stale}}).deleted_count
+
+    def oldest_fetched_at(self) -> Optional[float]:
+        doc = self.problems.find_one({}, {"fetched_at": 1}, sort=[("fetched_at", 1)])
+        return doc["fetched_at"].timestamp() if doc else None
+
+    def acquire_lease(self, slug: str, owner: str, ttl_seconds: float) -> bool:
+        """Claim the right to fetch a slug unless another live owner holds it"""
+        from pymongo.errors import DuplicateKeyError
+
+        now = datetime.now()
+        self.leases.delete_one({"_id": slug, "expires_at": {"$lt": now}})
+        try:
+            self.leases.insert_one({
+                "_id": slug,
+                "owner": owner,
+                "expires_at": datetime.fromtimestamp(now.timestamp() + ttl_seconds)
+            })
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def release_lease(self, slug: str, owner: str) -> None:
+        self.leases.delete_one({"_id": slug, "owner": owner})
+
+
+class ProblemCache:
+    """
+    Persistent read-through cache of raw problem payloads keyed by title slug.
+
+    Payloads are stored in the shape returned by the LeetCode mirror API so
+    that they can be turned back into `LeetCodeQuestion` objects directly,
+    optionally with a pre-parsed artifact under the `parsed` key.
+    """
+
+    def __init__(self, store=None, ttl_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = metrics.counter("problem_cache.hits", "Problems served from the cache")
+        self.misses = metrics.counter("problem_cache.misses", "Lookups that had to go upstream")
+        self.expired = metrics.counter("problem_cache.expired", "Entries dropped because of TTL")
+        self.evictions = metrics.counter("problem_cache.evictions", "Entries evicted by size")
+        self.errors = metrics.counter("problem_cache.errors", "Store errors (cache bypassed)")
+        self.hit_age_total = metrics.counter(
+            "problem_cache.hit_age_seconds_total", "Summed age of entries served from the cache"
+        )
+        self.last_hit_age = metrics.gauge(
+            "problem_cache.last_hit_age_seconds", "Age of the most recently served entry"
+        )
+
+    @classmethod
+    def from_config(cls) -> "ProblemCache":
+        """Build the cache described by the PROBLEM_CACHE_* settings"""
+        backend = Config.PROBLEM_CACHE_BACKEND.lower()
+        try:
+            if backend == "sqlite":
+                store = SQLiteProblemStore(Config.PROBLEM_CACHE_PATH)
+            elif backend == "mongodb":
+                store = MongoProblemStore(Config.MONGODB_URI)
+            else:
+                store = None
+        except Exception as e:
+            print(f"Problem cache disabled, could not open '{backend}' store: {e}")
+            store = None
+
+        ttl_hours = Config.PROBLEM_CACHE_TTL_HOURS
+        return cls(
+            store=store,
+            ttl_seconds=ttl_hours * 3600 if ttl_hours > 0 else None,
+            max_entries=Config.PROBLEM_CACHE_MAX_ENTRIES or None
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None
+
+    def get(self, slug: str, record_stats: bool = True) -> Optional[Dict]:
+        """
+        Look up a problem payload
+
+        Args:
+            slug: Canonical title slug
+            record_stats: Set to False for polling lookups that should not
+                count as hits or misses
+
+        Returns:
+            The stored payload, or None on a miss or an expired entry
+        """
+        if self.store is None:
+            return None
+
+        try:
+            record = self.store.get(slug)
+            if record is None:
+                if record_stats:
+                    self.misses.inc()
+                return None
+
+            payload, fetched_at = record
+            now = time.time()
+            age = now - fetched_at
+            if self.ttl_seconds is not None and age > self.ttl_seconds:
+                self.store.delete(slug)
+                self.expired.inc()
+                if record_stats:
+                    self.misses.inc()
+                return None
+
+            if record_stats:
+                self.store.touch(slug, now)
+                self.hits.inc()
+                self.hit_age_total.inc(age)
+                self.last_hit_age.set(age)
+            return payload
+        except Exception as e:
+            self.errors.inc()
+            print(f"Error reading problem cache: {e}")
+            return None
+
+    def put(self, slug: str, payload: Dict) -> None:
+        """Store a problem payload and evict the least recently used overflow"""
+        if self.store is None or not payload:
+            return
+
+        try:
+            self.store.put(slug, payload, time.time())
+            if self.max_entries:
+                self.evictions.inc(self.store.evict(self.max_entries))
+        except Exception as e:
+            self.errors.inc()
+            print(f"Error writing problem cache: {e}")
+
+    def update(self, slug: str, payload: Dict) -> None:
+        """Replace a stored payload without resetting its age (TTL still counts from the fetch)"""
+        if self.store is None or not payload:
+            return
+
+        try:
+            record = self.store.get(slug)
+            fetched_at = record[1] if record is not None else time.time()
+            self.store.put(slug, payload, fetched_at)
+            self.store.touch(slug, time.time())
+        except Exception as e:
+            self.errors.inc()
+            print(f"Error writing problem cache: {e}")
+
+    def invalidate(self, slug: str) -> None:
+        """Remove a single problem from the cache"""
+        if self.store is None:
+            return
+
+        try:
+            self.store.delete(slug)
+        except Exception as e:
+            self.errors.inc()
+            print(f"Error invalidating problem cache: {e}")
+
+    def acquire_lease(self, slug: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        Claim the cross-process right to fetch a slug
+
+        Returns:
+            True if this owner may fetch. Without a shared store (or on store
+            errors) the lease is always granted, so fetching never blocks on it.
+        """
+        if self.store is None:
+            return True
+
+        try:
+            return self.store.acquire_lease(slug, owner, ttl_seconds)
+        except Exception as e:
+            self.errors.inc()
+            print(f"Error acquiring problem fetch lease: {e}")
+            return True
+
+    def release_lease(self, slug: str, owner: str) -> None:
+        if self.store is None:
+            return
+
+        try:
+            self.store.release_lease(slug, owner)
+        except Exception as e:
+            self.errors.inc()
+            print(f"Error releasing problem fetch lease: {e}")
+
+    def stats(self) -> Dict[str, any]:
+        """Get hit/miss/age statistics for display"""
+        hits = self.hits.value
+        lookups = hits + self.misses.value
+        status = {
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": self.misses.value,
+            "expired": self.expired.value,
+            "evictions": self.evictions.value,
+            "errors": self.errors.value,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "mean_hit_age_seconds": self.hit_age_total.value / hits if hits else 0.0,
+            "last_hit_age_seconds": self.last_hit_age.value,
+            "entries": 0,
+            "oldest_entry_age_seconds": None,
+        }
+        if self.store is not None:
+            try:
+                status["entries"] = self.store.count()
+                oldest = self.store.oldest_fetched_at()
+                if oldest is not None:
+                    status["oldest_entry_age_seconds"] = time.time() - oldest
+            except Exception as e:
+                print(f"Error reading problem cache stats: {e}")
+        return status
+
+
+# Global problem cache instance
+problem_cache = ProblemCache.from_config()
@@ -1,5 +1,7 @@
 from datetime import datetime
+from components.context_builder import new_summary_state
 from components.db_handler import DatabaseHandler
+from utils.validators import extract_title_slug
 import streamlit as st
 
 def initialize_session_state():
@@ -13,6 +15,10 @@ def initialize_session_state():
         "current_problem": None,
         "current_question": None,
         "problem_details": None,
+        "context_summary": new_summary_state(),
+        "active_generation": None,
+        "chat_id": None,            # Database ID of the current chat, once saved
+        "saved_chat_state": None,   # What the database holds for it, see chat_state()
     }
     
     st.session_state.update({
@@ -20,17 +26,56 @@ def initialize_session_state():
         for k, v in defaults.items()
     })
 
+def track_generation(response_stream):
+    """Remember the generation answering the current turn, so a later run can cancel it"""
+    st.session_state.active_generation = response_stream if hasattr(response_stream, 'cancel') else None
+
+def cancel_active_generation(reason: str):
+    """
+    Cancel the session's in-flight generation, if any
+
+    A generation still running when the next script run starts lost its
+    reader (the student asked again, started a new discussion or switched
+    problems), so it would only burn quota.
+    """
+    generation = st.session_state.get('active_generation')
+    st.session_state.active_generation = None
+    if generation is not None:
+        generation.cancel(reason)
+
 def clear_chat_history():
     """Clear current chat history and selection"""
+    cancel_active_generation("new_discussion")
     st.session_state.messages = []
     st.session_state.current_problem = None
     st.session_state.current_question = None
     st.session_state.problem_details = None
+    st.session_state.context_summary = new_summary_state()
+    forget_saved_chat()
     st.session_state.leetcode_url_input = ''
     st.rerun()
 
+def chat_state(messages, proficiency_level, context_summary):
+    """The parts of a chat that save_current_chat compares to decide what to write"""
+    return {
+        'messages': len(messages),
+        'proficiency_level': proficiency_level,
+        'context_summary': dict(context_summary or {}),
+    }
+
+def forget_saved_chat():
+    """Start a new chat document on the next save"""
+    st.session_state.chat_id = None
+    st.session_state.saved_chat_state = None
+
 def save_current_chat():
-    """Save current chat to database"""
+    """
+    Save what changed in the current chat to the database
+
+    Runs on every rerun, so an unchanged chat is never written. The first save
+    writes the whole chat; after that only new messages are pushed and the
+    summary is updated in place.
+    """
     if not (st.session_state.messages and st.session_state.current_problem):
         return
 
@@ -38,26 +83,40 @@ def save_current_chat():
     if st.session_state.messages[-1]['role'] != 'assistant':
         return
 
+    messages = st.session_state.messages
+    state = chat_state(messages, st.session_state.proficiency_level, st.session_state.context_summary)
+    saved = st.session_state.saved_chat_state
+    if state == saved:
+        return
+
     db_handler = st.session_state.db_handler
+    chat_id = st.session_state.chat_id
+    if chat_id is not None and saved is not None and saved['messages'] <= state['messages']:
+        fields = {
+            key: state[key] for key in ('proficiency_level', 'context_summary')
+            if state[key] != saved[key]
+        }
+        if db_handler.append_to_chat(chat_id, messages[saved['messages']:], fields):
+            st.session_state.saved_chat_state = state
+            return
+        # The chat was deleted meanwhile (or the update failed); write it whole
+
     current_question = st.session_state.current_question
 
     chat_data = {
         'timestamp': datetime.now(),
         'problem_url': st.session_state.current_problem,
+        # The problem itself lives in the problem store; keep a header for listings
+        'problem_slug': extract_title_slug(st.session_state.current_problem),
         'problem_title': current_question.title,
         'difficulty': current_question.difficulty,
-        'messages': st.session_state.messages,
+        'messages': messages,
         'proficiency_level': st.session_state.proficiency_level,
-        'problem_details': {
-            'title': current_question.title,
-            'difficulty': current_question.difficulty,
-            'topics': current_question.topic_tags,
-            'question_text': current_question.question_text,
-            'images': current_question.images if hasattr(current_question, 'images') else [],
-            'examples': current_question.examples if hasattr(current_question, 'examples') else [],
-            'raw_html': current_question.raw_html if hasattr(current_question, 'raw_html') else ''
-        },
-        'summary': db_handler.generate_chat_summary(st.session_state.messages)
+        'summary': db_handler.generate_chat_summary(messages),
+        'context_summary': st.session_state.context_summary
     }
 
-    db_handler.save_chat(chat_data)
\ No newline at end of file
+    chat_id = db_handler.save_chat(chat_data, chat_id)
+    if chat_id is not None:
+        st.session_state.chat_id = chat_id
+        st.session_state.saved_chat_state = state
@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+from utils.metrics import metrics
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait on the same future and receive its result (or
+    exception) instead of repeating the work.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = metrics.counter(f"single_flight.{name}.executions", "Calls that did the work")
+        self.coalesced = metrics.counter(
+            f"single_flight.{name}.coalesced", "Calls that waited on another caller's result"
+        )
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run `fn` once for all concurrent callers with the same key
+
+        Args:
+            key: Identifies the work, e.g. a title slug
+            fn: Zero-argument function performing the work
+
+        Returns:
+            The result of the shared execution
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            self.coalesced.inc()
+            return future.result()
+
+        self.executions.inc()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        """Number of keys currently being worked on"""
+        with self._lock:
+            return len(self._calls)
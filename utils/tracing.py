@@ -0,0 +1,175 @@
+import streamlit as st
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from config.settings import Config
+from utils.metrics import metrics
+
+# Phases of a chat turn, in the order a student waits for them
+PHASES = (
+    "rate_limit",    # Rate and token limit checks
+    "fetch",         # Problem fetch (usually a problem cache hit)
+    "cache_lookup",  # Answer cache and speculative hint lookups
+    "prompt_build",  # Context window and prompt assembly
+    "queue",         # Waiting for a generation slot
+    "send",          # Slot to request sent (e.g. waiting for an API key)
+    "ttft",          # Turn start to first chunk
+    "chunk_gap",     # Between consecutive chunks (one observation per gap)
+    "stream",        # First chunk to last chunk
+    "render",        # Time spent formatting and drawing the answer
+    "save",          # save_current_chat
+    "total",         # Whole turn, answered turns only
+)
+
+_current: ContextVar[Optional["TurnTrace"]] = ContextVar("turn_trace", default=None)
+
+
+class TurnTrace:
+    """Spans of one chat turn; durations of a repeated phase add up"""
+
+    def __init__(self, turn_id: str):
+        self.turn_id = turn_id
+        self.started_at = time.monotonic()
+        self.seconds = None
+        self.outcome = "answered"
+        self.spans: Dict[str, float] = {}
+        self.chunk_gaps: List[float] = []
+
+    @contextmanager
+    def span(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def add_stream(self, stream) -> None:
+        """Take queue, send and chunk timings from a consumed response stream"""
+        first = getattr(stream, "first_chunk_at", None)
+        if first is None:
+            return  # An error message, or nothing was produced
+        submitted = getattr(stream, "submitted_at", None)
+        dispatched = getattr(stream, "dispatched_at", None)
+        sent = getattr(stream, "sent_at", None)
+        if submitted is not None and dispatched is not None:
+            self.add("queue", dispatched - submitted)
+        if dispatched is not None and sent is not None:
+            self.add("send", sent - dispatched)
+        self.add("ttft", first - self.started_at)
+        self.add("stream", stream.last_chunk_at - first)
+        self.chunk_gaps.extend(stream.chunk_gaps)
+
+    def summary(self) -> str:
+        parts = [f"{name}={self.spans[name] * 1000:.0f}ms" for name in PHASES if name in self.spans]
+        if self.chunk_gaps:
+            parts.append(f"max_gap={max(self.chunk_gaps) * 1000:.0f}ms")
+        return " ".join(parts)
+
+
+class TurnTracer:
+    """
+    Per-turn latency spans aggregated into rolling percentiles.
+
+    Each phase feeds a `turn.<phase>_seconds` histogram, so percentiles cover
+    the latest turns of the process; the most recent traces are kept for the
+    latency panel.
+    """
+
+    def __init__(self, recent: int = 20):
+        self._histograms = {
+            phase: metrics.histogram(f"turn.{phase}_seconds", f"Chat turn phase: {phase}")
+            for phase in PHASES
+        }
+        self._outcomes: Dict[str, object] = {}
+        self._recent = deque(maxlen=recent)
+
+    @contextmanager
+    def turn(self):
+        """Trace a chat turn; spans recorded inside it, on this thread, belong to it"""
+        trace = TurnTrace(uuid.uuid4().hex[:8])
+        token = _current.set(trace)
+        try:
+            yield trace
+        finally:
+            _current.reset(token)
+            self._finish(trace)
+
+    def _finish(self, trace: TurnTrace) -> None:
+        trace.seconds = time.monotonic() - trace.started_at
+        if trace.outcome == "answered":
+            trace.spans["total"] = trace.seconds
+        for name, seconds in trace.spans.items():
+            self._histograms[name].observe(seconds)
+        for gap in trace.chunk_gaps:
+            self._histograms["chunk_gap"].observe(gap)
+        outcome = self._outcomes.get(trace.outcome)
+        if outcome is None:
+            outcome = metrics.counter(f"turn.outcome.{trace.outcome}", f"Chat turns ending {trace.outcome}")
+            self._outcomes[trace.outcome] = outcome
+        outcome.inc()
+        self._recent.append(trace)
+        print(f"Turn {trace.turn_id} ({trace.outcome}): {trace.summary()}")
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Rolling percentiles per phase, in seconds"""
+        return {
+            phase: {
+                "count": histogram.count,
+                "p50": histogram.percentile(50),
+                "p90": histogram.percentile(90),
+                "p99": histogram.percentile(99),
+            }
+            for phase, histogram in self._histograms.items()
+        }
+
+    def recent(self) -> List[TurnTrace]:
+        return list(self._recent)
+
+    def display_latency_panel(self) -> None:
+        """Show per-phase percentiles and the latest turns (LATENCY_PANEL_ENABLED)"""
+        if not Config.LATENCY_PANEL_ENABLED:
+            return
+
+        def ms(seconds):
+            return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+        with st.expander("⏱️ Latency", expanded=False):
+            st.table([
+                {"phase": phase, "turns": row["count"], "p50 ms": ms(row["p50"]),
+                 "p90 ms": ms(row["p90"]), "p99 ms": ms(row["p99"])}
+                for phase, row in self.stats().items() if row["count"]
+            ])
+            for trace in reversed(self.recent()[-5:]):
+                st.caption(f"{trace.turn_id} ({trace.outcome}): {trace.summary()}")
+
+
+def current_trace() -> Optional[TurnTrace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """Time a phase of the current turn; a no-op outside a traced turn"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(name):
+        yield
+
+
+def add_span(name: str, seconds: float) -> None:
+    """Add a measured duration to the current turn, if any"""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+# Global turn tracer instance
+tracer = TurnTracer()
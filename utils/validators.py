@@ -13,3 +13,21 @@ def is_valid_leetcode_url(url: str) -> bool:
     """
     pattern = re.compile(r"^(https?://)?(www\.)?leetcode\.com/problems/[\w-]+/?$")
     return bool(pattern.match(url))
+
+
+def extract_title_slug(url_or_slug: str) -> str:
+    """
+    Extract the canonical title slug from a LeetCode URL or a bare slug.
+
+    Args:
+        url_or_slug (str): A problem URL (with or without suffixes such as
+            `/description/`) or a title slug.
+
+    Returns:
+        str: The lower-cased title slug, e.g. `two-sum`.
+    """
+    value = url_or_slug.strip()
+    if "problems/" in value:
+        value = value.split("problems/", 1)[1]
+    value = value.split("?", 1)[0].split("#", 1)[0]
+    return value.strip("/").split("/", 1)[0].lower()